@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+RSS快速解析器对照测试和性能测试
+
+把src/rss_fast_parser.py（Twitter桥接等已知格式使用）与feedparser对比：
+1. 对照测试：同一内容经两条路径得到的订阅源信息和条目（包括内容摘要）必须一致
+2. 性能测试：比较每个订阅源的解析耗时（只解析文档，以及包含HTML清理的完整流程）
+
+用法: python bench_feed_parser.py [--rounds N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+import feedparser
+
+from feed_parser import parse_document, parse_feed
+from rss_fast_parser import parse_rss
+
+BRIDGE_URL = 'https://api.xgo.ing/rss/user/0c0856a69f9f49cf961018c32a0b0049'
+
+TWEET = (
+    '<div style="border: 1px solid #e1e8ed; border-radius: 12px; padding: 12px;">'
+    '<p style="font-size: 15px; line-height: 1.5;">Shipping release {n} today &amp; it is fast. '
+    'Read more at <a href="https://t.co/{n}">t.co/{n}</a> #release</p>'
+    '<img src="https://pbs.twimg.com/media/{n}.jpg" style="max-width: 100%;">'
+    '<blockquote><p>Quoted tweet &mdash; <a href="https://x.com/user/status/1">link</a></p></blockquote>'
+    '</div>'
+)
+
+BRIDGE_ITEM = '''
+<item>
+<title><![CDATA[Shipping release {n} today & it is fast]]></title>
+<description><![CDATA[{body}]]></description>
+<link>https://x.com/user/status/{n}</link>
+<guid isPermaLink="false">https://x.com/user/status/{n}</guid>
+<pubDate>Sat, 07 Jun 2025 17:{minute:02d}:37 GMT</pubDate>
+<author>Some User</author>
+</item>'''
+
+BRIDGE_FEED = '''<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">
+<channel>
+<title><![CDATA[Some User(@user)]]></title>
+<link>https://x.com/user</link>
+<description><![CDATA[Twitter feed for @user]]></description>
+<atom:link href="{url}" rel="self" type="application/rss+xml"/>
+<lastBuildDate>Sat, 07 Jun 2025 18:00:00 GMT</lastBuildDate>
+<ttl>60</ttl>
+{items}
+</channel>
+</rss>'''
+
+
+def bridge_feed(count: int = 20, offset: int = 0) -> bytes:
+    """模拟的Twitter桥接订阅源"""
+    items = ''.join(
+        BRIDGE_ITEM.format(n=1800000000000000000 + offset + n, minute=n % 60,
+                           body=TWEET.format(n=offset + n))
+        for n in range(count)
+    )
+    return BRIDGE_FEED.format(url=BRIDGE_URL, items=items).encode('utf-8')
+
+
+def rss_feed(items: str) -> bytes:
+    return (
+        '<?xml version="1.0"?>'
+        '<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'xmlns:dc="http://purl.org/dc/elements/1.1/"><channel><title>T &amp; U</title>'
+        '<link>http://example.com/</link><description>D</description>'
+        f'{items}</channel></rss>'
+    ).encode('utf-8')
+
+
+# 对照样例：覆盖桥接输出中出现的写法和快速解析器需要退回feedparser的情况
+PARITY_CASES = [
+    ('桥接订阅源', bridge_feed(30)),
+    ('纯文本描述', rss_feed('<item><title>t</title><description>plain &amp; text</description>'
+                         '<guid>1</guid></item>')),
+    ('CDATA中的特殊字符', rss_feed('<item><title><![CDATA[A &amp; B]]></title>'
+                               '<description><![CDATA[a < b & c <3]]></description>'
+                               '<guid>2</guid></item>')),
+    ('危险标签和属性', rss_feed('<item><title>x</title><description><![CDATA[<p onclick="x()">hi'
+                             '<script>alert(1)</script><a href="javascript:alert(1)">a</a>'
+                             '<iframe src="https://e.com"></iframe></p>]]></description>'
+                             '<guid>3</guid></item>')),
+    ('guid作为链接', rss_feed('<item><title>x</title><guid>http://example.com/p/4</guid></item>')),
+    ('非永久链接guid', rss_feed('<item><title>x</title><guid isPermaLink="false">g5</guid></item>')),
+    ('无guid', rss_feed('<item><title>x</title><link>http://example.com/p/6?a=1&amp;b=2</link>'
+                      '<pubDate>Mon, 02 Jan 2006 15:04:05 +0800</pubDate></item>')),
+    ('全文和dc:creator', rss_feed('<item><title>x</title><description>short</description>'
+                                '<content:encoded><![CDATA[<p>full <b>text</b></p>]]></content:encoded>'
+                                '<dc:creator>Bob</dc:creator><guid>7</guid></item>')),
+    ('Atom文档（退回feedparser）',
+     b'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>A</title>'
+     b'<entry><title>e</title><id>urn:1</id><link href="http://example.com/e"/>'
+     b'<updated>2006-01-02T15:04:05Z</updated><summary>s</summary></entry></feed>'),
+    ('格式错误（退回feedparser）', b'<rss version="2.0"><channel><title>x</title><item>'),
+]
+
+
+def run_parity_tests() -> bool:
+    """对照测试，返回是否全部通过"""
+    print("🧪 对照测试")
+    failures = 0
+
+    for name, content in PARITY_CASES:
+        expected = parse_feed(content)
+        actual = parse_feed(content, url=BRIDGE_URL)
+        if actual != expected:
+            failures += 1
+            print(f"❌ {name}")
+            print(f"   feedparser: {expected!r}"[:400])
+            print(f"   快速解析:   {actual!r}"[:400])
+
+    total = len(PARITY_CASES)
+    print(f"{'✅' if not failures else '❌'} {total - failures}/{total} 个样例一致")
+    return failures == 0
+
+
+def run_benchmark(rounds: int):
+    """性能测试：比较两条路径解析同一批订阅源的耗时"""
+    print("\n⏱️ 性能测试")
+    corpus = [bridge_feed(20, offset=feed * 100) for feed in range(50)]
+    size_kb = sum(len(doc) for doc in corpus) / 1024
+    print(f"样本: {len(corpus)} 个订阅源，每个20条，共 {size_kb:.0f}KB，重复 {rounds} 轮")
+
+    stages = (
+        ('只解析文档', lambda doc: feedparser.parse(doc), lambda doc: parse_rss(doc)),
+        ('完整流程', lambda doc: parse_feed(doc), lambda doc: parse_feed(doc, url=BRIDGE_URL)),
+    )
+    for stage, slow, fast in stages:
+        timings = {}
+        for name, func in (('feedparser', slow), ('快速解析', fast)):
+            best = float('inf')
+            for _ in range(rounds):
+                start = time.perf_counter()
+                for doc in corpus:
+                    func(doc)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+            per_feed = best / len(corpus)
+            print(f"[{stage}] {name}: 每个订阅源 {per_feed * 1000:.2f}ms（{1 / per_feed:.0f} 个/秒）")
+        print(f"[{stage}] 🚀 加速比: {timings['feedparser'] / timings['快速解析']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RSS快速解析器对照测试和性能测试")
+    parser.add_argument('--rounds', type=int, default=3, help="性能测试轮数，取最快一轮")
+    args = parser.parse_args()
+
+    # 确认桥接地址确实使用快速解析器
+    assert parse_document(bridge_feed(1), BRIDGE_URL) == parse_rss(bridge_feed(1))
+
+    passed = run_parity_tests()
+    run_benchmark(args.rounds)
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+HTML清理器对照测试和性能测试
+
+把src/html_sanitizer.py与原先逐条re.sub的清理流程对比：
+1. 对照测试：样例的输出必须与原流程一致（有意修正的行为单独列出期望结果）
+2. 性能测试：在模拟的Twitter桥接内容和长文章上比较两者的耗时
+
+用法: python bench_html_sanitizer.py [--rounds N]
+"""
+
+import argparse
+import html
+import os
+import re
+import sys
+import time
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from html_sanitizer import sanitize_html
+from json_storage import JsonStorage
+from storage import open_storage
+
+
+def legacy_clean_html(html_content: str) -> str:
+    """原先的清理流程（逐条re.sub），作为对照实现"""
+    if not html_content:
+        return ''
+
+    # 解码HTML实体
+    content = html.unescape(html_content)
+
+    # 移除完整的style属性（如style="font-family: Arial; color: #333;"）
+    content = re.sub(
+        r'\s*style\s*=\s*["\'][^"\'>]*["\']',
+        '',
+        content,
+        flags=re.IGNORECASE
+    )
+
+    # 移除内联CSS样式字符串（如#ffffff; border: 1px solid #e1e8ed; padding: 0; line-height: 1.5;）
+    content = re.sub(
+        r'#[0-9a-fA-F]{3,6};\s*[^;]*;[^<>]*',
+        '',
+        content,
+        flags=re.IGNORECASE
+    )
+
+    # 移除单独的CSS属性字符串（如border: 1px solid, padding: 0等）
+    content = re.sub(
+        r'\b(?:border|padding|margin|color|background|font|width|height|display|position|overflow|line-height|font-size|font-family|white-space)\s*:\s*[^;\n<>]+;?',
+        '',
+        content,
+        flags=re.IGNORECASE
+    )
+
+    # 移除单独的颜色值（如#ffffff, #e1e8ed等）
+    content = re.sub(
+        r'\s*#[0-9a-fA-F]{3,6}\s*',
+        ' ',
+        content
+    )
+
+    # 移除单独出现的CSS单位（如px, em, %等）
+    content = re.sub(
+        r'\b\d+(?:px|em|rem|%|pt|vh|vw)\b',
+        '',
+        content
+    )
+
+    # 移除空的HTML标签属性（如<div >）
+    content = re.sub(
+        r'<(\w+)\s+>',
+        r'<\1>',
+        content
+    )
+
+    # 移除多余的分号和空白字符
+    content = re.sub(r';+', ';', content)
+    content = re.sub(r'\s*;\s*', '; ', content)
+    content = re.sub(r'\s+', ' ', content)
+
+    # 移除单独的分号和只包含空白的段落
+    content = re.sub(r'<p[^>]*>\s*;*\s*</p>', '', content, flags=re.IGNORECASE)
+    content = re.sub(r'<div[^>]*>\s*;*\s*</div>', '', content, flags=re.IGNORECASE)
+
+    # 移除只包含> 符号的标签
+    content = re.sub(r'<([^>]+)>\s*>\s*</\1>', '', content, flags=re.IGNORECASE)
+    content = re.sub(r'>\s*>', '>', content)
+
+    # 确保图片标签有正确的属性
+    content = re.sub(
+        r'<img([^>]*?)>',
+        lambda m: _legacy_fix_img_tag(m.group(0)),
+        content,
+        flags=re.IGNORECASE
+    )
+
+    # 确保链接在新窗口打开
+    content = re.sub(
+        r'<a([^>]*?)href="([^"]*?)"([^>]*?)>',
+        r'<a\1href="\2"\3 target="_blank" rel="noopener noreferrer">',
+        content,
+        flags=re.IGNORECASE
+    )
+
+    # 处理空白的图片标签
+    content = re.sub(
+        r'<img[^>]*?src=""[^>]*?>',
+        '<div class="image-placeholder"><i class="bi bi-image"></i><p>图片链接无效</p></div>',
+        content,
+        flags=re.IGNORECASE
+    )
+
+    # 最后清理：移除空的标签和多余的空白
+    content = re.sub(r'<([^>]+)>\s*</\1>', '', content, flags=re.IGNORECASE)
+    content = re.sub(r'\s+', ' ', content)
+    content = content.strip()
+
+    return content
+
+def _legacy_fix_img_tag(img_tag: str) -> str:
+    """修复图片标签，确保有正确的属性"""
+
+    # 如果没有alt属性，添加默认值
+    if 'alt=' not in img_tag.lower():
+        img_tag = img_tag.replace('>', ' alt="图片">', 1)
+
+    # 如果没有loading属性，添加lazy loading
+    if 'loading=' not in img_tag.lower():
+        img_tag = img_tag.replace('>', ' loading="lazy">', 1)
+
+    # 确保有style或class用于响应式
+    if 'style=' not in img_tag.lower() and 'class=' not in img_tag.lower():
+        img_tag = img_tag.replace('>', ' style="max-width: 100%; height: auto;">', 1)
+
+    return img_tag
+
+
+# 对照样例：输出必须与原流程完全一致
+GOLDEN_CASES = [
+    '<p>Hello <b>world</b></p>',
+    '&lt;p&gt;Escaped &amp; text&lt;/p&gt;',
+    '<div style="border: 1px solid #e1e8ed; padding: 0; line-height: 1.5;"><p>Tweet body</p></div>',
+    '<div>#ffffff; border: 1px solid #e1e8ed; padding: 0; line-height: 1.5;</div><p>Real text</p>',
+    'Text with color: red; and font-size: 12px; leftovers',
+    '<p>Check #cafe and #123456 colors</p>',
+    '<p>Width 100px and 50% off 2em</p>',
+    '<p> ; </p><div>;;</div><span></span><b> </b>Keep',
+    '<p class="x">   </p><div id="a"> ; </div>after',
+    '<p>&nbsp;</p>after',
+    '<p>> quoted</p><b>></b>',
+    '<img src="https://pbs.twimg.com/media/a.jpg">',
+    '<img src="a.jpg" alt="x" loading="eager" class="c">',
+    '<IMG SRC="a.jpg" STYLE="width:10px">',
+    '<img src="">',
+    '<img src="a.jpg" />',
+    '<a href="https://x.com/a">link</a> and <a name="n">anchor</a>',
+    "<a href='single'>quoted</a>",
+    '<div><p></p></div>tail',
+    '<blockquote class="twitter-tweet"><p lang="en" dir="ltr">RT <a href="https://t.co/x">@user</a>: hi</p>'
+    '&mdash; Name (@user) <a href="https://twitter.com/user/status/1">Oct 1</a></blockquote>',
+    'a < b and c > d',
+    '<br><br/>line<hr>',
+    '<p>semi;colon;;text ; here</p>',
+    '<!-- comment --><p>after comment</p>',
+    '<div style="display:flex"><img src="x.png" style="max-width:100%"><span style="color:#333">cap</span></div>',
+    '  multiple\n\n   spaces\t here  ',
+    '<ul><li>one</li><li></li></ul>',
+    '<p>text</p> <p></p>> tail',
+    '',
+]
+
+# 有意修正的行为：(说明, 输入, 新的期望输出)
+KNOWN_DIFFERENCES = [
+    ('嵌套的空标签整体删除（原流程只删除最内层一级）',
+     '<div><span><b></b></span></div>after',
+     'after'),
+    ('CSS残留规则不再跨越标签吞掉正文',
+     '<p>#fff; border: 1px solid <b>bold</b> text; more</p>',
+     '<p>; <b>bold</b> text; more</p>'),
+    ('标签属性中的#颜色值和锚点保留（原流程把属性值替换为空格）',
+     '<font color="#ff0000">red</font> <a href="#top">top</a>',
+     '<font color="#ff0000">red</font> <a href="#top" target="_blank" rel="noopener noreferrer">top</a>'),
+    ('未加引号的#颜色属性同样保留',
+     '<td bgcolor=#ffffff>cell</td>',
+     '<td bgcolor=#ffffff>cell</td>'),
+    ('带属性的div只包着空标签时整体删除（原流程删除内层后留下空的<div class="x"></div>）',
+     '<div class="x"><span></span></div>after',
+     'after'),
+    ('带属性的p/div只包着空白标签时同样整体删除',
+     '<div id="a"><b> </b></div><p class="q"><i></i></p>tail',
+     'tail'),
+]
+
+
+def run_golden_tests() -> bool:
+    """对照测试，返回是否全部通过"""
+    print("🧪 对照测试")
+    failures = 0
+
+    for case in GOLDEN_CASES:
+        expected = legacy_clean_html(case)
+        actual = sanitize_html(case)
+        if actual != expected:
+            failures += 1
+            print(f"❌ 输入: {case!r}")
+            print(f"   原流程: {expected!r}")
+            print(f"   新实现: {actual!r}")
+
+    for description, case, expected in KNOWN_DIFFERENCES:
+        actual = sanitize_html(case)
+        if actual != expected:
+            failures += 1
+            print(f"❌ {description}")
+            print(f"   期望: {expected!r}")
+            print(f"   实际: {actual!r}")
+
+    total = len(GOLDEN_CASES) + len(KNOWN_DIFFERENCES)
+    print(f"{'✅' if not failures else '❌'} {total - failures}/{total} 个样例通过")
+    return failures == 0
+
+
+def compare_stored_items() -> int:
+    """用已保存的内容（feeds_data.db或旧的feeds_data.json）再对照一遍，返回不一致的条目数"""
+    root = os.path.dirname(__file__)
+    db_file = os.path.join(root, 'feeds_data.db')
+    if os.path.exists(db_file):
+        storage = open_storage(db_file)
+    else:
+        storage = JsonStorage(os.path.join(root, 'feeds_data.json'))
+        if not storage.exists():
+            return 0
+
+    try:
+        _, feeds = storage.load()
+    finally:
+        storage.close()
+
+    checked = mismatched = 0
+    for feed in feeds:
+        for item in feed.items:
+            description = item.description
+            checked += 1
+            if sanitize_html(description) != legacy_clean_html(description):
+                mismatched += 1
+
+    print(f"📄 已保存条目对照: {checked - mismatched}/{checked} 一致")
+    return mismatched
+
+
+def build_corpus() -> list:
+    """模拟的测试内容：Twitter桥接条目（带内联样式和泄漏的CSS）和长文章"""
+    tweet = (
+        '<div style="border: 1px solid #e1e8ed; border-radius: 12px; padding: 12px; margin: 8px 0;">'
+        '<div style="display: flex; align-items: center;">'
+        '<img src="https://pbs.twimg.com/profile_images/1/avatar.jpg" style="width: 48px; height: 48px;">'
+        '<span style="font-weight: bold; color: #0f1419;">Author</span></div>'
+        '<p style="font-size: 15px; line-height: 1.5;">Shipping a new release today &amp; it is fast. '
+        'Read more at <a href="https://t.co/abc">t.co/abc</a> #release</p>'
+        '#ffffff; border: 1px solid #e1e8ed; padding: 0; line-height: 1.5;'
+        '<img src="https://pbs.twimg.com/media/photo.jpg"><p> ; </p><div></div>'
+        '<blockquote style="border-left: 4px solid #ccc;"><p>Quoted tweet &mdash; '
+        '<a href="https://twitter.com/user/status/1">link</a></p></blockquote></div>'
+    )
+    paragraph = (
+        '<p>Performance work starts with measurement. The refresh pipeline downloads, parses and '
+        'cleans every entry, so any per-character work in the cleaner multiplies across feeds. '
+        'See <a href="https://example.com/post">the post</a> for details.</p>\n'
+    )
+    article = '<article>' + paragraph * 40 + '<img src="https://example.com/chart.png"></article>'
+
+    return [tweet * 3] * 200 + [article] * 40
+
+
+def run_benchmark(rounds: int):
+    """性能测试：比较两种实现处理同一批内容的耗时"""
+    print("\n⏱️ 性能测试")
+    corpus = build_corpus()
+    size_kb = sum(len(doc) for doc in corpus) / 1024
+    print(f"样本: {len(corpus)} 条，共 {size_kb:.0f}KB，重复 {rounds} 轮")
+
+    timings = {}
+    for name, func in (('原流程', legacy_clean_html), ('新实现', sanitize_html)):
+        best = float('inf')
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for doc in corpus:
+                func(doc)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name}: {best * 1000:.1f}ms（每条 {best / len(corpus) * 1e6:.0f}µs）")
+
+    print(f"🚀 加速比: {timings['原流程'] / timings['新实现']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML清理器对照测试和性能测试")
+    parser.add_argument('--rounds', type=int, default=5, help="性能测试轮数，取最快一轮")
+    args = parser.parse_args()
+
+    passed = run_golden_tests()
+    mismatched = compare_stored_items()
+    run_benchmark(args.rounds)
+
+    if not passed or mismatched:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+数据文件格式的加载/保存性能测试
+
+比较原JSON数据文件（缩进的UTF-8 JSON，加载时逐字段创建对象并解析ISO时间）
+与二进制快照（src/binary_snapshot.py）：
+1. 往返测试：两种格式加载后的订阅源和条目必须与原数据一致
+2. 性能测试：保存和加载的耗时及文件大小
+
+用法: python bench_store_format.py [--feeds N] [--items N] [--rounds N]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from binary_snapshot import read_snapshot, write_snapshot
+from models import Feed, FeedItem
+from storage import STORE_VERSION, atomic_write_json, feed_from_dict, feed_to_dict
+
+TWEET = (
+    '<div><p>Shipping release {n} today &amp; it is fast. Read more at '
+    '<a href="https://t.co/{n}">t.co/{n}</a> #release</p>'
+    '<img src="https://pbs.twimg.com/media/{n}.jpg" width="600" height="400">'
+    '<blockquote><p>Quoted tweet &mdash; <a href="https://x.com/user/status/1">link</a></p></blockquote>'
+    '</div>'
+)
+
+
+def build_feeds(feed_count: int, item_count: int) -> list:
+    """模拟的订阅数据：Twitter桥接订阅源，每个订阅源的作者相同"""
+    start = datetime(2025, 6, 7, tzinfo=timezone.utc)
+    feeds = []
+    for f in range(feed_count):
+        feed = Feed(
+            title=f'User {f}(@user{f})',
+            url=f'https://api.xgo.ing/rss/user/{f:032x}',
+            description=f'Twitter feed for @user{f}',
+            link=f'https://x.com/user{f}',
+            last_updated=datetime(2025, 6, 7, 18, 0, 0, 123456),
+            etag=f'"{f:016x}"',
+            ttl=60,
+            content_hash=f'{f:064x}'
+        )
+        for i in range(item_count):
+            n = f * item_count + i
+            feed.items.append(FeedItem(
+                title=f'Shipping release {n} today & it is fast',
+                link=f'https://x.com/user{f}/status/{1800000000000000000 + n}',
+                description=TWEET.format(n=n),
+                published=start - timedelta(minutes=n),
+                author=f'User {f}',
+                guid=f'{n:032x}',
+                content_hash=f'{n:064x}'
+            ))
+        feeds.append(feed)
+    return feeds
+
+
+def save_json(path: str, feeds: list):
+    atomic_write_json(path, {'version': STORE_VERSION, 'feeds': [feed_to_dict(feed) for feed in feeds]})
+
+
+def load_json(path: str) -> list:
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [feed_from_dict(feed_data) for feed_data in data['feeds']]
+
+
+def save_binary(path: str, feeds: list):
+    write_snapshot(path, STORE_VERSION, feeds)
+
+
+def load_binary(path: str) -> list:
+    return read_snapshot(path)[1]
+
+
+FORMATS = (
+    ('JSON', 'feeds_data.json', save_json, load_json),
+    ('二进制快照', 'feeds_data.json.snap', save_binary, load_binary),
+)
+
+
+def best_time(func, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="数据文件格式的加载/保存性能测试")
+    parser.add_argument('--feeds', type=int, default=100, help="订阅源数")
+    parser.add_argument('--items', type=int, default=100, help="每个订阅源的条目数")
+    parser.add_argument('--rounds', type=int, default=3, help="每项测试的轮数，取最快一轮")
+    args = parser.parse_args()
+
+    feeds = build_feeds(args.feeds, args.items)
+    print(f"样本: {args.feeds} 个订阅源，每个 {args.items} 条，重复 {args.rounds} 轮")
+
+    passed = True
+    timings = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, filename, save, load in FORMATS:
+            path = os.path.join(directory, filename)
+            save_time = best_time(lambda: save(path, feeds), args.rounds)
+            load_time = best_time(lambda: load(path), args.rounds)
+            timings[name] = (save_time, load_time)
+
+            same = load(path) == feeds
+            passed = passed and same
+            size_mb = os.path.getsize(path) / 1024 / 1024
+            print(f"[{name}] {'✅' if same else '❌'} 往返一致  大小 {size_mb:.1f}MB  "
+                  f"保存 {save_time * 1000:.0f}ms  加载 {load_time * 1000:.0f}ms")
+
+    (json_save, json_load), (binary_save, binary_load) = timings.values()
+    print(f"🚀 加载加速比: {json_load / binary_load:.2f}x  保存加速比: {json_save / binary_save:.2f}x")
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """
-刷新RSS数据，更新空的GUID值
+迁移条目ID：把旧版本用hash()生成的条目ID替换为稳定ID
+
+FeedManager加载旧格式数据文件时会自动迁移，这个脚本用于手动执行并查看结果
 """
 
 import sys
@@ -12,21 +14,14 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 from feed_manager import FeedManager
 
 def main():
-    """刷新所有RSS源的数据"""
+    """迁移所有订阅源的条目ID"""
     feed_manager = FeedManager()
-    
-    print("正在刷新所有RSS源...")
-    results = feed_manager.refresh_all_feeds()
-    
-    success_count = 0
-    for url, result in results.items():
-        if result['success']:
-            success_count += 1
-            print(f"✓ {url}: {result['message']}")
-        else:
-            print(f"✗ {url}: {result['message']}")
-    
-    print(f"\n刷新完成: {success_count}/{len(results)} 个RSS源成功刷新")
+
+    print("正在检查条目ID...")
+    migrated = feed_manager.migrate_item_ids()
+
+    total = sum(len(feed.items) for feed in feed_manager.get_all_feeds())
+    print(f"\n检查完成: 共 {total} 个条目，本次迁移 {migrated} 个")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -2,11 +2,15 @@
 Twitter RSS订阅管理器 - Flask Web应用
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import (Flask, Response, render_template, request, jsonify, redirect, url_for, flash,
+                   stream_with_context)
 import os
 import json
 from datetime import datetime
-from feed_manager import FeedManager
+from feed_manager import FeedManager, UNCHANGED_MESSAGE
+from http_client import get_http_client
+from item_text import make_excerpt, plain_text
+from job_queue import JobQueue
 from models import Feed, FeedItem
 from trending_generator import TrendingGenerator
 
@@ -19,11 +23,81 @@ app = Flask(__name__,
            static_folder=os.path.join(project_root, 'static'))
 app.secret_key = 'twitter_rss_manager_secret_key_2024'
 
-# 初始化RSS管理器
-feed_manager = FeedManager()
+# 初始化RSS管理器（交互式修改延迟2秒合并写入）
+feed_manager = FeedManager(flush_delay=2.0)
 
 # 初始化热门榜单生成器
-trending_generator = TrendingGenerator()
+trending_generator = TrendingGenerator(feed_manager=feed_manager)
+
+# 后台任务队列：耗时操作不占用请求线程，任务记录保存在job_records目录
+job_queue = JobQueue(os.path.join(project_root, 'job_records'))
+
+
+def run_import_opml(ctx, opml_content):
+    """后台任务 - 导入OPML"""
+    total = len(feed_manager.parse_opml_outlines(opml_content))
+    done = 0
+    
+    def report(url, success, message):
+        nonlocal done
+        done += 1
+        ctx.report(done, total, message)
+        ctx.emit('feed', {'url': url, 'success': success, 'message': message,
+                          'done': done, 'total': total})
+    
+    success_count, total_count, error_messages, timings = feed_manager.import_opml_parallel(
+        opml_content, progress_callback=report
+    )
+    return {
+        'success_count': success_count,
+        'total_count': total_count,
+        'errors': error_messages,
+        'timings': timings
+    }
+
+
+def run_refresh_all(ctx):
+    """后台任务 - 刷新所有订阅源"""
+    total = len(feed_manager.get_all_feeds())
+    done = 0
+    
+    def report(url, success, message):
+        nonlocal done
+        done += 1
+        ctx.report(done, total, message)
+        ctx.emit('feed', {'url': url, 'success': success, 'message': message,
+                          'unchanged': success and message == UNCHANGED_MESSAGE,
+                          'done': done, 'total': total})
+    
+    results = feed_manager.refresh_feeds_concurrent(progress_callback=report)
+    success_count = sum(1 for r in results.values() if r['success'])
+    unchanged_count = sum(1 for r in results.values() if r.get('unchanged'))
+    new_items = sum(r.get('new_items', 0) for r in results.values())
+    # 单个订阅源的结果已通过事件流推送，这里只保留失败项
+    return {
+        'message': f'刷新完成: {success_count}/{len(results)} 成功，{unchanged_count} 个内容未变化，新增 {new_items} 条',
+        'success_count': success_count,
+        'unchanged_count': unchanged_count,
+        'new_items': new_items,
+        'total_count': len(results),
+        'failures': {url: r['message'] for url, r in results.items() if not r['success']}
+    }
+
+
+def run_generate_trending(ctx, hours, top_count, refresh_feeds, use_ai_summary):
+    """后台任务 - 生成热门榜单"""
+    result = trending_generator.generate_trending_lists(
+        hours=hours,
+        top_count=top_count,
+        refresh_feeds=refresh_feeds,
+        use_ai_summary=use_ai_summary,
+        progress_callback=ctx.emit
+    )
+    return {
+        'general_count': len(result['general']['items']),
+        'categories_count': len(result['categories']),
+        'generated_at': result['meta']['generated_at']
+    }
 
 @app.route('/')
 def index():
@@ -76,10 +150,9 @@ def test_feed():
         import requests
         import feedparser
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        _, content = get_http_client().fetch(url)
         
-        parsed_feed = feedparser.parse(response.content)
+        parsed_feed = feedparser.parse(content)
         
         if parsed_feed.bozo:
             return jsonify({'success': False, 'message': '无效的RSS格式'})
@@ -100,19 +173,21 @@ def test_feed():
 def refresh_feed(feed_url):
     """API - 刷新指定订阅源"""
     success, message = feed_manager.refresh_feed(feed_url)
-    return jsonify({'success': success, 'message': message})
+    return jsonify({
+        'success': success,
+        'message': message,
+        'unchanged': success and message == UNCHANGED_MESSAGE
+    })
 
 @app.route('/api/refresh_all', methods=['POST'])
 def refresh_all_feeds():
-    """API - 刷新所有订阅源"""
-    results = feed_manager.refresh_all_feeds()
-    success_count = sum(1 for r in results.values() if r['success'])
-    total_count = len(results)
-    
+    """API - 刷新所有订阅源（后台任务，返回任务ID）"""
+    # 已有刷新任务在进行时直接返回该任务
+    job = job_queue.submit('refresh_all', run_refresh_all, dedupe_key='refresh_all')
     return jsonify({
         'success': True,
-        'message': f'刷新完成: {success_count}/{total_count} 成功',
-        'results': results
+        'message': '刷新任务已提交',
+        'job_id': job.id
     })
 
 @app.route('/api/remove_feed/<path:feed_url>', methods=['DELETE'])
@@ -156,15 +231,18 @@ def import_opml():
         if file and (file.filename.endswith('.opml') or file.filename.endswith('.xml')):
             try:
                 opml_content = file.read().decode('utf-8')
-                success_count, total_count, error_messages = feed_manager.import_opml(opml_content)
                 
-                if total_count > 0:
-                    flash(f'导入完成：{success_count}/{total_count} 个订阅源添加成功', 'success')
-                    if error_messages:
-                        flash(f'部分失败: {len(error_messages)} 个订阅源导入失败', 'warning')
-                else:
+                # 先检查OPML是否有效，再交给后台任务导入
+                if not feed_manager.parse_opml_outlines(opml_content):
                     flash('未找到有效的RSS订阅源', 'error')
+                    return render_template('import_opml.html')
                 
+                job = job_queue.submit('import_opml', run_import_opml, opml_content)
+                
+                if request.accept_mimetypes.best == 'application/json':
+                    return jsonify({'success': True, 'message': '导入任务已提交', 'job_id': job.id})
+                
+                flash(f'导入任务已提交（任务ID: {job.id}），完成后刷新页面即可看到新订阅源', 'success')
                 return redirect(url_for('index'))
                 
             except Exception as e:
@@ -184,7 +262,6 @@ def export_opml():
     
     opml_content = feed_manager.export_opml()
     
-    from flask import Response
     return Response(
         opml_content,
         mimetype='application/xml',
@@ -239,23 +316,10 @@ def format_datetime(value):
 
 @app.template_filter('clean_html')
 def clean_html(text):
-    """清理HTML标签，用于摘要显示"""
-    import re
+    """清理订阅源描述中的HTML标签（条目摘要直接使用入库时计算的excerpt）"""
     if not text:
         return ""
-    
-    # 移除HTML标签
-    clean = re.compile('<.*?>')
-    text = re.sub(clean, '', text)
-    
-    # 移除多余的空白字符
-    text = ' '.join(text.split())
-    
-    # 截断长文本
-    if len(text) > 200:
-        text = text[:200] + "..."
-    
-    return text
+    return make_excerpt(plain_text(text))
 
 @app.route('/trending')
 def trending():
@@ -386,22 +450,17 @@ def api_generate_trending():
         refresh_feeds = data.get('refresh', False)
         use_ai_summary = data.get('use_ai', True)
         
-        # 生成榜单
-        result = trending_generator.generate_trending_lists(
-            hours=hours,
-            top_count=top_count,
-            refresh_feeds=refresh_feeds,
-            use_ai_summary=use_ai_summary
-        )
+        # 生成榜单（后台任务，返回任务ID）
+        # 参数相同的生成任务正在进行时，合并到该任务
+        dedupe_key = f'trending:{hours}:{top_count}:{refresh_feeds}:{use_ai_summary}'
+        job = job_queue.submit('generate_trending', run_generate_trending,
+                               hours, top_count, refresh_feeds, use_ai_summary,
+                               dedupe_key=dedupe_key)
         
         return jsonify({
             'success': True,
-            'message': '热门榜单生成完成',
-            'data': {
-                'general_count': len(result['general']['items']),
-                'categories_count': len(result['categories']),
-                'generated_at': result['meta']['generated_at']
-            }
+            'message': '榜单生成任务已提交',
+            'job_id': job.id
         })
         
     except Exception as e:
@@ -410,6 +469,46 @@ def api_generate_trending():
             'message': f'生成失败: {str(e)}'
         })
 
+@app.route('/api/jobs/<job_id>')
+def api_job_status(job_id):
+    """API - 查询后台任务的状态、进度和结果"""
+    job = job_queue.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@app.route('/api/jobs/<job_id>/events')
+def api_job_events(job_id):
+    """API - 以Server-Sent Events推送后台任务的进度事件"""
+    if not job_queue.get(job_id):
+        return jsonify({'success': False, 'message': '任务不存在'}), 404
+    
+    def generate():
+        for event in job_queue.iter_events(job_id):
+            if event is None:
+                # 心跳，防止代理断开空闲连接
+                yield ': keep-alive\n\n'
+                continue
+            data = json.dumps(event['data'], ensure_ascii=False, default=str)
+            yield f"event: {event['event']}\ndata: {data}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/jobs')
+def api_jobs():
+    """API - 最近的后台任务列表（不含结果详情）"""
+    jobs = []
+    for job in job_queue.list_jobs():
+        data = job.to_dict()
+        data.pop('result', None)
+        jobs.append(data)
+    return jsonify({'success': True, 'jobs': jobs})
+
 @app.route('/api/trending_status')
 def api_trending_status():
     """API - 获取榜单状态"""
@@ -0,0 +1,249 @@
+"""
+二进制快照格式
+订阅源数据的紧凑快照：所有字符串放在一张去重的字符串表中，订阅源和条目记录只保存
+表中的序号；时间保存为epoch微秒整数，加载时不再解析ISO字符串。
+
+文件结构（小端）：
+    文件头   b'RSSN' | 格式版本 u16 | 数据格式版本 u16 | 订阅源数 u32
+    记录     类型 u8 | 长度 u32 | 内容
+        字符串表  数量 u32 | 每个字符串的字符数 u32[数量] | UTF-8文本
+        订阅源    固定字段（含条目数），后面紧跟该订阅源的条目记录
+        条目      每个条目的固定字段（含图片数）[条目数] | 全部图片 (地址 u32, 宽 u32, 高 u32)
+未知类型的记录直接跳过，新增记录类型不需要升级格式版本
+"""
+
+import struct
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from typing import Dict, List, Optional, Tuple
+
+from models import Feed, FeedItem, MediaItem
+from storage import atomic_write_bytes
+
+MAGIC = b'RSSN'
+FORMAT_VERSION = 1
+
+RECORD_STRINGS = 1
+RECORD_FEED = 2
+RECORD_ITEM = 3
+
+_HEADER = struct.Struct('<4sHHI')
+_RECORD = struct.Struct('<BI')
+# 标题, URL, 描述, 链接, 最后更新(微秒), ETag, Last-Modified, TTL, 内容摘要, 条目数
+_FEED = struct.Struct('<IIIIqIIiII')
+# 标题, 链接, 描述, 作者, 发布时间(微秒), 发布时间戳(秒), GUID, 内容摘要,
+# 纯文本, 文本长度, 摘录, 结构标记, 图片数（图片放在所有条目之后）
+_ITEM = struct.Struct('<IIIIqqIIIIIII')
+_MEDIA = struct.Struct('<III')
+
+NO_STRING = 0xFFFFFFFF     # 字符串为None
+NO_TIME = -(1 << 63)       # 时间为None
+
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class SnapshotError(ValueError):
+    """快照文件损坏或格式版本不支持"""
+
+
+def write_snapshot(path: str, store_version: int, feeds: List[Feed]):
+    """原子写入快照（先写临时文件再替换）"""
+    atomic_write_bytes(path, dump_snapshot(store_version, feeds))
+
+
+def read_snapshot(path: str) -> Tuple[int, List[Feed]]:
+    """读取快照，返回 (数据格式版本, 订阅源列表)"""
+    with open(path, 'rb') as f:
+        return load_snapshot(f.read())
+
+
+def dump_snapshot(store_version: int, feeds: List[Feed]) -> bytes:
+    """把订阅源编码为快照字节
+
+    只有条目的plain_text可以为None，其他字符串字段为None时抛出SnapshotError
+    （不写入无法加载的快照）
+    """
+    strings: Dict[str, int] = {}
+
+    def ref(value: str) -> int:
+        if value is None:
+            raise SnapshotError("字符串字段为None")
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    def optional_ref(value: Optional[str]) -> int:
+        return NO_STRING if value is None else ref(value)
+
+    records = []
+    for feed in feeds:
+        try:
+            records.extend(_feed_records(feed, ref, optional_ref))
+        except SnapshotError as e:
+            raise SnapshotError(f"订阅源 {feed.url} 无法写入快照: {e}") from e
+
+    # 字符串表放在最前面，加载时先解码整张表
+    table = list(strings)
+    lengths = struct.pack(f'<I{len(table)}I', len(table), *(len(value) for value in table))
+    text = ''.join(table).encode('utf-8', 'surrogatepass')
+    string_record = _record(RECORD_STRINGS, lengths + text)
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, store_version, len(feeds))
+    return b''.join([header, string_record] + records)
+
+
+def load_snapshot(data: bytes) -> Tuple[int, List[Feed]]:
+    """从快照字节读取订阅源"""
+    if len(data) < _HEADER.size:
+        raise SnapshotError("快照文件不完整")
+    magic, format_version, store_version, feed_count = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("不是订阅源快照文件")
+    if format_version > FORMAT_VERSION:
+        raise SnapshotError(f"不支持的快照格式版本: {format_version}")
+
+    strings: List[str] = []
+    feeds: List[Feed] = []
+    pending: Optional[Feed] = None   # 条目尚未读取的订阅源
+    item_count = 0
+    pos = _HEADER.size
+    size = len(data)
+    view = memoryview(data)
+
+    try:
+        while pos < size:
+            kind, length = _RECORD.unpack_from(data, pos)
+            pos += _RECORD.size
+            end = pos + length
+            if end > size:
+                raise SnapshotError("快照文件不完整")
+
+            if kind == RECORD_ITEM:
+                if pending is None:
+                    raise SnapshotError("条目记录不属于任何订阅源")
+                items_end = pos + item_count * _ITEM.size
+                if items_end > end:
+                    raise SnapshotError("条目记录不完整")
+                pending.items = _read_items(view[pos:items_end], view[items_end:end], strings)
+                pending = None
+            elif kind == RECORD_FEED:
+                if pending is not None:
+                    raise SnapshotError("订阅源的条目不完整")
+                (title, url, description, link, last_updated, etag, last_modified, ttl,
+                 content_hash, item_count) = _FEED.unpack_from(data, pos)
+                feed = Feed(
+                    title=strings[title],
+                    url=strings[url],
+                    description=strings[description],
+                    link=strings[link],
+                    last_updated=None if last_updated == NO_TIME else _NAIVE_EPOCH + last_updated * _MICROSECOND,
+                    etag=strings[etag],
+                    last_modified=strings[last_modified],
+                    ttl=ttl,
+                    content_hash=strings[content_hash]
+                )
+                feeds.append(feed)
+                if item_count:
+                    pending = feed
+            elif kind == RECORD_STRINGS:
+                strings = _read_strings(data, pos, end)
+            pos = end
+    except (struct.error, IndexError, StopIteration, UnicodeDecodeError) as e:
+        raise SnapshotError(f"快照文件损坏: {e}") from e
+
+    if pending is not None or len(feeds) != feed_count:
+        raise SnapshotError("快照文件不完整")
+    return store_version, feeds
+
+
+def _feed_records(feed: Feed, ref, optional_ref) -> List[bytes]:
+    """一个订阅源的订阅源记录和条目记录
+
+    数值超出字段范围时抛出SnapshotError（由调用方改为写入JSON）
+    """
+    try:
+        return _pack_feed(feed, ref, optional_ref)
+    except struct.error as e:
+        raise SnapshotError(f"数值超出快照字段范围: {e}") from e
+
+
+def _pack_feed(feed: Feed, ref, optional_ref) -> List[bytes]:
+    records = [_record(RECORD_FEED, _FEED.pack(
+        ref(feed.title), ref(feed.url), ref(feed.description), ref(feed.link),
+        _micros(feed.last_updated), ref(feed.etag), ref(feed.last_modified),
+        feed.ttl or 0, ref(feed.content_hash), len(feed.items)
+    ))]
+    if not feed.items:
+        return records
+    item_parts = []
+    media_parts = []
+    for item in feed.items:
+        media = item.media or []
+        item_parts.append(_ITEM.pack(
+            ref(item.title), ref(item.link), ref(item.description), ref(item.author),
+            _micros(item.published),
+            NO_TIME if item.published_ts is None else item.published_ts,
+            ref(item.guid), ref(item.content_hash), optional_ref(item.plain_text),
+            item.text_length, ref(item.excerpt), item.structure_flags, len(media)
+        ))
+        media_parts.extend(_MEDIA.pack(ref(m.url), m.width, m.height) for m in media)
+    records.append(_record(RECORD_ITEM, b''.join(item_parts + media_parts)))
+    return records
+
+
+def _record(kind: int, payload: bytes) -> bytes:
+    return _RECORD.pack(kind, len(payload)) + payload
+
+
+def _read_items(item_block, media_block, strings: List[str]) -> List[FeedItem]:
+    """读取一个订阅源的全部条目"""
+    media_rows = _MEDIA.iter_unpack(media_block)
+    items = []
+    for (title, link, description, author, published, published_ts, guid, content_hash,
+         plain_text, text_length, excerpt, structure_flags, media_count) in _ITEM.iter_unpack(item_block):
+        media = []
+        for _ in range(media_count):
+            url, width, height = next(media_rows)
+            media.append(MediaItem(strings[url], width, height))
+        items.append(FeedItem(
+            strings[title],
+            strings[link],
+            strings[description],
+            None if published == NO_TIME else _UTC_EPOCH + published * _MICROSECOND,
+            strings[author],
+            strings[guid],
+            strings[content_hash],
+            None if published_ts == NO_TIME else published_ts,
+            None if plain_text == NO_STRING else strings[plain_text],
+            text_length,
+            strings[excerpt],
+            structure_flags,
+            media
+        ))
+    return items
+
+
+def _read_strings(data: bytes, start: int, end: int) -> List[str]:
+    """解码字符串表：整段文本一次解码，再按字符数切分"""
+    (count,) = struct.unpack_from('<I', data, start)
+    lengths_start = start + 4
+    text_start = lengths_start + count * 4
+    if text_start > end:
+        raise SnapshotError("字符串表不完整")
+    lengths = struct.unpack_from(f'<{count}I', data, lengths_start)
+    text = bytes(data[text_start:end]).decode('utf-8', 'surrogatepass')
+    offsets = list(accumulate(lengths, initial=0))
+    if offsets[-1] != len(text):
+        raise SnapshotError("字符串表长度不一致")
+    return [text[start:stop] for start, stop in zip(offsets, offsets[1:])]
+
+
+def _micros(value: Optional[datetime]) -> int:
+    """时间转换为epoch微秒；带时区的按UTC计算，不带时区的按原值保存"""
+    if value is None:
+        return NO_TIME
+    epoch = _UTC_EPOCH if value.tzinfo is not None else _NAIVE_EPOCH
+    return (value - epoch) // _MICROSECOND
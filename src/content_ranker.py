@@ -5,9 +5,10 @@
 
 import re
 import math
-from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
+from date_normalizer import now_timestamp
+from item_text import GOOD_STRUCTURE
 from models import FeedItem
 
 @dataclass
@@ -57,7 +58,7 @@ class ContentRanker:
         """对单个内容进行综合评分"""
         
         # 时效性评分
-        freshness_score = self._score_freshness(item.published)
+        freshness_score = self._score_freshness(item.published_ts)
         
         # 内容质量评分
         quality_score = self._score_quality(item)
@@ -88,21 +89,12 @@ class ContentRanker:
             category=category
         )
     
-    def _score_freshness(self, published: Optional[datetime]) -> float:
-        """计算时效性评分（0-1）"""
-        if not published:
+    def _score_freshness(self, published_ts: Optional[int]) -> float:
+        """计算时效性评分（0-1），published_ts为UTC epoch秒数"""
+        if published_ts is None:
             return 0.1
         
-        now = datetime.now()
-        if published.tzinfo is None:
-            # 如果没有时区信息，假设是本地时间
-            published = published.replace(tzinfo=now.tzinfo)
-        elif now.tzinfo is None:
-            # 统一时区
-            now = now.replace(tzinfo=published.tzinfo)
-        
-        time_diff = now - published
-        hours_ago = time_diff.total_seconds() / 3600
+        hours_ago = (now_timestamp() - published_ts) / 3600
         
         # 时效性评分：越新越高分
         if hours_ago <= 1:      # 1小时内
@@ -131,15 +123,12 @@ class ContentRanker:
         if len(title) <= 100:  # 标题不宜过长
             score += 0.1
         
-        # 内容质量评分
-        description = item.description or ""
-        clean_desc = re.sub(r'<[^>]+>', '', description)  # 去除HTML标签
-        
-        if len(clean_desc) >= 100:
+        # 内容质量评分（正文长度入库时已计算）
+        if item.text_length >= 100:
             score += 0.2
-        if len(clean_desc) >= 500:
+        if item.text_length >= 500:
             score += 0.1
-        if len(clean_desc) >= 1000:
+        if item.text_length >= 1000:
             score += 0.1
         
         # 是否有链接
@@ -150,8 +139,8 @@ class ContentRanker:
         if item.author:
             score += 0.1
         
-        # 检查内容结构质量
-        if self._has_good_structure(description):
+        # 检查内容结构质量（段落、列表或标题）
+        if item.structure_flags & GOOD_STRUCTURE:
             score += 0.1
         
         return min(score, 1.0)
@@ -207,36 +196,14 @@ class ContentRanker:
         
         return 'general'
     
-    def _has_good_structure(self, content: str) -> bool:
-        """检查内容是否有良好结构"""
-        if not content:
-            return False
-        
-        # 检查是否有段落结构
-        paragraphs = content.count('<p>')
-        if paragraphs >= 2:
-            return True
-        
-        # 检查是否有列表结构
-        if '<ul>' in content or '<ol>' in content or '<li>' in content:
-            return True
-        
-        # 检查是否有标题结构
-        if any(tag in content for tag in ['<h1>', '<h2>', '<h3>', '<h4>']):
-            return True
-        
-        return False
-    
     def filter_recent_content(self, items: List[Tuple[FeedItem, str]], hours: int = 24) -> List[Tuple[FeedItem, str]]:
         """筛选指定时间内的内容"""
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        cutoff = now_timestamp() - hours * 3600
         recent_items = []
         
         for item, feed_url in items:
-            if item.published and item.published > cutoff_time:
-                recent_items.append((item, feed_url))
-            elif not item.published:
-                # 如果没有发布时间，也包含进来（可能是最新的）
+            if item.published_ts is None or item.published_ts > cutoff:
+                # 没有发布时间的也包含进来（可能是最新的）
                 recent_items.append((item, feed_url))
         
         return recent_items
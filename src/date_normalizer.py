@@ -0,0 +1,148 @@
+"""
+发布时间规范化
+RSS常见的RFC 822和Atom常见的ISO 8601格式用正则直接解析，其余格式才交给dateutil；
+结果统一为UTC时间，并提供对应的epoch秒数，排序和按时间筛选只需比较整数
+"""
+
+import calendar
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from dateutil.parser import parse as date_parse
+
+# RFC 822 / RFC 2822：Mon, 02 Jan 2006 15:04:05 +0800
+_RFC822_RE = re.compile(
+    r'^\s*(?:[A-Za-z]{3,9},?\s+)?(\d{1,2})\s+([A-Za-z]{3,9})\.?\s+(\d{2,4})'
+    r'\s+(\d{1,2}):(\d{2})(?::(\d{2}))?(?:\s*([+-]\d{2}:?\d{2}|[A-Za-z]{1,5}))?\s*$'
+)
+# ISO 8601：2006-01-02T15:04:05.000Z / 2006-01-02 15:04:05+08:00 / 2006-01-02
+_ISO8601_RE = re.compile(
+    r'^\s*(\d{4})-(\d{2})-(\d{2})(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:[.,](\d+))?)?'
+    r'\s*(Z|[+-]\d{2}(?::?\d{2})?)?)?\s*$',
+    re.IGNORECASE
+)
+
+_MONTHS = {name: index for index, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], 1)}
+
+# RFC 822中的时区缩写（小时偏移）
+_TZ_NAMES = {
+    'ut': 0, 'utc': 0, 'gmt': 0, 'z': 0,
+    'est': -5, 'edt': -4, 'cst': -6, 'cdt': -5,
+    'mst': -7, 'mdt': -6, 'pst': -8, 'pdt': -7,
+}
+
+
+def parse_date(value: str) -> Optional[datetime]:
+    """解析日期字符串，返回UTC时间；无法解析时返回None
+
+    没有时区信息的时间视为UTC
+    """
+    if not value:
+        return None
+    parsed = _parse_rfc822(value)
+    if parsed is None:
+        parsed = _parse_iso8601(value)
+    if parsed is None:
+        try:
+            parsed = date_parse(value)
+        except (ValueError, OverflowError, TypeError):
+            return None
+    return to_utc(parsed)
+
+
+def from_struct_time(value) -> Optional[datetime]:
+    """feedparser的*_parsed字段（UTC的struct_time）转换为UTC时间"""
+    try:
+        return datetime(*value[:6], tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """转换为带时区的UTC时间，没有时区信息的视为UTC"""
+    if value is None:
+        return None
+    if value.tzinfo is timezone.utc:
+        return value
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    try:
+        return value.astimezone(timezone.utc)
+    except (OverflowError, ValueError):
+        return None
+
+
+def to_timestamp(value: Optional[datetime]) -> Optional[int]:
+    """UTC epoch秒数，没有时区信息的时间视为UTC"""
+    if value is None:
+        return None
+    try:
+        if value.tzinfo is not None:
+            return calendar.timegm(value.utctimetuple())
+        return calendar.timegm(value.timetuple())
+    except (OverflowError, ValueError):
+        return None
+
+
+def now_timestamp() -> int:
+    """当前时间的UTC epoch秒数"""
+    return int(time.time())
+
+
+def _parse_rfc822(value: str) -> Optional[datetime]:
+    match = _RFC822_RE.match(value)
+    if not match:
+        return None
+    day, month, year, hour, minute, second, zone = match.groups()
+    month = _MONTHS.get(month[:3].lower())
+    offset = _zone_offset(zone)
+    if month is None or offset is None:
+        return None
+    year = int(year)
+    if year < 100:
+        year += 2000 if year < 50 else 1900
+    try:
+        return datetime(year, month, int(day), int(hour), int(minute), int(second or 0),
+                        tzinfo=offset)
+    except ValueError:
+        return None
+
+
+def _parse_iso8601(value: str) -> Optional[datetime]:
+    match = _ISO8601_RE.match(value)
+    if not match:
+        return None
+    year, month, day, hour, minute, second, fraction, zone = match.groups()
+    offset = _zone_offset(zone)
+    if offset is None:
+        return None
+    microsecond = int((fraction or '0')[:6].ljust(6, '0'))
+    try:
+        return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0),
+                        int(second or 0), microsecond, tzinfo=offset)
+    except ValueError:
+        return None
+
+
+def _zone_offset(zone: Optional[str]) -> Optional[timezone]:
+    """时区字符串转换为timezone，缺省为UTC，无法识别时返回None"""
+    if not zone:
+        return timezone.utc
+    if zone[0] in '+-':
+        digits = zone[1:].replace(':', '')
+        if len(digits) == 2:
+            digits += '00'
+        if len(digits) != 4:
+            return None
+        minutes = int(digits[:2]) * 60 + int(digits[2:])
+        if minutes >= 24 * 60:
+            return None
+        sign = -1 if zone[0] == '-' else 1
+        return timezone(timedelta(minutes=sign * minutes))
+    hours = _TZ_NAMES.get(zone.lower())
+    if hours is None:
+        return None
+    return timezone(timedelta(hours=hours))
@@ -9,6 +9,8 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 import requests
 
+from http_client import get_http_client
+
 
 class FeedTestThread(QThread):
     """测试RSS订阅源的线程"""
@@ -23,10 +25,9 @@ class FeedTestThread(QThread):
         try:
             import feedparser
             
-            response = requests.get(self.url, timeout=10)
-            response.raise_for_status()
+            _, content = get_http_client().fetch(self.url)
             
-            parsed_feed = feedparser.parse(response.content)
+            parsed_feed = feedparser.parse(content)
             
             if parsed_feed.bozo:
                 self.result_ready.emit(False, "", "无效的RSS格式")
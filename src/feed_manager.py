@@ -3,23 +3,66 @@ RSS订阅管理器
 负责RSS内容的获取、解析和管理
 """
 
-import json
+import asyncio
+import atexit
+import hashlib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
 import xml.etree.ElementTree as ET
 
-import feedparser
 import requests
-from dateutil.parser import parse as date_parse
 
+from host_guard import CircuitOpenError
+from http_client import FeedTooLargeError, FetchResult, HttpClient, get_http_client
+from date_normalizer import now_timestamp
+from feed_parser import ParsedFeed, parse_feed
+from item_id import is_legacy_id, make_item_id
 from models import Feed, FeedItem, FeedStore
+from parse_pool import DEFAULT_PARSE_MEMORY_LIMIT, DEFAULT_PARSE_TIMEOUT, ParsePool
+from single_flight import SingleFlight
+from storage import STORE_VERSION, StorageBackend, StoreChanges, open_storage
+
+
+# 并发刷新默认参数
+DEFAULT_MAX_WORKERS = 16      # 全局工作线程数
+DEFAULT_PER_HOST_LIMIT = 4    # 同一主机的最大并发请求数
+DEFAULT_ASYNC_CONCURRENCY = 64  # 异步抓取时的全局并发数
+UNCHANGED_MESSAGE = "内容未变化"  # 304或内容摘要相同时的刷新消息
+REMOVED_MESSAGE = "订阅源已删除"  # 刷新期间订阅源被删除时的刷新消息
+
+# 条目保留策略
+DEFAULT_MAX_ITEMS = 200       # 每个订阅源最多保留的条目数
+DEFAULT_MAX_ITEM_AGE_DAYS = 30  # 已不在上游列表中的条目最多保留的天数，0表示不按时间清理
 
 
 class FeedManager:
     """RSS订阅管理器"""
     
-    def __init__(self, data_file: str = "feeds_data.json"):
+    def __init__(self, data_file: str = "feeds_data.db", http_client: Optional[HttpClient] = None,
+                 flush_delay: Optional[float] = None, max_items: int = DEFAULT_MAX_ITEMS,
+                 max_item_age_days: int = DEFAULT_MAX_ITEM_AGE_DAYS,
+                 parse_workers: Optional[int] = None,
+                 parse_timeout: float = DEFAULT_PARSE_TIMEOUT,
+                 parse_memory_limit: Optional[int] = DEFAULT_PARSE_MEMORY_LIMIT,
+                 storage: Optional[StorageBackend] = None):
+        """
+        Args:
+            data_file: 数据文件路径，相对路径基于项目根目录；.db为SQLite数据库，.json为JSON文件
+            http_client: HTTP客户端，默认使用全局共享客户端
+            flush_delay: 设置后save_feeds改为延迟合并写入（秒），适合交互式使用
+            max_items: 每个订阅源最多保留的条目数
+            max_item_age_days: 已移出上游列表的条目保留天数，0表示只按数量清理
+            parse_workers: 解析进程数，默认为CPU核数，0表示在下载线程中直接解析（没有超时保护）
+            parse_timeout: 单个订阅源的解析时间上限（秒），超时返回"解析超时"
+            parse_memory_limit: 每个解析进程的内存上限（字节），None表示不限制
+            storage: 存储后端，默认按data_file的扩展名选择
+        """
         # 如果是相对路径，确保相对于项目根目录
         if not os.path.isabs(data_file):
             # 获取当前文件所在目录的父目录（项目根目录）
@@ -28,276 +71,453 @@ class FeedManager:
             self.data_file = os.path.join(project_root, data_file)
         else:
             self.data_file = data_file
+        self.storage = storage or open_storage(self.data_file)
         self.feed_store = FeedStore()
+        self.max_items = max_items
+        self.max_item_age_days = max_item_age_days
+        # 多进程解析池：并行解析并限制单个订阅源的解析时间和内存，首次使用时才启动子进程
+        self._parse_pool = None
+        if parse_workers != 0:
+            self._parse_pool = ParsePool(parse_workers, parse_timeout, parse_memory_limit)
+        # 默认使用全局共享的HTTP客户端，复用连接池
+        self.http_client = http_client or get_http_client()
+        # 保护feed_store修改和文件写入，供并发刷新使用
+        self._store_lock = threading.RLock()
+        # 同一订阅源的并发刷新合并为一次
+        self._refresh_flight = SingleFlight()
+        # 批量写入和延迟写入状态
+        self._batch_depth = 0
+        self._dirty = False
+        # 上次写入后修改过的订阅源，存储后端只写入这些订阅源
+        self._changes = StoreChanges()
+        self._flush_delay = flush_delay
+        self._flush_timer: Optional[threading.Timer] = None
+        if flush_delay is not None:
+            atexit.register(self.flush)
         self.load_feeds()
     
-    def add_feed_from_url(self, url: str, title: str = "") -> tuple[bool, str]:
-        """从URL添加RSS订阅源"""
+    def add_feed_from_url(self, url: str, title: str = "", save: bool = True) -> tuple[bool, str]:
+        """从URL添加RSS订阅源
+        
+        Args:
+            url: 订阅源URL
+            title: 自定义标题，留空则使用RSS中的标题
+            save: 是否立即写入数据文件，批量导入时由调用方统一保存
+        """
+        feed, message = self._fetch_new_feed(url, title)
+        if not feed:
+            return False, message
+        
+        # 添加到存储
+        with self._store_lock:
+            if not self.feed_store.add_feed(feed):
+                return False, "订阅源已存在"
+            self._changes.mark(feed.url)
+            if save:
+                self._save_changes()
+        return True, "订阅源添加成功"
+    
+    def _fetch_new_feed(self, url: str, title: str = "") -> tuple[Optional[Feed], str]:
+        """下载并解析一个新订阅源，不修改存储
+        
+        Returns:
+            (Feed对象, 消息)，失败时Feed为None
+        """
         try:
-            # 获取RSS内容
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            # 获取RSS内容（流式下载，超过大小上限立即中止）
+            response, content = self.http_client.fetch(url)
             
             # 解析RSS内容
-            parsed_feed = feedparser.parse(response.content)
-            
-            if parsed_feed.bozo:
-                return False, "无效的RSS格式"
+            parsed = self._parse_content(url, content, None)
+            if parsed.error:
+                return None, parsed.error
             
             # 创建Feed对象
-            feed_title = title or parsed_feed.feed.get('title', 'Unknown Feed')
-            feed_description = parsed_feed.feed.get('description', '')
-            feed_link = parsed_feed.feed.get('link', '')
-            
             feed = Feed(
-                title=feed_title,
+                title=title or parsed.title or 'Unknown Feed',
                 url=url,
-                description=feed_description,
-                link=feed_link,
-                last_updated=datetime.now()
+                description=parsed.description or '',
+                link=parsed.link or '',
+                last_updated=datetime.now(),
+                ttl=parsed.ttl,
+                content_hash=hashlib.sha256(content).hexdigest()
             )
+            self._store_validators(feed, response.headers)
+            feed.items = parsed.resolve_items()
             
-            # 解析RSS条目
-            feed.items = self._parse_feed_items(parsed_feed.entries)
-            
-            # 添加到存储
-            if self.feed_store.add_feed(feed):
-                self.save_feeds()
-                return True, "订阅源添加成功"
-            else:
-                return False, "订阅源已存在"
+            return feed, "解析成功"
                 
+        except (FeedTooLargeError, CircuitOpenError) as e:
+            return None, str(e)
         except requests.RequestException as e:
-            return False, f"网络错误: {str(e)}"
+            return None, f"网络错误: {str(e)}"
         except Exception as e:
-            return False, f"解析错误: {str(e)}"
-    
-    def _parse_feed_items(self, entries) -> List[FeedItem]:
-        """解析RSS条目"""
-        items = []
-        for entry in entries[:50]:  # 限制最多50个条目
-            # 解析发布时间
-            published = None
-            if hasattr(entry, 'published_parsed') and entry.published_parsed:
-                try:
-                    published = datetime(*entry.published_parsed[:6])
-                except:
-                    pass
-            elif hasattr(entry, 'published'):
-                try:
-                    published = date_parse(entry.published)
-                except:
-                    pass
-            
-            # 获取内容，优先使用content，然后是summary
-            description = ''
-            if hasattr(entry, 'content') and entry.content:
-                # 如果有多个content条目，选择最长的
-                content_parts = [c.get('value', '') for c in entry.content if c.get('value')]
-                if content_parts:
-                    description = max(content_parts, key=len)
-            
-            if not description:
-                description = entry.get('summary', entry.get('description', ''))
-            
-            # 清理和增强HTML内容
-            description = self._clean_and_enhance_html(description)
-            
-            # 生成唯一标识符 - 优先使用id或guid，否则基于link或title生成
-            guid = entry.get('id', entry.get('guid', ''))
-            if not guid:
-                # 如果没有id或guid，使用link的hash值作为唯一标识
-                link = entry.get('link', '')
-                title = entry.get('title', 'No Title')
-                if link:
-                    guid = str(hash(link))
-                else:
-                    # 如果连link都没有，使用title和发布时间生成
-                    pub_str = published.isoformat() if published else 'no_date'
-                    guid = str(hash(f"{title}_{pub_str}"))
-            
-            item = FeedItem(
-                title=entry.get('title', 'No Title'),
-                link=entry.get('link', ''),
-                description=description,
-                published=published,
-                author=entry.get('author', ''),
-                guid=guid
-            )
-            items.append(item)
-        
-        return items
+            return None, f"解析错误: {str(e)}"
+    
+    def _parse_content(self, url: str, content: bytes,
+                       known_hashes: Optional[Dict[str, str]]) -> ParsedFeed:
+        """解析RSS内容：交给解析进程池（有时间和内存上限），未启用时在当前线程解析"""
+        if self._parse_pool is not None:
+            return self._parse_pool.parse(content, known_hashes, self.max_items, url)
+        return parse_feed(content, known_hashes, self.max_items, url)
     
-    def _clean_and_enhance_html(self, html_content: str) -> str:
-        """清理和增强HTML内容"""
-        if not html_content:
-            return ''
+    def _merge_items(self, old_items: List[FeedItem], new_items: List[FeedItem]) -> List[FeedItem]:
+        """合并新旧条目：上游当前的条目在前，已移出上游列表的旧条目按保留策略保留"""
+        merged = list(new_items)
+        seen = {item.guid for item in new_items}
+        cutoff = None
+        if self.max_item_age_days:
+            cutoff = now_timestamp() - self.max_item_age_days * 86400
+        
+        for item in old_items:
+            if len(merged) >= self.max_items:
+                break
+            if item.guid in seen:
+                continue
+            if cutoff and item.published_ts is not None and item.published_ts < cutoff:
+                continue
+            seen.add(item.guid)
+            merged.append(item)
+        
+        return merged[:self.max_items]
+    
+    def refresh_feed(self, url: str, save: bool = True) -> tuple[bool, str]:
+        """刷新指定的RSS订阅源
         
-        import re
-        import html
+        Args:
+            url: 订阅源URL
+            save: 是否立即写入数据文件，批量刷新时由调用方统一保存
         
-        # 解码HTML实体
-        content = html.unescape(html_content)
+        同一订阅源正在刷新时，不会再发起请求，而是等待并返回进行中那次的结果。
+        """
+        success, message, _ = self._refresh_coalesced(url)
+        if save:
+            self._save_pending_changes()
+        return success, message
+    
+    def _refresh_coalesced(self, url: str) -> tuple[bool, str, int]:
+        """合并同一订阅源的并发刷新，返回 (是否成功, 消息, 新条目数)"""
+        result, _ = self._refresh_flight.do(url, self._refresh_feed_once, url)
+        return result
+    
+    def _refresh_feed_once(self, url: str) -> tuple[bool, str, int]:
+        """下载并解析一个订阅源（不写文件）"""
+        feed = self.feed_store.get_feed_by_url(url)
+        if not feed:
+            return False, "订阅源不存在", 0
         
-        # 移除完整的style属性（如style="font-family: Arial; color: #333;"）
-        content = re.sub(
-            r'\s*style\s*=\s*["\'][^"\'>]*["\']',
-            '',
-            content,
-            flags=re.IGNORECASE
-        )
+        try:
+            # 获取最新RSS内容，带上上次的校验信息
+            response, content = self.http_client.fetch(url, headers=self._conditional_headers(feed))
+            if response.status_code == 304:
+                self._mark_unchanged(feed, response.headers)
+                return True, UNCHANGED_MESSAGE, 0
+            
+            return self._apply_feed_content(feed, content, response.headers)
+            
+        except (FeedTooLargeError, CircuitOpenError) as e:
+            return False, str(e), 0
+        except requests.RequestException as e:
+            return False, f"网络错误: {str(e)}", 0
+        except Exception as e:
+            return False, f"刷新错误: {str(e)}", 0
+    
+    def _conditional_headers(self, feed: Feed) -> Dict[str, str]:
+        """根据保存的ETag/Last-Modified构造条件请求头"""
+        headers = {}
+        if feed.etag:
+            headers['If-None-Match'] = feed.etag
+        if feed.last_modified:
+            headers['If-Modified-Since'] = feed.last_modified
+        return headers
+    
+    def _store_validators(self, feed: Feed, headers) -> None:
+        """记录响应中的ETag/Last-Modified"""
+        if not headers:
+            return
+        feed.etag = headers.get('ETag', '') or ''
+        feed.last_modified = headers.get('Last-Modified', '') or ''
+    
+    def _is_current(self, feed: Feed) -> bool:
+        """订阅源仍在存储中（刷新期间没有被删除或替换），调用方需持有_store_lock"""
+        return self.feed_store.get_feed_by_url(feed.url) is feed
+    
+    def _mark_unchanged(self, feed: Feed, headers=None) -> None:
+        """内容未变化：只更新检查时间和校验信息（记录为订阅源信息的修改，由调用方写入），不重新解析
         
-        # 移除内联CSS样式字符串（如#ffffff; border: 1px solid #e1e8ed; padding: 0; line-height: 1.5;）
-        content = re.sub(
-            r'#[0-9a-fA-F]{3,6};\s*[^;]*;[^<>]*',
-            '',
-            content,
-            flags=re.IGNORECASE
-        )
+        订阅源在刷新期间已被删除时丢弃结果
+        """
+        with self._store_lock:
+            if not self._is_current(feed):
+                return
+            feed.last_updated = datetime.now()
+            self._store_validators(feed, headers)
+            self._changes.mark(feed.url, items=False)
+    
+    def _apply_feed_content(self, feed: Feed, content: bytes, headers=None) -> tuple[bool, str, int]:
+        """解析已下载的RSS内容并按GUID合并到订阅源（不写文件，由调用方保存）
         
-        # 移除单独的CSS属性字符串（如border: 1px solid, padding: 0等）
-        content = re.sub(
-            r'\b(?:border|padding|margin|color|background|font|width|height|display|position|overflow|line-height|font-size|font-family|white-space)\s*:\s*[^;\n<>]+;?',
-            '',
-            content,
-            flags=re.IGNORECASE
-        )
+        内容与上次完全相同时（部分服务器不支持条件请求）跳过解析，返回UNCHANGED_MESSAGE。
+        解析在子进程中执行，合并始终在当前进程完成；解析超时返回PARSE_TIMEOUT_MESSAGE
         
-        # 移除单独的颜色值（如#ffffff, #e1e8ed等）
-        content = re.sub(
-            r'\s*#[0-9a-fA-F]{3,6}\s*',
-            ' ',
-            content
+        Returns:
+            (是否成功, 消息, 新条目数)
+        """
+        content_hash = hashlib.sha256(content).hexdigest()
+        if feed.content_hash and content_hash == feed.content_hash:
+            self._mark_unchanged(feed, headers)
+            return True, UNCHANGED_MESSAGE, 0
+        
+        old_items = list(feed.items)
+        known = {item.guid: item for item in old_items if item.guid}
+        parsed = self._parse_content(
+            feed.url, content, {guid: item.content_hash for guid, item in known.items()}
         )
+        if parsed.error:
+            return False, parsed.error, 0
+        
+        fresh_items = parsed.resolve_items(known)
+        new_count = sum(1 for item in fresh_items if item.guid not in known)
+        items = self._merge_items(old_items, fresh_items)
+        
+        # 更新Feed信息；刷新期间订阅源已被删除时丢弃结果，避免已删除的订阅源被重新写入
+        with self._store_lock:
+            if not self._is_current(feed):
+                return False, REMOVED_MESSAGE, 0
+            if parsed.description is not None:
+                feed.description = parsed.description
+            if parsed.link is not None:
+                feed.link = parsed.link
+            feed.last_updated = datetime.now()
+            feed.items = items
+            feed.ttl = parsed.ttl
+            feed.content_hash = content_hash
+            self._store_validators(feed, headers)
+            
+            self.feed_store.update_feed(feed.url, feed)
+            self._changes.mark(feed.url)
         
-        # 移除单独出现的CSS单位（如px, em, %等）
-        content = re.sub(
-            r'\b\d+(?:px|em|rem|%|pt|vh|vw)\b',
-            '',
-            content
-        )
+        if new_count:
+            return True, f"刷新成功，新增{new_count}条", new_count
+        return True, "刷新成功", 0
+    
+    def refresh_all_feeds(self) -> dict:
+        """刷新所有RSS订阅源"""
+        return self.refresh_feeds_concurrent()
+    
+    def refresh_feeds_concurrent(self,
+                                 urls: Optional[List[str]] = None,
+                                 max_workers: int = DEFAULT_MAX_WORKERS,
+                                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                                 progress_callback: Optional[Callable[[str, bool, str], None]] = None) -> dict:
+        """并发刷新多个RSS订阅源，全部完成后只保存一次
+        
+        Args:
+            urls: 要刷新的订阅源URL列表，为None时刷新全部
+            max_workers: 线程池大小
+            per_host_limit: 同一主机的最大并发请求数
+            progress_callback: 每个订阅源完成时的回调 (url, success, message)
+            
+        Returns:
+            {url: {'success': bool, 'message': str, 'unchanged': bool, 'new_items': int}}
+        """
+        if urls is None:
+            urls = [feed.url for feed in self.feed_store.get_all_feeds()]
+        if not urls:
+            return {}
         
-        # 移除空的HTML标签属性（如<div >）
-        content = re.sub(
-            r'<(\w+)\s+>',
-            r'<\1>',
-            content
-        )
+        # 每个主机一个信号量，避免把同一个桥接服务打满
+        host_semaphores = self._host_semaphores(urls, per_host_limit)
         
-        # 移除多余的分号和空白字符
-        content = re.sub(r';+', ';', content)
-        content = re.sub(r'\s*;\s*', '; ', content)
-        content = re.sub(r'\s+', ' ', content)
-        
-        # 移除单独的分号和只包含空白的段落
-        content = re.sub(r'<p[^>]*>\s*;*\s*</p>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'<div[^>]*>\s*;*\s*</div>', '', content, flags=re.IGNORECASE)
-        
-        # 移除只包含> 符号的标签
-        content = re.sub(r'<([^>]+)>\s*>\s*</\1>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'>\s*>', '>', content)
-        
-        # 确保图片标签有正确的属性
-        content = re.sub(
-            r'<img([^>]*?)>',
-            lambda m: self._fix_img_tag(m.group(0)),
-            content,
-            flags=re.IGNORECASE
-        )
+        # 下载在线程中并发，解析交给多进程解析池
+        def worker(url: str) -> tuple[bool, str, int]:
+            with host_semaphores[urlparse(url).netloc.lower()]:
+                return self._refresh_coalesced(url)
         
-        # 确保链接在新窗口打开
-        content = re.sub(
-            r'<a([^>]*?)href="([^"]*?)"([^>]*?)>',
-            r'<a\1href="\2"\3 target="_blank" rel="noopener noreferrer">',
-            content,
-            flags=re.IGNORECASE
-        )
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(urls)))) as executor:
+            futures = {executor.submit(worker, url): url for url in urls}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    success, message, new_items = future.result()
+                except Exception as e:
+                    success, message, new_items = False, f"刷新错误: {str(e)}", 0
+                results[url] = self._result_entry(success, message, new_items)
+                if progress_callback:
+                    progress_callback(url, success, message)
         
-        # 处理空白的图片标签
-        content = re.sub(
-            r'<img[^>]*?src=""[^>]*?>',
-            '<div class="image-placeholder"><i class="bi bi-image"></i><p>图片链接无效</p></div>',
-            content,
-            flags=re.IGNORECASE
-        )
+        # 保持与输入相同的顺序
+        results = {url: results[url] for url in urls}
         
-        # 最后清理：移除空的标签和多余的空白
-        content = re.sub(r'<([^>]+)>\s*</\1>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'\s+', ' ', content)
-        content = content.strip()
+        self._save_pending_changes()
         
-        return content
+        return results
     
-    def _fix_img_tag(self, img_tag: str) -> str:
-        """修复图片标签，确保有正确的属性"""
-        import re
+    @staticmethod
+    def _host_semaphores(urls: List[str], per_host_limit: int) -> Dict[str, threading.Semaphore]:
+        """为每个主机创建一个限制并发数的信号量"""
+        semaphores: Dict[str, threading.Semaphore] = {}
+        for url in urls:
+            host = urlparse(url).netloc.lower()
+            if host not in semaphores:
+                semaphores[host] = threading.Semaphore(max(1, per_host_limit))
+        return semaphores
+    
+    @staticmethod
+    def _result_entry(success: bool, message: str, new_items: int = 0) -> dict:
+        """构造单个订阅源的刷新结果，unchanged表示内容与上次相同，new_items为新条目数"""
+        return {
+            'success': success,
+            'message': message,
+            'unchanged': success and message == UNCHANGED_MESSAGE,
+            'new_items': new_items
+        }
+    
+    def _save_pending_changes(self):
+        """刷新后写入记录的修改，包括内容未变化时更新的检查时间和ETag/Last-Modified
+
+        只更新了订阅源信息的订阅源按StoreChanges增量写入，不重写条目
+        """
+        with self._store_lock:
+            if self._changes:
+                self._save_changes()
+    
+    async def fetch_feeds_async(self,
+                                urls: List[str],
+                                max_concurrency: int = DEFAULT_ASYNC_CONCURRENCY,
+                                per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                                on_fetched: Optional[Callable] = None) -> Dict[str, FetchResult]:
+        """在单个事件循环上并发下载多个RSS订阅源
+        
+        已订阅的源会自动带上条件请求头（If-None-Match / If-Modified-Since）。
+        
+        Args:
+            urls: 订阅源URL列表
+            max_concurrency: 全局并发上限
+            per_host_limit: 同一主机的并发上限
+            on_fetched: 每个下载完成时调用的协程函数，参数为FetchResult
+            
+        Returns:
+            {url: FetchResult}
+        """
+        global_semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        for url in urls:
+            host = urlparse(url).netloc.lower()
+            if host not in host_semaphores:
+                host_semaphores[host] = asyncio.Semaphore(max(1, per_host_limit))
+        
+        results: Dict[str, FetchResult] = {}
+        
+        async with self.http_client.create_async_session(max_concurrency, per_host_limit) as session:
+            async def fetch_one(url: str):
+                feed = self.feed_store.get_feed_by_url(url)
+                request_headers = self._conditional_headers(feed) if feed else {}
+                async with global_semaphore, host_semaphores[urlparse(url).netloc.lower()]:
+                    result = await self.http_client.fetch_async(session, url, request_headers)
+                
+                results[url] = result
+                if on_fetched:
+                    await on_fetched(result)
+            
+            await asyncio.gather(*(fetch_one(url) for url in urls))
         
-        # 如果没有alt属性，添加默认值
-        if 'alt=' not in img_tag.lower():
-            img_tag = img_tag.replace('>', ' alt="图片">', 1)
+        return results
+    
+    async def refresh_feeds_async(self,
+                                  urls: Optional[List[str]] = None,
+                                  max_concurrency: int = DEFAULT_ASYNC_CONCURRENCY,
+                                  per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                                  progress_callback: Optional[Callable[[str, bool, str], None]] = None) -> dict:
+        """异步刷新多个RSS订阅源，下载完成的内容立即交给解析，全部完成后保存一次
+        
+        与refresh_feed共用请求合并：其他线程正在刷新的订阅源不再下载，而是等待并使用那次的结果。
+        返回值格式与refresh_feeds_concurrent相同
+        """
+        if urls is None:
+            urls = [feed.url for feed in self.feed_store.get_all_feeds()]
+        if not urls:
+            return {}
         
-        # 如果没有loading属性，添加lazy loading
-        if 'loading=' not in img_tag.lower():
-            img_tag = img_tag.replace('>', ' loading="lazy">', 1)
+        results = {}
         
-        # 确保有style或class用于响应式
-        if 'style=' not in img_tag.lower() and 'class=' not in img_tag.lower():
-            img_tag = img_tag.replace('>', ' style="max-width: 100%; height: auto;">', 1)
+        def report(url: str, success: bool, message: str, new_items: int):
+            results[url] = self._result_entry(success, message, new_items)
+            if progress_callback:
+                progress_callback(url, success, message)
+        
+        # 登记本次负责刷新的订阅源；已在刷新中的订阅源只等待结果
+        leaders = {}
+        followers = {}
+        for url in dict.fromkeys(urls):
+            call, leader = self._refresh_flight.acquire(url)
+            (leaders if leader else followers)[url] = call
+        
+        async def on_fetched(fetched: FetchResult):
+            url = fetched.url
+            feed = self.feed_store.get_feed_by_url(url)
+            new_items = 0
+            if not feed:
+                success, message = False, "订阅源不存在"
+            elif fetched.error:
+                success, message = False, fetched.error
+            elif fetched.not_modified:
+                self._mark_unchanged(feed, fetched.headers)
+                success, message = True, UNCHANGED_MESSAGE
+            else:
+                # 解析放到线程中执行（再交给解析进程池），避免阻塞其他下载
+                try:
+                    success, message, new_items = await asyncio.to_thread(
+                        self._apply_feed_content, feed, fetched.content, fetched.headers
+                    )
+                except Exception as e:
+                    success, message = False, f"刷新错误: {str(e)}"
+            
+            self._refresh_flight.release(url, leaders.pop(url), (success, message, new_items))
+            report(url, success, message, new_items)
         
-        return img_tag
-    
-    def refresh_feed(self, url: str) -> tuple[bool, str]:
-        """刷新指定的RSS订阅源"""
-        feed = self.feed_store.get_feed_by_url(url)
-        if not feed:
-            return False, "订阅源不存在"
+        async def wait_shared(url: str, call):
+            try:
+                success, message, new_items = await asyncio.to_thread(self._refresh_flight.wait, call)
+            except Exception as e:
+                success, message, new_items = False, f"刷新错误: {str(e)}", 0
+            report(url, success, message, new_items)
         
         try:
-            # 获取最新RSS内容
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            parsed_feed = feedparser.parse(response.content)
-            
-            if parsed_feed.bozo:
-                return False, "无效的RSS格式"
-            
-            # 更新Feed信息
-            feed.description = parsed_feed.feed.get('description', feed.description)
-            feed.link = parsed_feed.feed.get('link', feed.link)
-            feed.last_updated = datetime.now()
-            feed.items = self._parse_feed_items(parsed_feed.entries)
-            
-            self.feed_store.update_feed(url, feed)
-            self.save_feeds()
-            
-            return True, "刷新成功"
-            
-        except requests.RequestException as e:
-            return False, f"网络错误: {str(e)}"
-        except Exception as e:
-            return False, f"刷新错误: {str(e)}"
-    
-    def refresh_all_feeds(self) -> dict:
-        """刷新所有RSS订阅源"""
-        results = {}
-        for feed in self.feed_store.get_all_feeds():
-            success, message = self.refresh_feed(feed.url)
-            results[feed.url] = {'success': success, 'message': message}
+            await asyncio.gather(
+                self.fetch_feeds_async(list(leaders), max_concurrency, per_host_limit, on_fetched),
+                *(wait_shared(url, call) for url, call in followers.items())
+            )
+        finally:
+            # 下载被取消或出错时也要结束登记，避免等待的调用方一直阻塞
+            for url, call in leaders.items():
+                self._refresh_flight.release(url, call, error=RuntimeError("刷新已取消"))
+        
+        results = {url: results[url] for url in urls}
+        
+        await asyncio.to_thread(self._save_pending_changes)
+        
         return results
     
     def remove_feed(self, url: str) -> bool:
         """移除RSS订阅源"""
-        if self.feed_store.remove_feed(url):
-            self.save_feeds()
-            return True
+        with self._store_lock:
+            if self.feed_store.remove_feed(url):
+                self._changes.remove(url)
+                self._save_changes()
+                return True
         return False
     
     def clear_all_feeds(self) -> bool:
         """删除所有RSS订阅源"""
-        if self.feed_store.clear_all():
-            self.save_feeds()
-            return True
+        with self._store_lock:
+            urls = [feed.url for feed in self.feed_store.feeds]
+            if self.feed_store.clear_all():
+                for url in urls:
+                    self._changes.remove(url)
+                self._save_changes()
+                return True
         return False
     
     def get_all_feeds(self) -> List[Feed]:
@@ -312,46 +532,111 @@ class FeedManager:
         """导入OPML文件
         返回: (成功数量, 总数量, 错误信息列表)
         """
+        success_count, total_count, error_messages, _ = self.import_opml_parallel(opml_content)
+        return success_count, total_count, error_messages
+    
+    def import_opml_parallel(self,
+                             opml_content: str,
+                             max_workers: int = DEFAULT_MAX_WORKERS,
+                             per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                             progress_callback: Optional[Callable[[str, bool, str], None]] = None) -> tuple[int, int, List[str], Dict[str, float]]:
+        """并发导入OPML文件，URL去重后并行下载解析，所有新订阅源一次性写入
+        
+        progress_callback在每个订阅源下载解析完成时调用 (url, success, message)
+        
+        返回: (成功数量, 总数量, 错误信息列表, {url: 下载解析耗时(秒)})
+        """
         try:
-            root = ET.fromstring(opml_content)
-            success_count = 0
-            total_count = 0
-            error_messages = []
+            outlines = self.parse_opml_outlines(opml_content)
+        except ET.ParseError as e:
+            return 0, 0, [f"OPML文件解析错误: {str(e)}"], {}
+        except Exception as e:
+            return 0, 0, [f"导入错误: {str(e)}"], {}
+        
+        total_count = len(outlines)
+        error_messages = []
+        
+        # 去重：同一URL只下载一次，已订阅的直接跳过
+        pending: Dict[str, str] = {}
+        for xml_url, title in outlines:
+            if xml_url in pending or self.feed_store.get_feed_by_url(xml_url):
+                error_messages.append(f"添加失败 '{title}': 订阅源已存在")
+            else:
+                pending[xml_url] = title
+        
+        timings: Dict[str, float] = {}
+        new_feeds: List[Feed] = []
+        
+        if pending:
+            host_semaphores = self._host_semaphores(list(pending), per_host_limit)
+            
+            def worker(url: str, title: str) -> tuple[Optional[Feed], str, float]:
+                with host_semaphores[urlparse(url).netloc.lower()]:
+                    start = time.perf_counter()
+                    feed, message = self._fetch_new_feed(url, title)
+                    return feed, message, time.perf_counter() - start
             
-            # 查找所有outline元素
-            for outline in root.iter('outline'):
-                xml_url = outline.get('xmlUrl')
-                if xml_url:
-                    total_count += 1
-                    # 优先使用title，其次使用text属性
-                    title = outline.get('title') or outline.get('text', '')
-                    
-                    # 清理标题，移除HTML实体编码
-                    if title:
-                        import html
-                        title = html.unescape(title)
-                        # 移除Unicode表情符号和特殊字符
-                        import re
-                        title = re.sub(r'[\U0001F600-\U0001F64F]|[\U0001F300-\U0001F5FF]|[\U0001F680-\U0001F6FF]|[\U0001F1E0-\U0001F1FF]', '', title)
-                        title = title.strip()
-                    
-                    print(f"正在添加: {title} - {xml_url}")
-                    
-                    success, message = self.add_feed_from_url(xml_url, title)
-                    if success:
-                        success_count += 1
-                        print(f"✓ 成功添加: {title}")
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(pending)))) as executor:
+                futures = {executor.submit(worker, url, title): url for url, title in pending.items()}
+                for future in as_completed(futures):
+                    url = futures[future]
+                    title = pending[url]
+                    try:
+                        feed, message, elapsed = future.result()
+                    except Exception as e:
+                        feed, message, elapsed = None, f"导入错误: {str(e)}", 0.0
+                    timings[url] = elapsed
+                    if feed:
+                        new_feeds.append(feed)
+                        print(f"✓ 成功添加: {title} ({elapsed:.2f}s)")
                     else:
                         error_msg = f"添加失败 '{title}': {message}"
                         error_messages.append(error_msg)
                         print(f"✗ {error_msg}")
+                    if progress_callback:
+                        progress_callback(url, feed is not None, message)
+        
+        # 按OPML中的顺序加入存储，只写一次文件
+        order = {url: i for i, url in enumerate(pending)}
+        new_feeds.sort(key=lambda feed: order[feed.url])
+        success_count = 0
+        with self._store_lock:
+            for feed in new_feeds:
+                if self.feed_store.add_feed(feed):
+                    self._changes.mark(feed.url)
+                    success_count += 1
+            if success_count:
+                self._save_changes()
+        
+        return success_count, total_count, error_messages, timings
+    
+    def parse_opml_outlines(self, opml_content: str) -> List[tuple[str, str]]:
+        """解析OPML中的订阅源，返回[(xmlUrl, 标题)]"""
+        import html
+        import re
+        
+        root = ET.fromstring(opml_content)
+        outlines = []
+        
+        # 查找所有outline元素
+        for outline in root.iter('outline'):
+            xml_url = outline.get('xmlUrl')
+            if not xml_url:
+                continue
             
-            return success_count, total_count, error_messages
+            # 优先使用title，其次使用text属性
+            title = outline.get('title') or outline.get('text', '')
             
-        except ET.ParseError as e:
-            return 0, 0, [f"OPML文件解析错误: {str(e)}"]
-        except Exception as e:
-            return 0, 0, [f"导入错误: {str(e)}"]
+            # 清理标题，移除HTML实体编码
+            if title:
+                title = html.unescape(title)
+                # 移除Unicode表情符号和特殊字符
+                title = re.sub(r'[\U0001F600-\U0001F64F]|[\U0001F300-\U0001F5FF]|[\U0001F680-\U0001F6FF]|[\U0001F1E0-\U0001F1FF]', '', title)
+                title = title.strip()
+            
+            outlines.append((xml_url.strip(), title))
+        
+        return outlines
     
     def export_opml(self) -> str:
         """导出为OPML格式"""
@@ -384,90 +669,114 @@ class FeedManager:
         
         return ET.tostring(root, encoding='unicode', xml_declaration=True)
     
-    def save_feeds(self):
-        """保存订阅源数据到文件"""
+    @contextmanager
+    def batch(self):
+        """批量修改上下文，期间的写入只做标记，退出时统一写入一次
+        
+        用法:
+            with feed_manager.batch():
+                feed_manager.add_feed_from_url(url1)
+                feed_manager.remove_feed(url2)
+        """
+        with self._store_lock:
+            self._batch_depth += 1
         try:
-            data = []
-            for feed in self.feed_store.get_all_feeds():
-                feed_data = {
-                    'title': feed.title,
-                    'url': feed.url,
-                    'description': feed.description,
-                    'link': feed.link,
-                    'last_updated': feed.last_updated.isoformat() if feed.last_updated else None,
-                    'items': []
-                }
-                
-                for item in feed.items:
-                    item_data = {
-                        'title': item.title,
-                        'link': item.link,
-                        'description': item.description,
-                        'published': item.published.isoformat() if item.published else None,
-                        'author': item.author,
-                        'guid': item.guid
-                    }
-                    feed_data['items'].append(item_data)
-                
-                data.append(feed_data)
-            
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            yield self
+        finally:
+            with self._store_lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0 and self._dirty:
+                    self._write_store()
+    
+    def save_feeds(self):
+        """保存全部订阅源数据
+        
+        直接修改了Feed对象（如编辑标题）后调用，写入所有订阅源。
+        在batch()中只标记为待写入；设置了flush_delay时延迟合并写入；否则立即写入。
+        """
+        with self._store_lock:
+            self._changes.full = True
+            self._save_changes()
+    
+    def _save_changes(self):
+        """写入_changes中记录的修改，写入时机与save_feeds相同"""
+        with self._store_lock:
+            self._dirty = True
+            if self._batch_depth > 0:
+                return
+            if self._flush_delay is not None:
+                self._schedule_flush()
+                return
+            self._write_store()
+    
+    def flush(self):
+        """立即写入所有待保存的修改"""
+        with self._store_lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._dirty:
+                self._write_store()
+    
+    def close(self):
+        """写入待保存的修改，关闭存储并停止解析进程"""
+        self.flush()
+        self.storage.close()
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown()
+    
+    def _schedule_flush(self):
+        """重新计时延迟写入，连续修改只会触发一次写入"""
+        if self._flush_timer:
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(self._flush_delay, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def _write_store(self):
+        """把上次写入后的修改交给存储后端"""
+        with self._store_lock:
+            try:
+                self.storage.save(self.feed_store.get_all_feeds(), self._changes)
+                self._changes = StoreChanges()
+                self._dirty = False
                 
-        except Exception as e:
-            print(f"保存数据失败: {e}")
+            except Exception as e:
+                print(f"保存数据失败: {e}")
     
     def load_feeds(self):
-        """从文件加载订阅源数据"""
-        if not os.path.exists(self.data_file):
-            return
-        
+        """从存储后端加载订阅源数据"""
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            for feed_data in data:
-                # 解析时间
-                last_updated = None
-                if feed_data.get('last_updated'):
-                    try:
-                        last_updated = datetime.fromisoformat(feed_data['last_updated'])
-                    except:
-                        pass
-                
-                feed = Feed(
-                    title=feed_data['title'],
-                    url=feed_data['url'],
-                    description=feed_data.get('description', ''),
-                    link=feed_data.get('link', ''),
-                    last_updated=last_updated
-                )
-                
-                # 解析条目
-                items = []
-                for item_data in feed_data.get('items', []):
-                    published = None
-                    if item_data.get('published'):
-                        try:
-                            published = datetime.fromisoformat(item_data['published'])
-                        except:
-                            pass
-                    
-                    item = FeedItem(
-                        title=item_data['title'],
-                        link=item_data['link'],
-                        description=item_data.get('description', ''),
-                        published=published,
-                        author=item_data.get('author', ''),
-                        guid=item_data.get('guid', '')
-                    )
-                    items.append(item)
-                
-                feed.items = items
+            version, feeds = self.storage.load()
+            for feed in feeds:
                 self.feed_store.add_feed(feed)
                 
         except Exception as e:
             print(f"加载数据失败: {e}")
+            return
+        
+        if version < STORE_VERSION:
+            self.migrate_item_ids()
+    
+    def migrate_item_ids(self) -> int:
+        """把旧版本用hash()生成的条目ID替换为稳定ID（一次性迁移）
+        
+        Returns:
+            迁移的条目数
+        """
+        migrated = 0
+        with self._store_lock:
+            for feed in self.feed_store.feeds:
+                for item in feed.items:
+                    if is_legacy_id(item.guid, item.link):
+                        item.guid = make_item_id(item.link, item.title, item.published)
+                        migrated += 1
+            # 写入新版本格式，之后不会再次迁移
+            self.save_feeds()
+        
+        if migrated:
+            print(f"已迁移 {migrated} 个条目ID")
+        return migrated
     
     def get_all_content_items(self) -> List[tuple]:
         """获取所有RSS源的所有内容项，返回(FeedItem, feed_url)的列表"""
@@ -481,17 +790,13 @@ class FeedManager:
     
     def get_recent_content(self, hours: int = 24) -> List[tuple]:
         """获取指定时间内的内容，返回(FeedItem, feed_url)的列表"""
-        from datetime import datetime, timedelta
-        
-        cutoff_time = datetime.now() - timedelta(hours=hours)
+        cutoff = now_timestamp() - hours * 3600
         recent_items = []
         
         all_items = self.get_all_content_items()
         for item, feed_url in all_items:
-            if item.published and item.published > cutoff_time:
-                recent_items.append((item, feed_url))
-            elif not item.published:
-                # 如果没有发布时间，也包含进来（可能是最新的）
+            if item.published_ts is None or item.published_ts > cutoff:
+                # 没有发布时间的也包含进来（可能是最新的）
                 recent_items.append((item, feed_url))
         
         return recent_items
@@ -499,17 +804,17 @@ class FeedManager:
     def refresh_all_feeds_bulk(self) -> dict:
         """批量刷新所有RSS源（用于热榜功能）"""
         print("开始批量刷新所有RSS源...")
-        results = {}
         total_feeds = len(self.feed_store.feeds)
-        
-        for i, feed in enumerate(self.feed_store.feeds, 1):
-            print(f"刷新 {i}/{total_feeds}: {feed.title}")
-            success, message = self.refresh_feed(feed.url)
-            results[feed.url] = {
-                'success': success,
-                'message': message
-            }
-        
-        self.save_feeds()
-        print("批量刷新完成！")
+        done = 0
+        
+        def report(url: str, success: bool, message: str):
+            nonlocal done
+            done += 1
+            feed = self.feed_store.get_feed_by_url(url)
+            title = feed.title if feed else url
+            print(f"刷新 {done}/{total_feeds}: {title} - {message}")
+        
+        results = self.refresh_feeds_concurrent(progress_callback=report)
+        stats = self.http_client.get_stats()
+        print(f"批量刷新完成！累计请求 {stats['requests']} 次，平均耗时 {stats['mean_latency_ms']}ms")
         return results
\ No newline at end of file
@@ -0,0 +1,195 @@
+"""
+RSS内容解析
+只依赖输入内容的纯函数，既可在当前进程调用，也可放到子进程中执行；
+解析结果只包含可pickle的简单数据
+
+已知格式的来源（按主机名注册）使用专用的快速解析器，其余使用feedparser
+"""
+
+import hashlib
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import feedparser
+from date_normalizer import from_struct_time, parse_date
+from html_sanitizer import sanitize_html
+from item_id import make_item_id
+from models import FeedItem
+from rss_fast_parser import parse_rss
+
+DEFAULT_MAX_ITEMS = 200       # 单次解析最多处理的条目数
+INVALID_FEED_MESSAGE = "无效的RSS格式"
+MAX_TTL = 7 * 24 * 60         # <ttl>的上限（分钟），更大的值按一周处理
+
+# 主机名 -> 快速解析器。解析器接收原始内容，返回 (订阅源信息, 条目列表)，
+# 字段与feedparser一致；返回None表示无法处理，改用feedparser
+_PARSERS: Dict[str, Callable] = {}
+
+
+def register_parser(host: str, parser: Callable) -> None:
+    """为指定主机的订阅源注册快速解析器"""
+    _PARSERS[host.lower()] = parser
+
+
+def get_parser(url: str) -> Optional[Callable]:
+    """订阅源URL对应的快速解析器，没有注册时返回None"""
+    if not url:
+        return None
+    try:
+        host = urlparse(url).hostname
+    except ValueError:
+        return None
+    return _PARSERS.get(host) if host else None
+
+
+# Twitter桥接输出固定结构的RSS 2.0
+register_parser('api.xgo.ing', parse_rss)
+
+
+@dataclass
+class ParsedFeed:
+    """一次解析的结果
+
+    items只包含新增或内容有变化的条目；order按上游顺序记录全部条目的guid，
+    未变化的条目由调用方从已有条目中取回
+    """
+    title: Optional[str] = None
+    description: Optional[str] = None
+    link: Optional[str] = None
+    ttl: int = 0
+    items: Dict[str, FeedItem] = field(default_factory=dict)
+    order: List[str] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def resolve_items(self, known: Optional[Dict[str, FeedItem]] = None) -> List[FeedItem]:
+        """按上游顺序组装条目列表，未变化的条目复用known中的对象"""
+        known = known or {}
+        items = []
+        seen = set()
+        for guid in self.order:
+            if guid in seen:
+                continue
+            item = self.items.get(guid) or known.get(guid)
+            if item is not None:
+                seen.add(guid)
+                items.append(item)
+        return items
+
+
+def parse_feed(content: bytes,
+               known_hashes: Optional[Dict[str, str]] = None,
+               max_items: int = DEFAULT_MAX_ITEMS,
+               url: str = '') -> ParsedFeed:
+    """解析RSS/Atom内容
+
+    Args:
+        content: 原始响应内容
+        known_hashes: 已有条目 {guid: content_hash}，摘要相同的条目跳过HTML清理
+        max_items: 最多处理的条目数
+        url: 订阅源URL，用于选择快速解析器
+    """
+    document = parse_document(content, url)
+    if document is None:
+        return ParsedFeed(error=INVALID_FEED_MESSAGE)
+
+    info, entries = document
+    result = ParsedFeed(
+        title=info.get('title'),
+        description=info.get('description'),
+        link=info.get('link'),
+        ttl=parse_ttl(info)
+    )
+
+    known_hashes = known_hashes or {}
+    for entry in entries[:max_items]:
+        published = parse_published(entry)
+        guid = entry_guid(entry, published)
+        digest = entry_hash(entry)
+        result.order.append(guid)
+        if known_hashes.get(guid) == digest or guid in result.items:
+            continue
+        result.items[guid] = build_item(entry, guid, digest, published)
+
+    return result
+
+
+def parse_document(content: bytes, url: str = ''):
+    """把原始内容解析为 (订阅源信息, 条目列表)，格式无效时返回None
+
+    优先使用为该主机注册的快速解析器，它无法处理时改用feedparser
+    """
+    parser = get_parser(url)
+    if parser is not None:
+        document = parser(content)
+        if document is not None:
+            return document
+
+    parsed_feed = feedparser.parse(content)
+    if parsed_feed.bozo:
+        return None
+    return parsed_feed.feed, parsed_feed.entries
+
+
+def build_item(entry, guid: str, digest: str, published: Optional[datetime]) -> FeedItem:
+    """把一个feedparser条目转换为FeedItem（包括HTML清理）"""
+    # 获取内容，优先使用content，然后是summary
+    description = ''
+    if entry.get('content'):
+        # 如果有多个content条目，选择最长的
+        content_parts = [c.get('value', '') for c in entry['content'] if c.get('value')]
+        if content_parts:
+            description = max(content_parts, key=len)
+
+    if not description:
+        description = entry.get('summary', entry.get('description', ''))
+
+    return FeedItem(
+        title=entry.get('title', 'No Title'),
+        link=entry.get('link', ''),
+        description=sanitize_html(description),
+        published=published,
+        author=entry.get('author', ''),
+        guid=guid,
+        content_hash=digest
+    )
+
+
+def parse_published(entry) -> Optional[datetime]:
+    """解析条目的发布时间（UTC）"""
+    if entry.get('published_parsed'):
+        return from_struct_time(entry['published_parsed'])
+    if entry.get('published'):
+        return parse_date(entry['published'])
+    return None
+
+
+def entry_guid(entry, published: Optional[datetime] = None) -> str:
+    """条目唯一标识符：优先使用id或guid，否则基于link、title和发布时间生成稳定ID"""
+    guid = entry.get('id', entry.get('guid', ''))
+    if guid:
+        return guid
+    return make_item_id(entry.get('link', ''), entry.get('title', 'No Title'), published)
+
+
+def entry_hash(entry) -> str:
+    """原始条目内容的摘要，用于判断已有条目是否需要重新处理"""
+    parts = [entry.get('title', ''), entry.get('link', ''), entry.get('author', ''),
+             entry.get('published', ''), entry.get('updated', ''),
+             entry.get('summary', entry.get('description', ''))]
+    for content in entry.get('content', None) or []:
+        parts.append(content.get('value', ''))
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(str(part).encode('utf-8', 'replace'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def parse_ttl(feed_info) -> int:
+    """读取RSS <ttl>（分钟），限制在0~MAX_TTL之间"""
+    try:
+        return min(max(0, int(feed_info.get('ttl', 0) or 0)), MAX_TTL)
+    except (TypeError, ValueError):
+        return 0
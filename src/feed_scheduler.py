@@ -0,0 +1,226 @@
+"""
+自适应订阅源刷新调度器
+为每个订阅源维护下次刷新时间，根据更新频率、RSS <ttl> 和错误情况调整刷新间隔
+"""
+
+import heapq
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from feed_manager import FeedManager
+from models import Feed
+
+# 刷新间隔配置（秒）
+MIN_INTERVAL = 5 * 60          # 最短5分钟
+MAX_INTERVAL = 6 * 60 * 60     # 最长6小时
+DEFAULT_INTERVAL = 30 * 60     # 新订阅源默认30分钟
+SPEEDUP_FACTOR = 0.5           # 有新条目时缩短间隔
+SLOWDOWN_FACTOR = 1.5          # 没有新条目时延长间隔
+MAX_BATCH_SIZE = 32            # 单次调度最多刷新的订阅源数
+
+
+@dataclass
+class ScheduleState:
+    """单个订阅源的调度状态"""
+    url: str
+    interval: float = DEFAULT_INTERVAL
+    next_due: float = 0.0
+    error_count: int = 0
+
+
+class FeedScheduler:
+    """按订阅源独立调度刷新的后台调度器"""
+
+    def __init__(self,
+                 feed_manager: FeedManager,
+                 min_interval: float = MIN_INTERVAL,
+                 max_interval: float = MAX_INTERVAL,
+                 on_refreshed: Optional[Callable[[dict], None]] = None):
+        """
+        初始化调度器
+
+        Args:
+            feed_manager: RSS订阅管理器
+            min_interval: 最短刷新间隔（秒）
+            max_interval: 最长刷新间隔（秒）
+            on_refreshed: 每批刷新完成后的回调，参数为刷新结果字典
+        """
+        self.feed_manager = feed_manager
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.on_refreshed = on_refreshed
+
+        self._states: Dict[str, ScheduleState] = {}
+        self._queue: List[Tuple[float, str]] = []  # (next_due, url) 最小堆
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """启动后台调度线程"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self.sync_feeds()
+        self._thread = threading.Thread(target=self._run, name="FeedScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> bool:
+        """停止后台调度线程
+
+        Args:
+            timeout: 等待进行中的刷新结束的秒数，None表示一直等待
+
+        Returns:
+            调度线程是否已结束；超时返回False，可以再次调用继续等待
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                return False
+            self._thread = None
+        return True
+
+    def is_running(self) -> bool:
+        """调度线程是否在运行"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def sync_feeds(self):
+        """与订阅管理器同步：为新订阅源建立调度，移除已删除的订阅源"""
+        now = time.time()
+        feeds = {feed.url: feed for feed in self.feed_manager.get_all_feeds()}
+
+        with self._lock:
+            for url in list(self._states):
+                if url not in feeds:
+                    del self._states[url]
+
+            for url, feed in feeds.items():
+                if url in self._states:
+                    continue
+                interval = self._clamp(self._estimate_interval(feed))
+                if feed.ttl:
+                    interval = self._clamp(max(interval, feed.ttl * 60))
+                # 从上次更新时间推算，从未更新过的订阅源立即刷新
+                last = feed.last_updated.timestamp() if feed.last_updated else 0.0
+                state = ScheduleState(url=url, interval=interval, next_due=max(now, last + interval))
+                self._states[url] = state
+                heapq.heappush(self._queue, (state.next_due, url))
+
+        self._wakeup.set()
+
+    def get_schedule(self) -> List[dict]:
+        """获取当前调度表，按下次刷新时间排序"""
+        with self._lock:
+            states = sorted(self._states.values(), key=lambda s: s.next_due)
+            return [{
+                'url': s.url,
+                'interval': s.interval,
+                'next_due': s.next_due,
+                'error_count': s.error_count
+            } for s in states]
+
+    def refresh_due(self) -> dict:
+        """刷新所有已到期的订阅源，返回刷新结果"""
+        self.sync_feeds()
+        due_urls = self._pop_due(time.time())
+        if not due_urls:
+            return {}
+
+        results = self.feed_manager.refresh_feeds_concurrent(due_urls)
+
+        for url, result in results.items():
+            feed = self.feed_manager.get_feed_by_url(url)
+            self.observe(url, result['success'], result.get('new_items', 0), feed.ttl if feed else 0)
+
+        if self.on_refreshed:
+            self.on_refreshed(results)
+        return results
+
+    def observe(self, url: str, success: bool, new_items: int = 0, ttl: int = 0):
+        """根据一次刷新的结果调整订阅源的刷新间隔并重新排期
+
+        Args:
+            url: 订阅源URL
+            success: 是否刷新成功
+            new_items: 本次出现的新条目数
+            ttl: RSS <ttl> 值（分钟），0表示未提供
+        """
+        with self._lock:
+            state = self._states.get(url)
+            if not state:
+                return
+
+            if success:
+                state.error_count = 0
+                factor = SPEEDUP_FACTOR if new_items > 0 else SLOWDOWN_FACTOR
+                interval = state.interval * factor
+                # 发布方声明的ttl是刷新间隔下限
+                if ttl:
+                    interval = max(interval, ttl * 60)
+                state.interval = self._clamp(interval)
+                delay = state.interval
+            else:
+                # 出错时指数退避，间隔本身保持不变
+                state.error_count += 1
+                delay = self._clamp(state.interval * (2 ** state.error_count))
+
+            state.next_due = time.time() + delay
+            heapq.heappush(self._queue, (state.next_due, url))
+
+    def _pop_due(self, now: float) -> List[str]:
+        """弹出已到期的订阅源URL"""
+        due = []
+        with self._lock:
+            while self._queue and self._queue[0][0] <= now and len(due) < MAX_BATCH_SIZE:
+                next_due, url = heapq.heappop(self._queue)
+                state = self._states.get(url)
+                # 跳过已删除或已被重新排期的旧记录
+                if not state or state.next_due != next_due:
+                    continue
+                due.append(url)
+        return due
+
+    def _seconds_until_next(self) -> float:
+        """距离下一个到期订阅源的秒数"""
+        with self._lock:
+            if not self._queue:
+                return self.min_interval
+            return max(0.0, self._queue[0][0] - time.time())
+
+    def _run(self):
+        """调度线程主循环"""
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=min(self._seconds_until_next(), self.min_interval))
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                results = self.refresh_due()
+                if results:
+                    success_count = sum(1 for r in results.values() if r['success'])
+                    print(f"定时刷新: {success_count}/{len(results)} 成功")
+            except Exception as e:
+                print(f"定时刷新失败: {e}")
+
+    def _estimate_interval(self, feed: Feed) -> float:
+        """根据最近条目的发布间隔估算刷新间隔"""
+        timestamps = [item.published_ts for item in feed.items if item.published_ts is not None]
+
+        if len(timestamps) < 2:
+            return DEFAULT_INTERVAL
+
+        timestamps.sort(reverse=True)
+        recent = timestamps[:10]
+        average_gap = (recent[0] - recent[-1]) / (len(recent) - 1)
+        # 以平均发布间隔的一半作为刷新间隔，尽量不错过新内容
+        return average_gap / 2
+
+    def _clamp(self, interval: float) -> float:
+        """把间隔限制在[min_interval, max_interval]之间"""
+        return max(self.min_interval, min(self.max_interval, interval))
@@ -7,24 +7,81 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QTextBrowser, QSplitter, QListWidget,
                              QListWidgetItem, QFrame, QScrollArea, QTextEdit,
                              QDialog, QDialogButtonBox)
-from PyQt5.QtCore import Qt, pyqtSignal, QUrl
-from PyQt5.QtGui import QFont, QDesktopServices, QPixmap
-from datetime import datetime
+from PyQt5.QtCore import Qt, pyqtSignal, QObject, QUrl
+from PyQt5.QtGui import QFont, QDesktopServices, QImage, QPixmap, QTextDocument
 import webbrowser
-import re
 import html
+import re
 import requests
 from io import BytesIO
+from typing import Callable, Dict, List
 
+from image_cache import ImageCache
 from models import Feed, FeedItem
 
+THUMBNAIL_HEIGHT = 80        # 列表中缩略图的高度
+THUMBNAIL_MAX_WIDTH = 160
+MAX_THUMBNAILS = 4           # 每个条目最多显示的缩略图数
+PREFETCH_ITEMS = 50          # 打开订阅源时预取图片的条目数
+
+_IMG_SRC_RE = re.compile(r'<img[^>]*src=["\']([^"\'>]+)["\'][^>]*>')
+
+
+class ImageLoader(QObject):
+    """把后台下载完成的图片转发到界面线程，只通知请求了该图片的回调"""
+    
+    image_loaded = pyqtSignal(str, bytes)   # 下载线程 -> 界面线程，下载失败时为空字节
+    
+    def __init__(self, cache: ImageCache, parent=None):
+        super().__init__(parent)
+        self.cache = cache
+        # 图片URL -> 等待该图片的回调
+        self._waiting: Dict[str, List[Callable[[bytes], None]]] = {}
+        self.image_loaded.connect(self._dispatch)
+    
+    def load(self, url: str, callback: Callable[[bytes], None]):
+        """请求图片，完成后在界面线程中调用callback(图片字节)，下载失败时参数为空字节"""
+        callbacks = self._waiting.setdefault(url, [])
+        callbacks.append(callback)
+        if len(callbacks) == 1:
+            self.cache.request(url, self._on_loaded)
+    
+    def cancel_all(self):
+        """丢弃所有等待中的回调（条目组件被销毁时调用）"""
+        self._waiting.clear()
+    
+    def _on_loaded(self, url: str, data):
+        self.image_loaded.emit(url, data or b'')
+    
+    def _dispatch(self, url: str, data: bytes):
+        for callback in self._waiting.pop(url, []):
+            callback(data)
+
+
+class CachedTextBrowser(QTextBrowser):
+    """从图片缓存加载<img>的QTextBrowser（QTextBrowser本身不会下载远程图片）"""
+    
+    def __init__(self, image_cache: ImageCache = None, parent=None):
+        super().__init__(parent)
+        self.image_cache = image_cache
+    
+    def loadResource(self, resource_type, url):
+        if resource_type == QTextDocument.ImageResource and self.image_cache is not None:
+            data = self.image_cache.get(url.toString())
+            if data:
+                image = QImage.fromData(data)
+                if not image.isNull():
+                    return image
+        return super().loadResource(resource_type, url)
+
 
 class DetailedContentDialog(QDialog):
     """详细内容查看对话框"""
     
-    def __init__(self, item: FeedItem, parent=None):
+    def __init__(self, item: FeedItem, image_cache: ImageCache = None, parent=None):
         super().__init__(parent)
         self.item = item
+        self.image_cache = image_cache
         self.setWindowTitle(f"详细内容 - {item.title[:50]}...")
         self.setModal(True)
         self.resize(800, 600)
@@ -69,8 +126,8 @@ class DetailedContentDialog(QDialog):
         if info_layout.count() > 0:
             layout.addLayout(info_layout)
         
-        # 内容区域
-        self.content_browser = QTextBrowser()
+        # 内容区域（预取过的图片直接从缓存显示）
+        self.content_browser = CachedTextBrowser(self.image_cache)
         self.content_browser.setStyleSheet("""
             QTextBrowser {
                 border: 1px solid #e0e0e0;
@@ -194,9 +251,11 @@ class EnhancedFeedItemWidget(QFrame):
     
     item_clicked = pyqtSignal(FeedItem)
     
-    def __init__(self, item: FeedItem, parent=None):
+    def __init__(self, item: FeedItem, image_loader: ImageLoader = None, parent=None):
         super().__init__(parent)
         self.item = item
+        self.image_loader = image_loader
+        self.thumbnail_labels = {}
         self.setup_ui()
         self.setFrameStyle(QFrame.Box)
         self.setLineWidth(1)
@@ -253,7 +312,7 @@ class EnhancedFeedItemWidget(QFrame):
         
         # 使用QTextBrowser来显示富文本内容
         if self.item.description:
-            self.content_browser = QTextBrowser()
+            self.content_browser = CachedTextBrowser(self._image_cache())
             self.content_browser.setMaximumHeight(300)
             self.content_browser.setStyleSheet("""
                 QTextBrowser {
@@ -275,6 +334,9 @@ class EnhancedFeedItemWidget(QFrame):
             
             layout.addWidget(self.content_browser)
         
+        # 图片缩略图
+        self._add_thumbnails(layout)
+        
         # 操作按钮区域
         button_layout = QHBoxLayout()
         
@@ -349,6 +411,15 @@ class EnhancedFeedItemWidget(QFrame):
         # 清理和处理HTML
         processed = html.unescape(html_content)
         
+        # 相对路径等无法加载的图片显示为占位文字
+        def replace_img(match):
+            img_url = match.group(1)
+            if not img_url.startswith(('http://', 'https://')):
+                return f'<p>[图片: {img_url}]</p>'
+            return match.group(0)
+        
+        processed = _IMG_SRC_RE.sub(replace_img, processed)
+        
         # 添加基本样式
         css_style = """
         <style>
@@ -393,18 +464,6 @@ class EnhancedFeedItemWidget(QFrame):
         </style>
         """
         
-        # 处理图片链接，确保可以显示
-        img_pattern = r'<img[^>]*src=["\']([^"\'>]+)["\'][^>]*>'
-        
-        def replace_img(match):
-            img_url = match.group(1)
-            # 如果是相对路径，尝试转换为绝对路径
-            if not img_url.startswith(('http://', 'https://')):
-                return f'<p>[图片: {img_url}]</p>'
-            return match.group(0)
-        
-        processed = re.sub(img_pattern, replace_img, processed)
-        
         # 包装完整的HTML
         full_html = f"""
         <!DOCTYPE html>
@@ -421,6 +480,46 @@ class EnhancedFeedItemWidget(QFrame):
         
         return full_html
     
+    def _image_cache(self):
+        return self.image_loader.cache if self.image_loader is not None else None
+    
+    def _add_thumbnails(self, layout):
+        """按条目的图片列表显示缩略图，图片在后台下载"""
+        if self.image_loader is None:
+            return
+        thumbnails = [media for media in self.item.media if media.is_remote][:MAX_THUMBNAILS]
+        if not thumbnails:
+            return
+        
+        thumbnail_layout = QHBoxLayout()
+        for media in thumbnails:
+            label = QLabel("🖼")
+            label.setAlignment(Qt.AlignCenter)
+            label.setFixedHeight(THUMBNAIL_HEIGHT)
+            width = THUMBNAIL_HEIGHT
+            if media.width and media.height:
+                width = min(THUMBNAIL_HEIGHT * media.width // media.height, THUMBNAIL_MAX_WIDTH)
+            label.setFixedWidth(max(width, 1))
+            label.setStyleSheet("background-color: #e9ecef; border-radius: 4px; color: #adb5bd;")
+            self.thumbnail_labels[media.url] = label
+            thumbnail_layout.addWidget(label)
+        thumbnail_layout.addStretch()
+        layout.addLayout(thumbnail_layout)
+        
+        for url, label in self.thumbnail_labels.items():
+            self.image_loader.load(url, lambda data, label=label: self._show_thumbnail(label, data))
+    
+    @staticmethod
+    def _show_thumbnail(label: QLabel, data: bytes):
+        """图片下载完成，显示缩略图；无法加载时显示占位文字"""
+        pixmap = QPixmap()
+        if not data or not pixmap.loadFromData(data):
+            label.setText("[图片]")
+            return
+        pixmap = pixmap.scaledToHeight(THUMBNAIL_HEIGHT, Qt.SmoothTransformation)
+        label.setFixedWidth(min(pixmap.width(), THUMBNAIL_MAX_WIDTH))
+        label.setPixmap(pixmap)
+    
     def toggle_content(self):
         """切换内容展开/收缩状态"""
         if hasattr(self, 'content_browser'):
@@ -435,7 +534,7 @@ class EnhancedFeedItemWidget(QFrame):
     
     def show_detailed_content(self):
         """显示详细内容对话框"""
-        dialog = DetailedContentDialog(self.item, self)
+        dialog = DetailedContentDialog(self.item, self._image_cache(), self)
         dialog.exec_()
     
     def open_link(self):
@@ -456,6 +555,8 @@ class FeedViewer(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.current_feed = None
+        self.image_cache = ImageCache()
+        self.image_loader = ImageLoader(self.image_cache, self)
         self.setup_ui()
     
     def setup_ui(self):
@@ -509,6 +610,8 @@ class FeedViewer(QWidget):
     
     def clear_content(self):
         """清空内容"""
+        # 条目组件即将销毁，不再通知它们的缩略图回调
+        self.image_loader.cancel_all()
         while self.content_layout.count():
             child = self.content_layout.takeAt(0)
             if child.widget():
@@ -535,22 +638,34 @@ class FeedViewer(QWidget):
         else:
             # 按时间排序（最新的在前）
             sorted_items = sorted(feed.items, 
-                                key=lambda x: x.published or datetime.min, 
+                                key=lambda x: x.published_ts or 0, 
                                 reverse=True)
             
             # 添加条目（使用增强版组件）
             for item in sorted_items:
-                item_widget = EnhancedFeedItemWidget(item)
+                item_widget = EnhancedFeedItemWidget(item, self.image_loader)
                 item_widget.item_clicked.connect(self.on_item_clicked)
                 self.content_layout.addWidget(item_widget)
+            
+            # 预取最新条目正文中的其余图片，打开详细内容时直接显示
+            self.image_cache.prefetch(
+                media.url
+                for item in sorted_items[:PREFETCH_ITEMS]
+                for media in item.media
+                if media.is_remote
+            )
         
         self.content_layout.addStretch()
     
     def on_item_clicked(self, item: FeedItem):
         """条目点击处理 - 显示详细内容"""
-        dialog = DetailedContentDialog(item, self)
+        dialog = DetailedContentDialog(item, self.image_cache, self)
         dialog.exec_()
     
+    def shutdown(self):
+        """取消尚未开始的图片下载"""
+        self.image_cache.shutdown()
+    
     def refresh_current_feed(self, updated_feed: Feed):
         """刷新当前显示的订阅源"""
         if self.current_feed and self.current_feed.url == updated_feed.url:
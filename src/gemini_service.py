@@ -4,7 +4,6 @@ Google Gemini API服务
 """
 
 import os
-import re
 import time
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
@@ -45,7 +44,7 @@ class GeminiService:
         生成内容摘要
         
         Args:
-            content: 原始内容
+            content: 纯文本内容（条目的plain_text，不含HTML标签）
             max_length: 摘要最大长度
             
         Returns:
@@ -55,9 +54,7 @@ class GeminiService:
             return None
         
         try:
-            # 清理HTML标签
-            clean_content = re.sub(r'<[^>]+>', '', content)
-            clean_content = re.sub(r'\s+', ' ', clean_content).strip()
+            clean_content = ' '.join(content.split())
             
             # 如果内容太短，直接返回
             if len(clean_content) <= max_length:
@@ -111,7 +108,7 @@ class GeminiService:
         for i, item in enumerate(items, 1):
             try:
                 feed_item = item['item']
-                content = f"{feed_item.title}\n\n{feed_item.description or ''}"
+                content = f"{feed_item.title}\n\n{feed_item.plain_text}"
                 
                 summary = self.generate_summary(content, max_length)
                 item['summary'] = summary
@@ -190,7 +187,7 @@ class GeminiService:
         for i, item in enumerate(items, 1):
             try:
                 feed_item = item['item']
-                content = f"{feed_item.title}\n\n{feed_item.description or ''}"
+                content = f"{feed_item.title}\n\n{feed_item.plain_text}"
                 
                 # 生成摘要
                 if 'summary' not in item or not item['summary']:
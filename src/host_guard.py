@@ -0,0 +1,182 @@
+"""
+按主机的请求保护
+令牌桶限速 + 熔断器（含半开探测），避免一个变慢或出错的主机拖住整个刷新过程
+"""
+
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+# 默认配置
+DEFAULT_RATE = 5.0               # 每个主机每秒补充的令牌数
+DEFAULT_BURST = 10               # 令牌桶容量（允许的突发请求数）
+DEFAULT_FAILURE_THRESHOLD = 5    # 连续失败多少次后熔断
+DEFAULT_RECOVERY_TIMEOUT = 60.0  # 熔断后多久允许半开探测（秒）
+
+# 熔断器状态
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """主机处于熔断状态，请求被直接跳过"""
+
+    def __init__(self, host: str, retry_after: float):
+        self.host = host
+        self.retry_after = retry_after
+        super().__init__(f"熔断中: 主机 {host} 连续失败，{retry_after:.0f}秒后重试")
+
+
+class TokenBucket:
+    """令牌桶限速器"""
+
+    def __init__(self, rate: float = DEFAULT_RATE, capacity: int = DEFAULT_BURST):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """预约一个令牌，返回调用方需要等待的秒数（0表示可以立即请求）"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # 允许令牌为负数，表示已经排队的请求
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后打开，超时后放行一个探测请求"""
+
+    def __init__(self,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = STATE_CLOSED
+        self.failure_count = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> float:
+        """检查是否允许请求
+
+        Returns:
+            0表示允许；大于0表示被拒绝，值为距离下次探测的秒数
+        """
+        with self._lock:
+            if self.state == STATE_CLOSED:
+                return 0.0
+
+            remaining = self._opened_at + self.recovery_timeout - time.monotonic()
+            if self.state == STATE_OPEN and remaining <= 0:
+                # 进入半开状态，只放行一个探测请求
+                self.state = STATE_HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == STATE_HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return 0.0
+
+            return max(remaining, 1.0)
+
+    def record_success(self):
+        """请求成功：关闭熔断器"""
+        with self._lock:
+            self.state = STATE_CLOSED
+            self.failure_count = 0
+            self._probe_in_flight = False
+
+    def release(self):
+        """请求没有得到主机的响应（被取消或本地错误）：不改变失败次数，只归还半开探测名额"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """请求失败：累计失败次数，达到阈值或探测失败时打开熔断器"""
+        with self._lock:
+            self.failure_count += 1
+            if self.state == STATE_HALF_OPEN or self.failure_count >= self.failure_threshold:
+                self.state = STATE_OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class HostGuard:
+    """为每个主机维护一个令牌桶和一个熔断器"""
+
+    def __init__(self,
+                 rate: float = DEFAULT_RATE,
+                 burst: int = DEFAULT_BURST,
+                 failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT):
+        """
+        Args:
+            rate: 每个主机每秒允许的请求数
+            burst: 每个主机允许的突发请求数
+            failure_threshold: 连续失败多少次后熔断
+            recovery_timeout: 熔断后多久进行半开探测（秒）
+        """
+        self.rate = rate
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        """提取URL的主机名"""
+        return urlparse(url).netloc.lower()
+
+    def acquire(self, url: str) -> float:
+        """请求前调用：检查熔断状态并预约令牌
+
+        之后必须调用record_success、record_failure或release之一
+
+        Returns:
+            需要等待的秒数
+
+        Raises:
+            CircuitOpenError: 主机处于熔断状态
+        """
+        host = self.host_of(url)
+        bucket, breaker = self._get(host)
+        retry_after = breaker.allow_request()
+        if retry_after > 0:
+            raise CircuitOpenError(host, retry_after)
+        return bucket.reserve()
+
+    def record_success(self, url: str):
+        """记录请求成功"""
+        self._get(self.host_of(url))[1].record_success()
+
+    def record_failure(self, url: str):
+        """记录请求失败（网络错误、超时或5xx）"""
+        self._get(self.host_of(url))[1].record_failure()
+
+    def release(self, url: str):
+        """acquire之后既没有记录成功也没有记录失败时调用，避免半开探测名额一直被占用"""
+        self._get(self.host_of(url))[1].release()
+
+    def get_states(self) -> Dict[str, dict]:
+        """获取各主机的熔断状态"""
+        with self._lock:
+            return {host: {'state': breaker.state, 'failures': breaker.failure_count}
+                    for host, breaker in self._breakers.items()}
+
+    def _get(self, host: str):
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+            return self._buckets[host], self._breakers[host]
@@ -0,0 +1,204 @@
+"""
+RSS条目HTML清理
+把HTML切分为标签和文本后单遍处理：去掉内联CSS、补全图片属性、链接在新窗口打开、
+删除空标签。规则与原先逐条re.sub的清理流程保持一致，以下情况有意不同
+（对照样例见bench_html_sanitizer.py的KNOWN_DIFFERENCES）：
+- CSS清理规则只作用于正文，标签属性中的#颜色值、锚点等原样保留
+- 嵌套的空标签整体删除，包括只包着空标签的带属性p/div
+"""
+
+import html
+import re
+from typing import List, Optional
+
+# 标签和文本切分
+_TOKEN_RE = re.compile(r'<[^<>]*>|[^<]+|<')
+_TAG_NAME_RE = re.compile(r'<\s*(/?)\s*([a-zA-Z][\w:-]*)')
+
+# 标签内的规则
+_STYLE_ATTR_RE = re.compile(r'\s*style\s*=\s*["\'][^"\'>]*["\']', re.IGNORECASE)
+_BLANK_ATTRS_RE = re.compile(r'<(\w+)\s+>')
+_EMPTY_SRC_RE = re.compile(r'src=""', re.IGNORECASE)
+
+# 文本内的规则（Twitter桥接等来源会把CSS泄漏到正文中）
+_CSS_RUN_RE = re.compile(r'#[0-9a-fA-F]{3,6};\s*[^;]*;[^<>]*', re.IGNORECASE)
+_CSS_PROPERTY_RE = re.compile(
+    r'\b(?:border|padding|margin|color|background|font|width|height|display|position|overflow'
+    r'|line-height|font-size|font-family|white-space)\s*:\s*[^;\n<>]+;?',
+    re.IGNORECASE
+)
+_HEX_COLOR_RE = re.compile(r'\s*#[0-9a-fA-F]{3,6}\s*')
+_CSS_UNIT_RE = re.compile(r'\b\d+(?:px|em|rem|%|pt|vh|vw)\b')
+_SEMICOLONS_RE = re.compile(r';+')
+_SEMICOLON_SPACING_RE = re.compile(r'\s*;\s*')
+_LEADING_GT_RE = re.compile(r'^\s*>')
+_GT_RUN_RE = re.compile(r'>\s*>')
+_WHITESPACE_RE = re.compile(r'\s+')
+# 文本中出现这些字符时才需要执行上面的规则
+_TEXT_RULE_TRIGGER_RE = re.compile(r'[#:;\d]')
+
+# 内容为空时删除的标签：p/div允许只含分号，其余标签要求没有属性
+_SEMICOLON_ONLY_RE = re.compile(r'\s*;*\s*')
+_BLOCK_TAGS = {'p', 'div'}
+
+# 结束标签的处理结果
+_KEPT = 'kept'
+_DROPPED = 'dropped'
+_DROPPED_BLOCK = 'dropped_block'
+
+# 没有结束标签的元素
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+              'link', 'meta', 'param', 'source', 'track', 'wbr'}
+
+IMAGE_PLACEHOLDER = '<div class="image-placeholder"><i class="bi bi-image"></i><p>图片链接无效</p></div>'
+LINK_TARGET = ' target="_blank" rel="noopener noreferrer"'
+
+
+def sanitize_html(html_content: str) -> str:
+    """清理和增强RSS条目的HTML内容"""
+    if not html_content:
+        return ''
+
+    content = html.unescape(html_content)
+
+    out: List[str] = []
+    # 打开的标签栈：(标签名, 是否为无属性标签, 在out中的位置)
+    stack: List[tuple] = []
+    # 前面（忽略空白）紧挨着">"时，记录">"之后的位置，否则为None
+    gt_end: Optional[int] = None
+
+    for token in _TOKEN_RE.findall(content):
+        if token[0] != '<' or len(token) == 1:
+            text = _clean_text(token) if _TEXT_RULE_TRIGGER_RE.search(token) else token
+            # 标签后紧跟的">"是残留的CSS选择器，连同中间的空白一起去掉
+            if gt_end is not None:
+                gt_match = _LEADING_GT_RE.match(text)
+                if gt_match:
+                    text = text[gt_match.end():]
+                    del out[gt_end:]
+            if '>' in text:
+                text = _GT_RUN_RE.sub('>', text)
+            if text:
+                out.append(text)
+                if text.strip():
+                    gt_end = None
+            continue
+
+        name_match = _TAG_NAME_RE.match(token)
+        if not name_match:
+            # 注释、DOCTYPE等原样保留
+            out.append(token)
+            gt_end = len(out)
+            continue
+
+        closing, name = name_match.group(1), name_match.group(2).lower()
+        if closing:
+            if _close_tag(out, stack, name, token) == _DROPPED_BLOCK:
+                # 原流程先删空段落再合并">"，此时看删除后的前文
+                gt_end = _gt_end(out)
+            else:
+                gt_end = len(out)
+            continue
+
+        tag = token
+        if '=' in tag:
+            tag = _STYLE_ATTR_RE.sub('', tag)
+        if tag[-2].isspace():
+            tag = _BLANK_ATTRS_RE.sub(r'<\1>', tag)
+
+        if name == 'img':
+            tag = _fix_img_tag(tag)
+            if _EMPTY_SRC_RE.search(tag):
+                tag = IMAGE_PLACEHOLDER
+            out.append(tag)
+            gt_end = len(out)
+            continue
+
+        if name == 'a' and 'href="' in tag:
+            tag = tag[:-1] + LINK_TARGET + '>'
+
+        out.append(tag)
+        gt_end = len(out)
+        if name not in _VOID_TAGS and not tag.endswith('/>'):
+            bare = tag[1:-1].strip().lower() == name
+            stack.append((name, bare, len(out) - 1))
+
+    return _WHITESPACE_RE.sub(' ', ''.join(out)).strip()
+
+
+def _clean_text(text: str) -> str:
+    """去掉正文中泄漏的CSS片段，整理分号"""
+    text = _CSS_RUN_RE.sub('', text)
+    text = _CSS_PROPERTY_RE.sub('', text)
+    text = _HEX_COLOR_RE.sub(' ', text)
+    text = _CSS_UNIT_RE.sub('', text)
+    if ';' in text:
+        text = _SEMICOLONS_RE.sub(';', text)
+        text = _SEMICOLON_SPACING_RE.sub('; ', text)
+    return text
+
+
+def _close_tag(out: List[str], stack: List[tuple], name: str, token: str) -> str:
+    """处理结束标签：内容为空的可删除标签连同开始标签一起去掉
+
+    Returns:
+        _KEPT、_DROPPED_BLOCK（删除了p/div）或_DROPPED
+    """
+    for depth in range(len(stack) - 1, -1, -1):
+        if stack[depth][0] == name:
+            break
+    else:
+        out.append(token)
+        return _KEPT
+
+    # 未闭合的内层标签视为在此处结束
+    open_name, bare, start = stack[depth]
+    del stack[depth:]
+
+    block = open_name in _BLOCK_TAGS
+    if token.lower() == f'</{name}>' and (bare or block) and _is_blank(out, start + 1, block):
+        del out[start:]
+        return _DROPPED_BLOCK if block else _DROPPED
+
+    out.append(token)
+    return _KEPT
+
+
+def _gt_end(out: List[str]) -> Optional[int]:
+    """out中最后一段非空白内容以">"结尾时返回其后的位置，否则返回None"""
+    for index in range(len(out) - 1, -1, -1):
+        piece = out[index].rstrip()
+        if piece:
+            return index + 1 if piece.endswith('>') else None
+    return None
+
+
+def _is_blank(out: List[str], start: int, allow_semicolons: bool) -> bool:
+    """out[start:]是否只有空白（p/div还允许只含分号）"""
+    for piece in out[start:]:
+        if allow_semicolons:
+            piece = piece.replace(';', '')
+        if piece.strip():
+            return False
+    if allow_semicolons:
+        return _SEMICOLON_ONLY_RE.fullmatch(''.join(out[start:])) is not None
+    return True
+
+
+def _fix_img_tag(img_tag: str) -> str:
+    """修复图片标签，确保有正确的属性"""
+    lowered = img_tag.lower()
+
+    # 如果没有alt属性，添加默认值
+    if 'alt=' not in lowered:
+        img_tag = img_tag.replace('>', ' alt="图片">', 1)
+
+    # 如果没有loading属性，添加lazy loading
+    if 'loading=' not in lowered:
+        img_tag = img_tag.replace('>', ' loading="lazy">', 1)
+
+    # 确保有style或class用于响应式
+    if 'style=' not in lowered and 'class=' not in lowered:
+        img_tag = img_tag.replace('>', ' style="max-width: 100%; height: auto;">', 1)
+
+    return img_tag
@@ -0,0 +1,319 @@
+"""
+共享HTTP客户端
+所有RSS下载共用带连接池的Session，统一超时、压缩协商和请求耗时统计
+"""
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from host_guard import CircuitOpenError, HostGuard
+
+# 默认配置
+DEFAULT_TIMEOUT = 10            # 单次请求超时（秒）
+DEFAULT_POOL_CONNECTIONS = 32   # 缓存连接池的主机数量
+DEFAULT_POOL_MAXSIZE = 8        # 每个主机连接池的最大连接数
+DEFAULT_USER_AGENT = "Mozilla/5.0 (compatible; TwitterRSSManager/1.0)"
+DEFAULT_MAX_BODY_SIZE = 10 * 1024 * 1024   # 单个响应最大10MB（解压后）
+CHUNK_SIZE = 64 * 1024                     # 流式读取块大小
+
+
+class FeedTooLargeError(Exception):
+    """响应内容超过大小上限"""
+
+    def __init__(self, url: str, limit: int):
+        self.url = url
+        self.limit = limit
+        super().__init__(f"内容过大: 超过 {limit // 1024}KB 上限")
+
+
+@dataclass
+class FetchResult:
+    """单次RSS下载结果"""
+    url: str
+    status: int = 0
+    content: Optional[bytes] = None
+    headers: Dict[str, str] = field(default_factory=dict)   # 不区分大小写
+    error: Optional[str] = None
+    elapsed: float = 0.0   # 请求耗时（秒）
+
+    @property
+    def not_modified(self) -> bool:
+        """服务器返回304，内容未变化"""
+        return self.status == 304
+
+
+class HttpClient:
+    """带连接池和耗时统计的HTTP客户端"""
+
+    def __init__(self,
+                 timeout: float = DEFAULT_TIMEOUT,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 user_agent: str = DEFAULT_USER_AGENT,
+                 max_body_size: int = DEFAULT_MAX_BODY_SIZE,
+                 host_guard: Optional[HostGuard] = None):
+        """
+        初始化HTTP客户端
+
+        Args:
+            timeout: 默认请求超时（秒）
+            pool_connections: 缓存连接池的主机数量
+            pool_maxsize: 每个主机保持的最大连接数
+            user_agent: 请求使用的User-Agent
+            max_body_size: 单个响应允许的最大字节数（解压后），超过即中止下载
+            host_guard: 按主机的限速和熔断配置，默认使用HostGuard()
+        """
+        self.timeout = timeout
+        self.max_body_size = max_body_size
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.default_headers = {
+            'User-Agent': user_agent,
+            'Accept-Encoding': 'gzip, deflate',
+            'Accept': 'application/rss+xml, application/atom+xml, application/xml;q=0.9, text/xml;q=0.9, */*;q=0.8',
+        }
+
+        self.session = requests.Session()
+        self.session.headers.update(self.default_headers)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.host_guard = host_guard or HostGuard()
+
+        self._stats_lock = threading.Lock()
+        self._stats: Dict[str, dict] = {}
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: Optional[float] = None, **kwargs) -> requests.Response:
+        """发送GET请求，复用连接池并记录耗时
+
+        异常与requests.get一致（requests.RequestException）
+        """
+        start = time.perf_counter()
+        error = False
+        try:
+            return self.session.get(url, headers=headers,
+                                    timeout=timeout or self.timeout, **kwargs)
+        except requests.RequestException:
+            error = True
+            raise
+        finally:
+            self.record(url, time.perf_counter() - start, error)
+
+    def fetch(self, url: str, headers: Optional[Dict[str, str]] = None,
+              max_body_size: Optional[int] = None) -> Tuple[requests.Response, bytes]:
+        """流式下载响应内容，超过大小上限立即中止
+
+        请求前按主机限速，主机熔断时直接跳过。
+
+        Returns:
+            (响应对象, 内容)，304时内容为空
+
+        Raises:
+            CircuitOpenError: 主机处于熔断状态，未发出请求
+            requests.RequestException: 网络错误或HTTP错误状态
+            FeedTooLargeError: 内容超过大小上限
+        """
+        limit = max_body_size or self.max_body_size
+        wait = self.host_guard.acquire(url)
+        reported = False  # 是否已向熔断器记录主机的成败
+        try:
+            if wait > 0:
+                time.sleep(wait)
+
+            start = time.perf_counter()
+            error = False
+            try:
+                try:
+                    response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+                except requests.RequestException:
+                    self.host_guard.record_failure(url)
+                    reported = True
+                    raise
+
+                with response:
+                    self._record_host_status(url, response.status_code)
+                    reported = True
+                    if response.status_code == 304:
+                        return response, b''
+                    response.raise_for_status()
+                    return response, b''.join(self.iter_body(response, limit))
+            except (requests.RequestException, FeedTooLargeError):
+                error = True
+                raise
+            finally:
+                self.record(url, time.perf_counter() - start, error)
+        finally:
+            if not reported:
+                self.host_guard.release(url)
+
+    def _record_host_status(self, url: str, status: int):
+        """根据状态码更新熔断器：5xx和429视为主机故障"""
+        if status >= 500 or status == 429:
+            self.host_guard.record_failure(url)
+        else:
+            self.host_guard.record_success(url)
+
+    @staticmethod
+    def iter_body(response: requests.Response, limit: int) -> Iterator[bytes]:
+        """逐块读取响应内容，累计超过limit时抛出FeedTooLargeError"""
+        declared = response.headers.get('Content-Length')
+        if declared and declared.isdigit() and int(declared) > limit:
+            raise FeedTooLargeError(response.url, limit)
+
+        received = 0
+        for chunk in response.iter_content(CHUNK_SIZE):
+            received += len(chunk)
+            if received > limit:
+                raise FeedTooLargeError(response.url, limit)
+            yield chunk
+
+    def create_async_session(self, max_concurrency: int, per_host_limit: int):
+        """创建异步下载使用的aiohttp会话，一次批量刷新内复用连接"""
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=max_concurrency, limit_per_host=per_host_limit)
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            headers=self.default_headers
+        )
+
+    async def fetch_async(self, session, url: str,
+                          headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """使用aiohttp会话下载单个URL，错误写入FetchResult.error"""
+        import aiohttp
+
+        result = FetchResult(url=url)
+        try:
+            wait = self.host_guard.acquire(url)
+        except CircuitOpenError as e:
+            result.error = str(e)
+            return result
+
+        reported = False  # 是否已向熔断器记录主机的成败
+        try:
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            start = time.perf_counter()
+            try:
+                async with session.get(url, headers=headers) as response:
+                    result.status = response.status
+                    result.headers = CaseInsensitiveDict(response.headers)
+                    self._record_host_status(url, response.status)
+                    reported = True
+                    if response.status != 304:
+                        response.raise_for_status()
+                        result.content = await self._read_limited_async(response, self.max_body_size)
+            except FeedTooLargeError as e:
+                result.error = str(e)
+            except asyncio.TimeoutError:
+                result.error = "网络错误: 请求超时"
+                self.host_guard.record_failure(url)
+                reported = True
+            except aiohttp.ClientResponseError as e:
+                result.error = f"网络错误: {str(e)}"
+            except aiohttp.ClientError as e:
+                result.error = f"网络错误: {str(e)}"
+                self.host_guard.record_failure(url)
+                reported = True
+            except Exception as e:
+                result.error = f"刷新错误: {str(e)}"
+        finally:
+            # 被取消或出现未知错误时没有记录成败，归还半开探测名额
+            if not reported:
+                self.host_guard.release(url)
+
+        result.elapsed = time.perf_counter() - start
+        self.record(url, result.elapsed, result.error is not None)
+        return result
+
+    @staticmethod
+    async def _read_limited_async(response, limit: int) -> bytes:
+        """逐块读取aiohttp响应，超过limit时抛出FeedTooLargeError"""
+        if response.content_length is not None and response.content_length > limit:
+            raise FeedTooLargeError(str(response.url), limit)
+
+        chunks = []
+        received = 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            received += len(chunk)
+            if received > limit:
+                raise FeedTooLargeError(str(response.url), limit)
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def record(self, url: str, elapsed: float, error: bool = False):
+        """记录一次请求的耗时"""
+        host = urlparse(url).netloc.lower()
+        with self._stats_lock:
+            stats = self._stats.setdefault(host, {'requests': 0, 'errors': 0, 'total_time': 0.0})
+            stats['requests'] += 1
+            stats['total_time'] += elapsed
+            if error:
+                stats['errors'] += 1
+
+    def get_stats(self) -> dict:
+        """获取请求统计：总数、错误数和平均耗时（毫秒），按主机细分"""
+        with self._stats_lock:
+            hosts = {}
+            total_requests = total_errors = 0
+            total_time = 0.0
+            for host, stats in self._stats.items():
+                hosts[host] = {
+                    'requests': stats['requests'],
+                    'errors': stats['errors'],
+                    'mean_latency_ms': round(stats['total_time'] / stats['requests'] * 1000, 1)
+                }
+                total_requests += stats['requests']
+                total_errors += stats['errors']
+                total_time += stats['total_time']
+
+        return {
+            'requests': total_requests,
+            'errors': total_errors,
+            'mean_latency_ms': round(total_time / total_requests * 1000, 1) if total_requests else 0.0,
+            'hosts': hosts
+        }
+
+    def reset_stats(self):
+        """清空请求统计"""
+        with self._stats_lock:
+            self._stats.clear()
+
+    def close(self):
+        """关闭连接池"""
+        self.session.close()
+
+
+_shared_client: Optional[HttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """获取全局共享的HTTP客户端"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
+
+
+def configure_http_client(**kwargs) -> HttpClient:
+    """使用新配置替换全局共享的HTTP客户端，参数同HttpClient"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is not None:
+            _shared_client.close()
+        _shared_client = HttpClient(**kwargs)
+        return _shared_client
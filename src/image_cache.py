@@ -0,0 +1,113 @@
+"""
+图片预取和缓存
+桌面端按条目入库时提取的图片列表（FeedItem.media）在后台下载图片，
+内存中保留最近使用的图片，列表缩略图和详细内容直接从缓存显示。
+图片使用单独的HTTP客户端（连接池、限速和熔断都与RSS下载分开），
+图片主机的失败或大量图片请求不会影响订阅源的刷新
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import requests
+
+from host_guard import CircuitOpenError
+from http_client import FeedTooLargeError, HttpClient
+
+DEFAULT_IMAGE_WORKERS = 4                   # 并发下载数
+DEFAULT_CACHE_ENTRIES = 256                 # 内存中保留的图片数
+DEFAULT_MAX_IMAGE_SIZE = 5 * 1024 * 1024    # 单张图片最大5MB
+
+ImageCallback = Callable[[str, Optional[bytes]], None]
+
+
+class ImageCache:
+    """后台下载图片并按LRU缓存原始字节"""
+
+    def __init__(self,
+                 max_workers: int = DEFAULT_IMAGE_WORKERS,
+                 max_entries: int = DEFAULT_CACHE_ENTRIES,
+                 max_image_size: int = DEFAULT_MAX_IMAGE_SIZE,
+                 http_client: Optional[HttpClient] = None):
+        """
+        Args:
+            max_workers: 并发下载数
+            max_entries: 缓存的图片数上限
+            max_image_size: 单张图片的字节数上限，超过则放弃
+            http_client: 下载图片使用的HTTP客户端，默认创建独立的客户端（不要传入RSS下载共用的客户端）
+        """
+        self.max_entries = max_entries
+        self.max_image_size = max_image_size
+        self._owns_client = http_client is None
+        self.http_client = http_client or HttpClient(pool_maxsize=max_workers,
+                                                     max_body_size=max_image_size)
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        # 下载中的URL -> 完成后要通知的回调
+        self._pending: Dict[str, List[ImageCallback]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="ImageFetch")
+
+    def get(self, url: str) -> Optional[bytes]:
+        """已缓存的图片，没有时返回None"""
+        with self._lock:
+            data = self._cache.get(url)
+            if data is not None:
+                self._cache.move_to_end(url)
+            return data
+
+    def request(self, url: str, callback: Optional[ImageCallback] = None):
+        """获取图片：已缓存时立即回调，否则在后台下载完成后回调
+
+        回调参数为 (url, 图片字节)，下载失败时图片字节为None；
+        后台下载的回调在下载线程中执行
+        """
+        with self._lock:
+            data = self._cache.get(url)
+            if data is None:
+                callbacks = self._pending.get(url)
+                if callbacks is None:
+                    callbacks = self._pending[url] = []
+                    self._executor.submit(self._download, url)
+                if callback is not None:
+                    callbacks.append(callback)
+                return
+            self._cache.move_to_end(url)
+
+        if callback is not None:
+            callback(url, data)
+
+    def prefetch(self, urls: Iterable[str]):
+        """在后台下载尚未缓存的图片"""
+        for url in urls:
+            self.request(url)
+
+    def shutdown(self):
+        """取消排队中的下载，关闭自己创建的HTTP客户端"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._owns_client:
+            self.http_client.close()
+
+    def _download(self, url: str):
+        data = None
+        try:
+            _, data = self.http_client.fetch(url, headers={'Accept': 'image/*'},
+                                             max_body_size=self.max_image_size)
+            data = data or None
+        except (CircuitOpenError, requests.RequestException, FeedTooLargeError) as e:
+            print(f"图片下载失败: {url} - {e}")
+
+        with self._lock:
+            callbacks = self._pending.pop(url, [])
+            if data is not None:
+                self._cache[url] = data
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+
+        for callback in callbacks:
+            try:
+                callback(url, data)
+            except Exception as e:
+                print(f"图片回调出错: {e}")
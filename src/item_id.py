@@ -0,0 +1,74 @@
+"""
+条目ID生成
+条目没有自带id/guid时，用规范化后的链接、标题和发布时间计算稳定的摘要作为ID，
+不同进程、重启前后得到的ID一致
+"""
+
+import hashlib
+import re
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlsplit, urlunsplit
+
+ITEM_ID_LENGTH = 32   # 摘要保留的十六进制位数（128位）
+
+# 旧版本用Python内置hash()生成的ID（每次启动都会变化）：64位有符号整数，
+# 取值近似均匀分布，绝对值小于10^14的概率约为十万分之一，因此只把15位以上的数字视为旧ID
+_LEGACY_ID_PATTERN = re.compile(r'^-?\d{15,19}$')
+_HASH_MIN = -(1 << 63)
+_HASH_MAX = (1 << 63) - 1
+
+
+def normalize_link(link: str) -> str:
+    """规范化链接：去掉空白和#片段，协议和主机名小写，去掉路径末尾的/"""
+    link = (link or '').strip()
+    if not link:
+        return ''
+    try:
+        parts = urlsplit(link)
+    except ValueError:
+        return link
+    path = parts.path
+    if len(path) > 1:
+        path = path.rstrip('/')
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ''))
+
+
+def normalize_title(title: str) -> str:
+    """规范化标题：合并连续空白"""
+    return ' '.join((title or '').split())
+
+
+def normalize_date(published: Optional[datetime]) -> str:
+    """规范化发布时间：带时区的转换为UTC，精确到秒"""
+    if not published:
+        return ''
+    if published.tzinfo is not None:
+        published = published.astimezone(timezone.utc).replace(tzinfo=None)
+    return published.replace(microsecond=0).isoformat()
+
+
+def make_item_id(link: str, title: str = '', published: Optional[datetime] = None) -> str:
+    """根据链接、标题和发布时间生成稳定的条目ID
+
+    有链接时只用链接（标题修改不会产生新条目），否则使用标题和发布时间
+    """
+    normalized = normalize_link(link)
+    if normalized:
+        key = f"link\n{normalized}"
+    else:
+        key = f"title\n{normalize_title(title)}\n{normalize_date(published)}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:ITEM_ID_LENGTH]
+
+
+def is_legacy_id(guid: str, link: str = '') -> bool:
+    """是否为旧版本用hash()生成的ID
+
+    只匹配hash()可能产生的值（15~19位、在64位有符号整数范围内的数字）；
+    上游自带的数字ID（如推文ID）通常也出现在链接中，这种情况不视为旧ID
+    """
+    if not guid or not _LEGACY_ID_PATTERN.match(guid):
+        return False
+    if not _HASH_MIN <= int(guid) <= _HASH_MAX:
+        return False
+    return guid.lstrip('-') not in (link or '')
@@ -0,0 +1,86 @@
+"""
+条目正文的派生字段
+条目入库时从清理后的HTML计算一次纯文本、长度、摘录、结构标记和图片列表，
+评分、AI摘要、页面展示和榜单都直接读取这些字段，不再各自扫描HTML
+"""
+
+import re
+from typing import List, Tuple
+
+EXCERPT_LENGTH = 200   # 摘录的最大字符数（超出部分以"..."结尾）
+MAX_IMAGE_DIMENSION = 65535   # 图片宽高的上限（像素），更大的值按上限处理
+
+# 结构标记（按位组合）
+STRUCT_PARAGRAPHS = 1   # 至少两个段落
+STRUCT_LIST = 2         # 包含列表
+STRUCT_HEADINGS = 4     # 包含h1-h4标题
+STRUCT_IMAGES = 8       # 包含图片
+
+# 评分时视为"结构良好"的标记
+GOOD_STRUCTURE = STRUCT_PARAGRAPHS | STRUCT_LIST | STRUCT_HEADINGS
+
+_TAG_RE = re.compile(r'<[^>]+>')
+_IMG_TAG_RE = re.compile(r'<img\b[^>]*>', re.IGNORECASE)
+_ATTR_RE = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))')
+_DIMENSION_RE = re.compile(r'^\s*(\d+)(?:px)?\s*$', re.IGNORECASE)
+
+
+def plain_text(html_content: str) -> str:
+    """去掉HTML标签并合并连续空白"""
+    if not html_content:
+        return ''
+    return ' '.join(_TAG_RE.sub('', html_content).split())
+
+
+def make_excerpt(text: str, length: int = EXCERPT_LENGTH) -> str:
+    """截取纯文本的开头作为摘录"""
+    if len(text) > length:
+        return text[:length] + "..."
+    return text
+
+
+def structure_flags(html_content: str) -> int:
+    """检查HTML的段落、列表、标题和图片，返回结构标记"""
+    if not html_content:
+        return 0
+
+    flags = 0
+    if html_content.count('<p>') >= 2:
+        flags |= STRUCT_PARAGRAPHS
+    if '<ul>' in html_content or '<ol>' in html_content or '<li>' in html_content:
+        flags |= STRUCT_LIST
+    if any(tag in html_content for tag in ('<h1>', '<h2>', '<h3>', '<h4>')):
+        flags |= STRUCT_HEADINGS
+    if '<img' in html_content:
+        flags |= STRUCT_IMAGES
+    return flags
+
+
+def text_fields(html_content: str) -> Tuple[str, int, str, int]:
+    """计算全部派生字段：(纯文本, 文本长度, 摘录, 结构标记)"""
+    text = plain_text(html_content)
+    return text, len(text), make_excerpt(text), structure_flags(html_content)
+
+
+def extract_images(html_content: str) -> List[Tuple[str, int, int]]:
+    """提取图片：[(src, 宽, 高)]，按出现顺序去重，未提供或非像素的尺寸为0"""
+    if not html_content or '<img' not in html_content.lower():
+        return []
+
+    images = []
+    seen = set()
+    for tag in _IMG_TAG_RE.findall(html_content):
+        attrs = {}
+        for name, double, single, bare in _ATTR_RE.findall(tag):
+            attrs.setdefault(name.lower(), double or single or bare)
+        src = attrs.get('src', '').strip()
+        if not src or src in seen:
+            continue
+        seen.add(src)
+        images.append((src, _dimension(attrs.get('width')), _dimension(attrs.get('height'))))
+    return images
+
+
+def _dimension(value) -> int:
+    match = _DIMENSION_RE.match(value or '')
+    return min(int(match.group(1)), MAX_IMAGE_DIMENSION) if match else 0
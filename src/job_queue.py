@@ -0,0 +1,238 @@
+"""
+后台任务队列
+把导入OPML、刷新全部、生成榜单等耗时操作放到进程内的工作线程中执行，
+任务记录持久化到磁盘，重启后仍可查询已完成任务的结果
+"""
+
+import json
+import os
+import threading
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from storage import atomic_write_json
+
+# 任务状态
+STATE_PENDING = "pending"
+STATE_RUNNING = "running"
+STATE_SUCCEEDED = "succeeded"
+STATE_FAILED = "failed"
+
+DEFAULT_MAX_WORKERS = 2      # 同时执行的任务数
+DEFAULT_MAX_RECORDS = 200    # 磁盘上保留的任务记录数
+HEARTBEAT_INTERVAL = 15.0    # 事件流无新事件时的心跳间隔（秒）
+
+
+@dataclass
+class Job:
+    """后台任务记录"""
+    id: str
+    kind: str
+    state: str = STATE_PENDING
+    progress: float = 0.0          # 0-1
+    done: int = 0
+    total: int = 0
+    message: str = ""
+    result: Any = None
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (STATE_SUCCEEDED, STATE_FAILED)
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class JobContext:
+    """传给任务函数的上下文，用于上报进度"""
+
+    def __init__(self, queue: 'JobQueue', job: Job):
+        self._queue = queue
+        self.job = job
+
+    def report(self, done: int, total: int, message: str = ""):
+        """上报进度：已完成数量、总数量和当前消息"""
+        self._queue._update(self.job, done=done, total=total,
+                            progress=(done / total) if total else 0.0,
+                            message=message or self.job.message)
+
+    def emit(self, event: str, data: dict):
+        """向订阅该任务的事件流推送一条事件"""
+        self._queue._emit(self.job.id, event, data)
+
+
+class JobQueue:
+    """有界并发的进程内任务队列"""
+
+    def __init__(self, storage_dir: str, max_workers: int = DEFAULT_MAX_WORKERS,
+                 max_records: int = DEFAULT_MAX_RECORDS):
+        """
+        初始化任务队列
+
+        Args:
+            storage_dir: 任务记录保存目录
+            max_workers: 最大并发任务数
+            max_records: 保留的历史任务记录数
+        """
+        self.storage_dir = storage_dir
+        self.max_records = max_records
+        os.makedirs(storage_dir, exist_ok=True)
+
+        self._jobs: Dict[str, Job] = {}
+        self._inflight: Dict[str, Job] = {}   # dedupe_key -> 未完成的任务
+        self._lock = threading.Lock()
+        # 任务事件只保存在内存中，供事件流（SSE）读取
+        self._events: Dict[str, List[dict]] = {}
+        self._events_changed = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._load_records()
+
+    def submit(self, kind: str, func: Callable[..., Any], *args,
+               dedupe_key: Optional[str] = None, **kwargs) -> Job:
+        """提交任务，立即返回任务记录
+
+        func的第一个参数是JobContext，其余参数原样传递，返回值需可JSON序列化。
+        指定dedupe_key时，若相同键的任务尚未完成，直接返回该任务而不重复提交。
+        """
+        with self._lock:
+            if dedupe_key:
+                running = self._inflight.get(dedupe_key)
+                if running and not running.finished:
+                    return running
+            job = Job(id=uuid.uuid4().hex[:12], kind=kind, message="等待执行")
+            self._jobs[job.id] = job
+            if dedupe_key:
+                self._inflight[dedupe_key] = job
+        self._persist(job)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """根据ID获取任务"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, limit: int = 20) -> List[Job]:
+        """获取最近的任务，按创建时间倒序"""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+        return jobs[:limit]
+
+    def iter_events(self, job_id: str, heartbeat: float = HEARTBEAT_INTERVAL) -> Iterator[Optional[dict]]:
+        """按顺序产出任务事件，任务结束后以一条state事件收尾
+
+        长时间没有新事件时产出None，调用方可据此发送心跳
+        """
+        cursor = 0
+        while True:
+            with self._events_changed:
+                job = self._jobs.get(job_id)
+                if not job:
+                    return
+                events = self._events.get(job_id, [])
+                if cursor >= len(events) and not job.finished:
+                    self._events_changed.wait(timeout=heartbeat)
+                    events = self._events.get(job_id, [])
+                pending = events[cursor:]
+                cursor = len(events)
+                finished = job.finished
+                snapshot = job.to_dict() if finished and not pending else None
+
+            if not pending and not finished:
+                yield None
+                continue
+            for event in pending:
+                yield event
+            if snapshot is not None:
+                yield {'event': 'state', 'data': snapshot}
+                return
+
+    def shutdown(self, wait: bool = True):
+        """停止接收新任务"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, func: Callable[..., Any], args, kwargs):
+        self._update(job, state=STATE_RUNNING, started_at=datetime.now().isoformat(), message="执行中")
+        try:
+            result = func(JobContext(self, job), *args, **kwargs)
+            self._update(job, state=STATE_SUCCEEDED, progress=1.0, result=result,
+                         finished_at=datetime.now().isoformat(), message="已完成")
+        except Exception as e:
+            traceback.print_exc()
+            self._update(job, state=STATE_FAILED, error=str(e),
+                         finished_at=datetime.now().isoformat(), message=f"任务失败: {str(e)}")
+
+    def _update(self, job: Job, **changes):
+        """修改任务字段；状态变化时写盘（进度更新只保存在内存中）"""
+        with self._events_changed:
+            for key, value in changes.items():
+                setattr(job, key, value)
+            if job.finished:
+                for key in [k for k, j in self._inflight.items() if j is job]:
+                    del self._inflight[key]
+            self._events_changed.notify_all()
+        if 'state' in changes:
+            self._persist(job)
+
+    def _emit(self, job_id: str, event: str, data: dict):
+        with self._events_changed:
+            self._events.setdefault(job_id, []).append({'event': event, 'data': data})
+            self._events_changed.notify_all()
+
+    def _record_path(self, job_id: str) -> str:
+        return os.path.join(self.storage_dir, f"{job_id}.json")
+
+    def _persist(self, job: Job):
+        """原子写入任务记录"""
+        try:
+            with self._lock:
+                data = job.to_dict()
+            atomic_write_json(self._record_path(job.id), data, indent=None, default=str)
+            if job.finished:
+                self._prune()
+        except Exception as e:
+            print(f"保存任务记录失败: {e}")
+
+    def _load_records(self):
+        """加载历史任务记录；重启前未完成的任务标记为失败"""
+        for name in os.listdir(self.storage_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.storage_dir, name), 'r', encoding='utf-8') as f:
+                    job = Job(**json.load(f))
+            except Exception as e:
+                print(f"读取任务记录失败 {name}: {e}")
+                continue
+
+            self._jobs[job.id] = job
+            if not job.finished:
+                job.state = STATE_FAILED
+                job.error = "服务重启，任务中断"
+                job.message = job.error
+                job.finished_at = datetime.now().isoformat()
+                self._persist(job)
+
+    def _prune(self):
+        """只保留最近max_records条已完成的任务记录"""
+        with self._lock:
+            finished = sorted((j for j in self._jobs.values() if j.finished),
+                              key=lambda j: j.created_at, reverse=True)
+            stale = finished[self.max_records:]
+            for job in stale:
+                del self._jobs[job.id]
+                self._events.pop(job.id, None)
+
+        for job in stale:
+            try:
+                os.remove(self._record_path(job.id))
+            except OSError:
+                pass
@@ -0,0 +1,363 @@
+"""
+JSON存储后端：快照 + 追加写入的修改日志
+完整快照默认为二进制格式（feeds_data.json.snap，见binary_snapshot），
+没有可用的二进制快照时读取JSON格式的feeds_data.json（原数据文件，
+首次写入二进制快照后改名为feeds_data.json.bak保留）。
+之后的修改以每行一条记录追加到feeds_data.json.log，写入量只与修改的多少有关。
+加载时读取快照再按顺序重放日志；日志超过一定大小时在后台线程中合并为新快照
+"""
+
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from binary_snapshot import SnapshotError, read_snapshot, write_snapshot
+from models import Feed
+from storage import (STORE_VERSION, StorageBackend, StoreChanges, atomic_write_json,
+                     feed_from_dict, feed_to_dict, item_from_dict, item_to_dict)
+
+SNAPSHOT_SUFFIX = '.snap'        # 二进制快照文件后缀
+JSON_BACKUP_SUFFIX = '.bak'      # 改用二进制快照后保留的原JSON数据文件
+LOG_SUFFIX = '.log'              # 修改日志文件后缀
+COMPACTING_SUFFIX = '.log.1'     # 合并中的日志（合并开始时由修改日志改名而来）
+
+# 日志超过COMPACT_MIN_BYTES且超过快照大小的COMPACT_RATIO倍时合并
+COMPACT_MIN_BYTES = 1024 * 1024
+COMPACT_RATIO = 0.5
+
+
+class JsonStorage(StorageBackend):
+    """快照加JSON修改日志
+
+    日志记录（每行一个JSON对象）：
+        {"op": "replace", "feed": {...}}   写入整个订阅源（含条目），新订阅源排在最后
+        {"op": "feed", "feed": {...}}      只更新订阅源信息（不含条目）
+        {"op": "items", "url": ..., "upsert": [...], "delete": [guid...], "order": [guid...]}
+                                           按GUID更新/删除条目，order为变化后的条目顺序（顺序不变时省略）
+        {"op": "remove", "url": ...}       删除订阅源
+    每条记录都写入修改后的状态，重复重放结果相同，合并中途崩溃也不会出错
+    """
+
+    def __init__(self, path: str, compact_min_bytes: int = COMPACT_MIN_BYTES,
+                 compact_ratio: float = COMPACT_RATIO, binary_snapshot: bool = True):
+        """
+        Args:
+            path: JSON数据文件路径，日志和二进制快照保存在同目录下加后缀的文件中
+            compact_min_bytes: 日志合并的最小大小
+            compact_ratio: 日志超过快照大小的该倍数时合并
+            binary_snapshot: 快照写为二进制格式，False时写为JSON（供需要直接读取JSON的工具使用）
+        """
+        self.path = path
+        self.snapshot_path = path + SNAPSHOT_SUFFIX
+        self.binary_snapshot = binary_snapshot
+        self.log_path = path + LOG_SUFFIX
+        self.compacting_path = path + COMPACTING_SUFFIX
+        self.compact_min_bytes = compact_min_bytes
+        self.compact_ratio = compact_ratio
+        # 已写入的状态：URL -> (订阅源信息, [(条目GUID, 内容摘要)])，用于计算下次写入的差异
+        self._written: Dict[str, Tuple[dict, List[Tuple[str, str]]]] = {}
+        self._version = STORE_VERSION
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+
+    def load(self) -> Tuple[int, List[Feed]]:
+        with self._lock:
+            self._truncate_torn_record()
+            version, feeds = self._read_state()
+            self._written = {feed.url: self._written_state(feed) for feed in feeds}
+            self._version = version
+            # 上次合并中途退出：在后台重新合并
+            if os.path.exists(self.compacting_path):
+                self._start_compactor()
+            return version, feeds
+
+    def save(self, feeds: List[Feed], changes: StoreChanges):
+        with self._lock:
+            # 没有快照或快照是旧版本格式时写入完整快照
+            if self._snapshot_size() is None or self._version < STORE_VERSION:
+                self._write_snapshot(feeds)
+                return
+
+            records = []
+            feeds_by_url = {feed.url: feed for feed in feeds}
+            if changes.full:
+                # 修改范围未知：与已写入的状态逐个比较，只记录有差异的部分
+                removed = [url for url in self._written if url not in feeds_by_url]
+                changed = {feed.url: True for feed in feeds}
+            else:
+                removed = changes.removed
+                changed = changes.feeds
+
+            for url in removed:
+                if self._written.pop(url, None) is not None:
+                    records.append({'op': 'remove', 'url': url})
+            for url, items_changed in changed.items():
+                feed = feeds_by_url.get(url)
+                if feed is not None:
+                    records.extend(self._feed_records(feed, items_changed))
+
+            if records:
+                self._append(records)
+                self._maybe_compact()
+
+    def close(self):
+        self.wait_for_compaction()
+
+    def wait_for_compaction(self):
+        """等待进行中的后台合并完成"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def compact(self):
+        """把日志合并为新快照（在当前线程执行）"""
+        self.wait_for_compaction()
+        with self._lock:
+            self._rotate_log()
+        self._fold_compacting_log()
+
+    def exists(self) -> bool:
+        """是否已有快照或日志文件"""
+        return any(os.path.exists(path) for path in self._files())
+
+    def archive(self, suffix: str = '.bak'):
+        """给快照和日志文件加上后缀保留（迁移到其他存储后使用）"""
+        self.wait_for_compaction()
+        for path in self._files():
+            if os.path.exists(path):
+                os.replace(path, path + suffix)
+
+    def _files(self) -> List[str]:
+        return [self.snapshot_path, self.path, self.compacting_path, self.log_path]
+
+    def _feed_records(self, feed: Feed, items_changed: bool) -> List[dict]:
+        """一个订阅源与已写入状态的差异"""
+        written = self._written.get(feed.url)
+        state = self._written_state(feed)
+        if written is None:
+            self._written[feed.url] = state
+            return [{'op': 'replace', 'feed': feed_to_dict(feed)}]
+
+        records = []
+        if state[0] != written[0]:
+            records.append({'op': 'feed', 'feed': state[0]})
+        if items_changed and state[1] != written[1]:
+            records.append(self._item_record(feed, written[1], state[1]))
+        self._written[feed.url] = state
+        return records
+
+    @staticmethod
+    def _item_record(feed: Feed, old_keys: List[Tuple[str, str]],
+                     new_keys: List[Tuple[str, str]]) -> dict:
+        """条目的差异记录；GUID为空或重复时无法按GUID对应，改为写入整个订阅源"""
+        old_hashes = dict(old_keys)
+        new_guids = [guid for guid, _ in new_keys]
+        new_guid_set = set(new_guids)
+        if ('' in new_guid_set or len(new_guid_set) != len(new_guids)
+                or '' in old_hashes or len(old_hashes) != len(old_keys)):
+            return {'op': 'replace', 'feed': feed_to_dict(feed)}
+
+        record = {
+            'op': 'items',
+            'url': feed.url,
+            'upsert': [item_to_dict(item) for item, (guid, content_hash) in zip(feed.items, new_keys)
+                       if old_hashes.get(guid) != content_hash],
+            'delete': [guid for guid, _ in old_keys if guid not in new_guid_set],
+        }
+        # 重放时保留的条目维持原顺序，新条目追加在最后；结果不同时才记录顺序
+        expected = [guid for guid, _ in old_keys if guid in new_guid_set]
+        expected += [guid for guid in new_guids if guid not in old_hashes]
+        if expected != new_guids:
+            record['order'] = new_guids
+        return record
+
+    @staticmethod
+    def _written_state(feed: Feed) -> Tuple[dict, List[Tuple[str, str]]]:
+        return (feed_to_dict(feed, include_items=False),
+                [(item.guid, item.content_hash) for item in feed.items])
+
+    def _append(self, records: List[dict]):
+        """追加日志记录；每次重新打开文件，合并时日志改名后自动写入新文件"""
+        lines = ''.join(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+                        for record in records)
+        with open(self.log_path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _truncate_torn_record(self):
+        """去掉日志末尾写入中途崩溃留下的半行，避免之后追加的记录接在后面"""
+        if not os.path.exists(self.log_path):
+            return
+        with open(self.log_path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            f.seek(0)
+            end = f.read().rfind(b'\n') + 1
+            f.truncate(end)
+            print(f"忽略不完整的日志记录: {os.path.basename(self.log_path)}")
+
+    def _write_snapshot(self, feeds: List[Feed]):
+        """直接写入完整快照并清空日志"""
+        self.wait_for_compaction()
+        self._write_snapshot_file(STORE_VERSION, feeds)
+        for path in (self.compacting_path, self.log_path):
+            if os.path.exists(path):
+                os.remove(path)
+        self._written = {feed.url: self._written_state(feed) for feed in feeds}
+        self._version = STORE_VERSION
+
+    def _write_snapshot_file(self, version: int, feeds: List[Feed]):
+        """按设置的格式写入快照
+
+        首次写入二进制快照时原JSON数据文件改名为.bak保留；
+        有无法写入二进制快照的数据时改为写入JSON快照
+        """
+        if self.binary_snapshot:
+            try:
+                write_snapshot(self.snapshot_path, version, feeds)
+            except SnapshotError as e:
+                print(f"无法写入二进制快照，改为写入JSON: {e}")
+            else:
+                if os.path.exists(self.path):
+                    os.replace(self.path, self.path + JSON_BACKUP_SUFFIX)
+                return
+
+        atomic_write_json(self.path, {'version': version,
+                                      'feeds': [feed_to_dict(feed) for feed in feeds]})
+        if os.path.exists(self.snapshot_path):
+            os.remove(self.snapshot_path)
+
+    def _snapshot_size(self) -> Optional[int]:
+        """当前快照文件的大小，没有快照时返回None"""
+        for path in (self.snapshot_path, self.path):
+            if os.path.exists(path):
+                return os.path.getsize(path)
+        return None
+
+    def _maybe_compact(self):
+        """日志过大时启动后台合并"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        try:
+            log_size = os.path.getsize(self.log_path)
+        except OSError:
+            return
+        snapshot_size = self._snapshot_size() or 0
+        if log_size < max(self.compact_min_bytes, snapshot_size * self.compact_ratio):
+            return
+
+        self._rotate_log()
+        self._start_compactor()
+
+    def _start_compactor(self):
+        # 非守护线程：进程退出前会等待合并完成
+        self._compactor = threading.Thread(target=self._fold_compacting_log,
+                                           name="StoreCompaction")
+        self._compactor.start()
+
+    def _rotate_log(self):
+        """把当前日志改名为合并中的日志，之后的修改写入新日志
+
+        上次合并中途退出留下的日志还没合并时不改名，先合并那一份
+        """
+        if not os.path.exists(self.compacting_path) and os.path.exists(self.log_path):
+            os.replace(self.log_path, self.compacting_path)
+
+    def _fold_compacting_log(self):
+        """读取快照并重放合并中的日志，写成新快照（不读取内存中的订阅源，无需加锁）"""
+        if not os.path.exists(self.compacting_path):
+            return
+        try:
+            version, feeds = self._read_snapshot()
+            self._replay(feeds, self.compacting_path)
+            self._write_snapshot_file(version, list(feeds.values()))
+            os.remove(self.compacting_path)
+        except Exception as e:
+            # 合并失败不影响数据：快照和日志都还在，下次重新合并
+            print(f"合并数据文件失败: {e}")
+
+    def _read_state(self) -> Tuple[int, List[Feed]]:
+        """快照加上全部日志后的订阅源列表"""
+        version, feeds = self._read_snapshot()
+        for path in (self.compacting_path, self.log_path):
+            self._replay(feeds, path)
+        return version, list(feeds.values())
+
+    def _read_snapshot(self) -> Tuple[int, Dict[str, Feed]]:
+        """读取快照：优先使用二进制快照，没有时读取JSON数据文件
+
+        二进制快照无法读取时依次尝试JSON数据文件和改名保留的.bak文件（数据可能较旧）
+        """
+        json_path = self.path
+        if os.path.exists(self.snapshot_path):
+            try:
+                version, feeds = read_snapshot(self.snapshot_path)
+                return version, {feed.url: feed for feed in feeds}
+            except (OSError, SnapshotError) as e:
+                print(f"读取二进制快照失败，改用JSON数据文件: {e}")
+                if not os.path.exists(json_path):
+                    json_path = self.path + JSON_BACKUP_SUFFIX
+
+        if not os.path.exists(json_path):
+            return STORE_VERSION, {}
+
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        # 版本1的数据文件直接是订阅源列表
+        if isinstance(data, list):
+            version, data = 1, data
+        else:
+            version, data = data.get('version', 1), data.get('feeds', [])
+        return version, {feed_data['url']: feed_from_dict(feed_data) for feed_data in data}
+
+    @staticmethod
+    def _replay(feeds: Dict[str, Feed], log_path: str):
+        """按顺序重放日志；最后一行不完整（写入中途崩溃）时忽略"""
+        if not os.path.exists(log_path):
+            return
+
+        with open(log_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    print(f"忽略不完整的日志记录: {os.path.basename(log_path)}")
+                    continue
+                _apply_record(feeds, record)
+
+
+def _apply_record(feeds: Dict[str, Feed], record: dict):
+    """把一条日志记录应用到订阅源（URL -> 订阅源）"""
+    op = record.get('op')
+    if op == 'replace':
+        feed = feed_from_dict(record['feed'])
+        feeds[feed.url] = feed
+    elif op == 'feed':
+        feed = feed_from_dict(record['feed'])
+        existing = feeds.get(feed.url)
+        if existing is not None:
+            feed.items = existing.items
+        feeds[feed.url] = feed
+    elif op == 'items':
+        feed = feeds.get(record['url'])
+        if feed is None:
+            return
+        items = {item.guid: item for item in feed.items}
+        for guid in record.get('delete', []):
+            items.pop(guid, None)
+        for item_data in record.get('upsert', []):
+            items[item_data['guid']] = item_from_dict(item_data)
+        order = record.get('order')
+        if order is None:
+            feed.items = list(items.values())
+        else:
+            feed.items = [items[guid] for guid in order if guid in items]
+    elif op == 'remove':
+        feeds.pop(record['url'], None)
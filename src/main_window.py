@@ -7,13 +7,14 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QSplitter, QListWidget, QListWidgetItem, QPushButton,
                              QMenuBar, QStatusBar, QMessageBox, QProgressBar,
                              QToolBar, QAction, QFileDialog, QInputDialog,
-                             QLabel, QFrame)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
+                             QLabel, QFrame, QApplication)
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QIcon, QFont
 import sys
 import os
 
-from feed_manager import FeedManager
+from feed_manager import FeedManager, UNCHANGED_MESSAGE
+from feed_scheduler import FeedScheduler
 from feed_dialog import AddFeedDialog, EditFeedDialog
 from feed_viewer import FeedViewer
 from models import Feed
@@ -45,7 +46,11 @@ class RefreshThread(QThread):
                 if feed:
                     self.progress_updated.emit(f"正在刷新: {feed.title}")
                     success, message = self.feed_manager.refresh_feed(url)
-                    results[url] = {'success': success, 'message': message}
+                    results[url] = {
+                        'success': success,
+                        'message': message,
+                        'unchanged': success and message == UNCHANGED_MESSAGE
+                    }
                     self.feed_refreshed.emit(url, success, message)
             
             self.all_finished.emit(results)
@@ -125,9 +130,11 @@ class FeedListWidget(QListWidget):
 class MainWindow(QMainWindow):
     """主窗口"""
     
+    scheduled_refresh_done = pyqtSignal(dict)  # 后台定时刷新结果
+    
     def __init__(self):
         super().__init__()
-        self.feed_manager = FeedManager()
+        self.feed_manager = FeedManager(flush_delay=2.0)
         self.refresh_thread = None
         
         self.setWindowTitle("Twitter RSS订阅管理器")
@@ -136,10 +143,13 @@ class MainWindow(QMainWindow):
         self.setup_ui()
         self.load_feeds()
         
-        # 设置自动刷新定时器（可选）
-        self.auto_refresh_timer = QTimer()
-        self.auto_refresh_timer.timeout.connect(self.refresh_all_feeds)
-        # self.auto_refresh_timer.start(30 * 60 * 1000)  # 30分钟自动刷新
+        # 自适应定时刷新：每个订阅源按自身更新频率在后台刷新
+        self.scheduled_refresh_done.connect(self.on_scheduled_refresh)
+        self.feed_scheduler = FeedScheduler(
+            self.feed_manager,
+            on_refreshed=self.scheduled_refresh_done.emit
+        )
+        self.feed_scheduler.start()
     
     def setup_ui(self):
         """设置界面"""
@@ -441,12 +451,26 @@ class MainWindow(QMainWindow):
     
     def on_feed_refreshed(self, url, success, message):
         """单个订阅源刷新完成"""
-        if success:
+        # 内容未变化时无需重绘
+        if success and message != UNCHANGED_MESSAGE:
             feed = self.feed_manager.get_feed_by_url(url)
             if feed:
                 self.feed_list.update_feed(feed)
                 self.feed_viewer.refresh_current_feed(feed)
     
+    def on_scheduled_refresh(self, results):
+        """后台定时刷新完成（在主线程中执行）"""
+        for url, result in results.items():
+            if result['success'] and not result.get('unchanged'):
+                feed = self.feed_manager.get_feed_by_url(url)
+                if feed:
+                    self.feed_list.update_feed(feed)
+                    # 正在查看的订阅源有更新时同时刷新内容区
+                    self.feed_viewer.refresh_current_feed(feed)
+        
+        success_count = sum(1 for r in results.values() if r['success'])
+        self.status_label.setText(f"定时刷新: {success_count}/{len(results)} 成功")
+    
     def on_refresh_finished(self, results):
         """所有刷新操作完成"""
         # 隐藏进度条
@@ -574,8 +598,22 @@ class MainWindow(QMainWindow):
             if reply == QMessageBox.Yes:
                 self.refresh_thread.terminate()
                 self.refresh_thread.wait()
+                self.shutdown_background()
                 event.accept()
             else:
                 event.ignore()
         else:
-            event.accept()
\ No newline at end of file
+            self.shutdown_background()
+            event.accept()
+    
+    def shutdown_background(self):
+        """停止定时刷新和图片下载后关闭存储
+        
+        定时刷新仍在进行时等待其结束再关闭存储，避免刷新结果写入已关闭的存储
+        """
+        if not self.feed_scheduler.stop():
+            self.status_label.setText("正在等待定时刷新结束...")
+            QApplication.processEvents()
+            self.feed_scheduler.stop(timeout=None)
+        self.feed_viewer.shutdown()
+        self.feed_manager.close()
\ No newline at end of file
@@ -7,6 +7,22 @@ from dataclasses import dataclass
 from datetime import datetime
 from typing import List, Optional
 
+from date_normalizer import to_timestamp, to_utc
+from item_text import STRUCT_IMAGES, extract_images, text_fields
+
+
+@dataclass
+class MediaItem:
+    """条目中的图片"""
+    url: str
+    width: int = 0     # 0表示未提供
+    height: int = 0
+    
+    @property
+    def is_remote(self) -> bool:
+        """是否为可直接下载的http(s)地址"""
+        return self.url.startswith(('http://', 'https://'))
+
 
 @dataclass
 class FeedItem:
@@ -17,6 +33,30 @@ class FeedItem:
     published: Optional[datetime] = None
     author: str = ""
     guid: str = ""
+    content_hash: str = ""    # 原始条目内容的摘要，刷新时用于判断条目是否变化
+    published_ts: Optional[int] = None   # 发布时间的UTC epoch秒数，用于排序和按时间筛选
+    # 由description派生的字段，创建条目时计算一次（plain_text为None表示尚未计算）
+    plain_text: Optional[str] = None     # 去掉标签后的正文
+    text_length: int = 0                 # 正文字符数
+    excerpt: str = ""                    # 正文开头的摘录
+    structure_flags: int = 0             # item_text中的STRUCT_*标记
+    media: Optional[List[MediaItem]] = None   # 正文中的图片（None表示尚未提取）
+    
+    def __post_init__(self):
+        # 发布时间统一为UTC（旧数据中没有时区信息的时间本来就是UTC）
+        self.published = to_utc(self.published)
+        if self.published_ts is None:
+            self.published_ts = to_timestamp(self.published)
+        if self.plain_text is None:
+            self.plain_text, self.text_length, self.excerpt, self.structure_flags = \
+                text_fields(self.description)
+        if self.media is None:
+            self.media = [MediaItem(url, width, height)
+                          for url, width, height in extract_images(self.description)]
+    
+    @property
+    def has_images(self) -> bool:
+        return bool(self.structure_flags & STRUCT_IMAGES)
     
     def __str__(self):
         return f"{self.title} - {self.author}"
@@ -31,6 +71,10 @@ class Feed:
     link: str = ""
     last_updated: Optional[datetime] = None
     items: List[FeedItem] = None
+    etag: str = ""            # 上次响应的ETag，用于条件请求
+    last_modified: str = ""   # 上次响应的Last-Modified，用于条件请求
+    ttl: int = 0              # RSS <ttl> 声明的缓存时间（分钟），0表示未提供
+    content_hash: str = ""    # 上次响应内容的SHA-256，内容相同则跳过解析
     
     def __post_init__(self):
         if self.items is None:
@@ -0,0 +1,196 @@
+"""
+多进程解析池
+feedparser和HTML清理都是纯Python的CPU密集操作，放到子进程中并行执行，不受GIL限制；
+下载线程把原始内容提交给解析池，取回可pickle的ParsedFeed。
+
+每个订阅源的解析有时间上限和内存上限：超时的子进程会被直接结束并补充新进程，
+返回"解析超时"结果，不影响同一批次的其他订阅源。
+
+子进程是直接运行本文件的新解释器（不是fork主进程，也不像multiprocessing的spawn方式
+重新导入主程序），通过标准输入输出传递pickle数据；内存上限在子进程启动后设置，
+只约束解析本身使用的内存
+"""
+
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+from typing import Dict, List, Optional
+
+from feed_parser import DEFAULT_MAX_ITEMS, ParsedFeed, parse_feed
+
+try:
+    import resource
+except ImportError:  # Windows没有resource模块，不限制内存
+    resource = None
+
+DEFAULT_PARSE_TIMEOUT = 30.0                    # 单个订阅源的解析时间上限（秒）
+DEFAULT_PARSE_MEMORY_LIMIT = 1024 * 1024 * 1024  # 解析进程的内存上限（字节）
+
+PARSE_TIMEOUT_MESSAGE = "解析超时"
+PARSE_MEMORY_MESSAGE = "解析内存超限"
+PARSE_CRASHED_MESSAGE = "解析进程异常退出"
+
+
+def default_parse_workers() -> int:
+    """默认解析进程数：CPU核数"""
+    return os.cpu_count() or 1
+
+
+def _worker_main(memory_limit: Optional[int]):
+    """解析进程主循环：从标准输入读取parse_feed的参数 (内容, 已有摘要, 最大条目数, URL)，
+    向标准输出写回ParsedFeed"""
+    if resource is not None and memory_limit:
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        except (ValueError, OSError):
+            pass
+
+    tasks = sys.stdin.buffer
+    # 标准输出只用于返回结果，解析过程中的print改为输出到标准错误
+    results = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    while True:
+        try:
+            task = pickle.load(tasks)
+            if task is None:
+                break
+            result = parse_feed(*task)
+        except (EOFError, OSError, pickle.UnpicklingError):
+            break
+        except MemoryError:
+            result = ParsedFeed(error=PARSE_MEMORY_MESSAGE)
+        except Exception as e:
+            result = ParsedFeed(error=f"解析错误: {str(e)}")
+
+        try:
+            pickle.dump(result, results, pickle.HIGHEST_PROTOCOL)
+            results.flush()
+        except (OSError, ValueError):
+            break
+        if result.error == PARSE_MEMORY_MESSAGE:
+            # 内存耗尽后进程状态不可靠，由父进程补充新进程
+            break
+
+
+class _Worker:
+    """一个解析子进程；读取线程把子进程返回的结果放入队列，子进程退出时放入None"""
+
+    def __init__(self, memory_limit: Optional[int]):
+        args = [sys.executable, os.path.abspath(__file__)]
+        if memory_limit:
+            args.append(str(memory_limit))
+        self.process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.results: queue.Queue = queue.Queue()
+        threading.Thread(target=self._read_results, name="FeedParserReader", daemon=True).start()
+
+    def _read_results(self):
+        try:
+            while True:
+                self.results.put(pickle.load(self.process.stdout))
+        except Exception:
+            self.results.put(None)
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def send(self, task):
+        pickle.dump(task, self.process.stdin, pickle.HIGHEST_PROTOCOL)
+        self.process.stdin.flush()
+
+    def stop(self, timeout: float = 1.0):
+        """正常退出，超时则强制结束"""
+        try:
+            self.send(None)
+            self.process.stdin.close()
+            self.process.wait(timeout)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            self.kill()
+
+    def kill(self):
+        """立即结束进程"""
+        self.process.kill()
+        self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except (OSError, ValueError):
+                pass
+
+
+class ParsePool:
+    """解析子进程池，按需启动进程，超时或崩溃的进程会被替换"""
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 timeout: float = DEFAULT_PARSE_TIMEOUT,
+                 memory_limit: Optional[int] = DEFAULT_PARSE_MEMORY_LIMIT):
+        """
+        Args:
+            max_workers: 子进程数，默认为CPU核数
+            timeout: 单个订阅源的解析时间上限（秒）
+            memory_limit: 每个解析进程的内存上限（字节），None表示不限制；仅POSIX系统生效
+        """
+        self.max_workers = max_workers or default_parse_workers()
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self._idle: List[_Worker] = []
+        self._slots = threading.Semaphore(self.max_workers)
+        self._lock = threading.Lock()
+
+    def parse(self, content: bytes,
+              known_hashes: Optional[Dict[str, str]] = None,
+              max_items: int = DEFAULT_MAX_ITEMS,
+              url: str = '') -> ParsedFeed:
+        """在子进程中解析内容，阻塞到解析完成或超时
+
+        超时、内存超限或子进程崩溃时返回带error的ParsedFeed，不抛出异常
+        """
+        with self._slots:
+            worker = self._checkout()
+            reusable = False
+            try:
+                worker.send((content, known_hashes, max_items, url))
+                result = worker.results.get(timeout=self.timeout)
+                if result is None:
+                    return ParsedFeed(error=PARSE_CRASHED_MESSAGE)
+                reusable = result.error != PARSE_MEMORY_MESSAGE
+                return result
+            except queue.Empty:
+                return ParsedFeed(error=PARSE_TIMEOUT_MESSAGE)
+            except (OSError, ValueError):
+                return ParsedFeed(error=PARSE_CRASHED_MESSAGE)
+            finally:
+                self._checkin(worker, reusable)
+
+    def shutdown(self):
+        """停止所有空闲的解析进程（之后再次使用时会重新启动）"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+    def _checkout(self) -> _Worker:
+        """取一个空闲进程，没有则启动新进程"""
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+                worker.kill()
+        return _Worker(self.memory_limit)
+
+    def _checkin(self, worker: _Worker, reusable: bool):
+        """归还进程；不可复用（超时、崩溃、内存超限）的进程直接结束"""
+        if reusable:
+            with self._lock:
+                self._idle.append(worker)
+        else:
+            worker.kill()
+
+
+if __name__ == '__main__':
+    _worker_main(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,102 @@
+"""
+RSS 2.0快速解析
+Twitter桥接（api.xgo.ing等）输出结构固定的RSS 2.0，用iterparse流式读取，
+省去feedparser的格式探测和逐元素规范化；条目字段与feedparser的结果保持一致
+（描述仍使用feedparser的HTML安全过滤）。
+
+文档不是预期的结构时返回None，由调用方改用feedparser解析
+"""
+
+import io
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from feedparser.sanitizer import _sanitize_html
+except ImportError:  # feedparser内部接口变化时不使用快速解析
+    _sanitize_html = None
+
+_CONTENT_ENCODED = '{http://purl.org/rss/1.0/modules/content/}encoded'
+_DC_CREATOR = '{http://purl.org/dc/elements/1.1/}creator'
+
+# 条目中读取的元素（其余元素忽略）
+_ITEM_FIELDS = {'title', 'link', 'guid', 'description', 'pubDate', 'author',
+                _CONTENT_ENCODED, _DC_CREATOR}
+_CHANNEL_FIELDS = {'title', 'link', 'description', 'ttl'}
+
+
+def parse_rss(content: bytes) -> Optional[Tuple[Dict[str, str], List[Dict]]]:
+    """解析RSS 2.0文档
+
+    Returns:
+        (订阅源信息, 条目列表)，字段名与feedparser一致；
+        文档不是RSS 2.0、XML格式错误或快速解析不可用时返回None
+    """
+    if _sanitize_html is None:
+        return None
+
+    feed_info: Dict[str, str] = {}
+    entries: List[Dict] = []
+    depth = 0
+    try:
+        for event, element in ET.iterparse(io.BytesIO(content), events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if depth == 1 and (element.tag != 'rss' or element.get('version') != '2.0'):
+                    return None
+                if depth == 2 and element.tag != 'channel':
+                    return None
+                continue
+
+            depth -= 1
+            if depth == 2:
+                tag = element.tag
+                if tag == 'item':
+                    entries.append(_build_entry(element))
+                    element.clear()
+                elif tag in _CHANNEL_FIELDS:
+                    feed_info[tag] = (element.text or '').strip()
+    except ET.ParseError:
+        return None
+
+    return feed_info, entries
+
+
+def _build_entry(item) -> Dict:
+    """把<item>转换为与feedparser条目相同字段的字典"""
+    entry: Dict = {}
+    fields = {}
+    guid_is_link = True
+    for child in item:
+        if child.tag in _ITEM_FIELDS and child.tag not in fields:
+            fields[child.tag] = (child.text or '').strip()
+            if child.tag == 'guid':
+                guid_is_link = child.get('isPermaLink', 'true').lower() == 'true'
+
+    if 'title' in fields:
+        entry['title'] = fields['title']
+    if 'link' in fields:
+        entry['link'] = fields['link']
+    if fields.get('guid'):
+        entry['id'] = fields['guid']
+        # 与feedparser一致：没有<link>时，永久链接形式的guid作为链接
+        if 'link' not in entry and guid_is_link:
+            entry['link'] = fields['guid']
+    if 'description' in fields:
+        entry['summary'] = _clean_markup(fields['description'])
+    if fields.get(_CONTENT_ENCODED):
+        entry['content'] = [{'value': _clean_markup(fields[_CONTENT_ENCODED])}]
+    author = fields.get('author') or fields.get(_DC_CREATOR)
+    if author:
+        entry['author'] = author
+    if fields.get('pubDate'):
+        # feedparser的条目没有updated时读取updated会得到published
+        entry['published'] = entry['updated'] = fields['pubDate']
+    return entry
+
+
+def _clean_markup(text: str) -> str:
+    """与feedparser相同的HTML安全过滤（去掉脚本、事件属性等）"""
+    if not text:
+        return text
+    return _sanitize_html(text, 'utf-8', 'text/html')
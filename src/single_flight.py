@@ -0,0 +1,79 @@
+"""
+请求合并（single-flight）
+同一个键同时只执行一次，并发的调用方等待并共享同一个结果
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """一次正在执行的调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """按键合并并发调用"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """执行func，若相同key的调用正在进行则等待其结果
+
+        Returns:
+            (结果, 是否为共享结果)；func抛出的异常会传递给所有调用方
+        """
+        call, leader = self.acquire(key)
+        if not leader:
+            return self.wait(call), True
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            self.release(key, call, error=e)
+            raise
+        self.release(key, call, result)
+        return result, call.waiters > 0
+
+    def acquire(self, key: Hashable) -> Tuple[_Call, bool]:
+        """登记一次调用，返回 (调用, 是否由调用方执行)
+
+        供不能把执行过程包装成一个函数的调用方（如异步下载）使用：
+        返回True时调用方执行并且必须调用release，否则用wait等待执行方的结果
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call:
+                call.waiters += 1
+                return call, False
+            call = self._calls[key] = _Call()
+            return call, True
+
+    def release(self, key: Hashable, call: _Call, result: Any = None, error: BaseException = None):
+        """执行方完成调用，唤醒等待的调用方"""
+        call.result = result
+        call.error = error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    @staticmethod
+    def wait(call: _Call) -> Any:
+        """等待调用完成并返回结果，执行方出错时抛出同一异常"""
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self, key: Hashable) -> bool:
+        """相同key的调用是否正在执行"""
+        with self._lock:
+            return key in self._calls
@@ -0,0 +1,243 @@
+"""
+SQLite存储后端
+订阅源和条目分表保存，使用WAL模式；每次写入只更新修改过的订阅源，
+启动时直接读取已计算好的字段。数据库为空时自动导入同名的旧JSON数据文件
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+from models import Feed, FeedItem
+from json_storage import JsonStorage
+from storage import (STORE_VERSION, StorageBackend, StoreChanges, media_from_list,
+                     media_to_list, parse_datetime)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS feeds (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    link TEXT NOT NULL DEFAULT '',
+    last_updated TEXT,
+    etag TEXT NOT NULL DEFAULT '',
+    last_modified TEXT NOT NULL DEFAULT '',
+    ttl INTEGER NOT NULL DEFAULT 0,
+    content_hash TEXT NOT NULL DEFAULT ''
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_feeds_url ON feeds (url);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    feed_id INTEGER NOT NULL REFERENCES feeds (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    guid TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    published TEXT,
+    published_ts INTEGER,
+    author TEXT NOT NULL DEFAULT '',
+    content_hash TEXT NOT NULL DEFAULT '',
+    plain_text TEXT,
+    text_length INTEGER NOT NULL DEFAULT 0,
+    excerpt TEXT NOT NULL DEFAULT '',
+    structure_flags INTEGER NOT NULL DEFAULT 0,
+    media TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_items_feed ON items (feed_id, position);
+CREATE INDEX IF NOT EXISTS idx_items_guid ON items (guid);
+CREATE INDEX IF NOT EXISTS idx_items_published ON items (published_ts);
+"""
+
+_FEED_COLUMNS = ('title', 'description', 'link', 'last_updated', 'etag',
+                 'last_modified', 'ttl', 'content_hash')
+_ITEM_COLUMNS = ('guid', 'title', 'link', 'description', 'published', 'published_ts',
+                 'author', 'content_hash', 'plain_text', 'text_length', 'excerpt',
+                 'structure_flags', 'media')
+
+_INSERT_ITEM = (
+    f"INSERT INTO items (feed_id, position, {', '.join(_ITEM_COLUMNS)}) "
+    f"VALUES (?, ?, {', '.join('?' * len(_ITEM_COLUMNS))})"
+)
+
+
+class SqliteStorage(StorageBackend):
+    """SQLite数据库，按订阅源增量写入"""
+
+    def __init__(self, path: str, legacy_json: Optional[str] = None):
+        """
+        Args:
+            path: 数据库文件路径
+            legacy_json: 旧JSON数据文件，默认为同名的.json文件；数据库为空时导入
+        """
+        self.path = path
+        if legacy_json is None:
+            legacy_json = os.path.splitext(path)[0] + '.json'
+        self.legacy_json = legacy_json
+        # 刷新线程、延迟写入定时器和asyncio线程都会写入，共用一个连接并加锁
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA foreign_keys=ON')
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def load(self) -> Tuple[int, List[Feed]]:
+        with self._lock:
+            version = self._get_meta('version')
+            if version is None:
+                return self._import_legacy_json()
+
+            feeds_by_id = {}
+            feeds = []
+            rows = self._conn.execute(
+                f"SELECT id, url, {', '.join(_FEED_COLUMNS)} FROM feeds ORDER BY position, id"
+            )
+            for (feed_id, url, title, description, link, last_updated, etag,
+                 last_modified, ttl, content_hash) in rows:
+                feed = Feed(
+                    title=title,
+                    url=url,
+                    description=description,
+                    link=link,
+                    last_updated=parse_datetime(last_updated),
+                    etag=etag,
+                    last_modified=last_modified,
+                    ttl=ttl,
+                    content_hash=content_hash
+                )
+                feeds_by_id[feed_id] = feed
+                feeds.append(feed)
+
+            rows = self._conn.execute(
+                f"SELECT feed_id, {', '.join(_ITEM_COLUMNS)} FROM items ORDER BY feed_id, position"
+            )
+            for (feed_id, guid, title, link, description, published, published_ts, author,
+                 content_hash, plain_text, text_length, excerpt, structure_flags, media) in rows:
+                feeds_by_id[feed_id].items.append(FeedItem(
+                    title=title,
+                    link=link,
+                    description=description,
+                    published=parse_datetime(published),
+                    author=author,
+                    guid=guid,
+                    content_hash=content_hash,
+                    published_ts=published_ts,
+                    plain_text=plain_text,
+                    text_length=text_length,
+                    excerpt=excerpt,
+                    structure_flags=structure_flags,
+                    media=media_from_list(json.loads(media)) if media is not None else None
+                ))
+
+            return int(version), feeds
+
+    def save(self, feeds: List[Feed], changes: StoreChanges):
+        with self._lock, self._conn:
+            if changes.full:
+                self._save_all(feeds)
+            else:
+                for url in changes.removed:
+                    self._conn.execute("DELETE FROM feeds WHERE url = ?", (url,))
+                feeds_by_url = {feed.url: feed for feed in feeds}
+                for url, items_changed in changes.feeds.items():
+                    feed = feeds_by_url.get(url)
+                    if feed is None:
+                        continue
+                    feed_id, inserted = self._upsert_feed(feed)
+                    if items_changed or inserted:
+                        self._replace_items(feed_id, feed.items)
+            self._set_meta('version', STORE_VERSION)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _save_all(self, feeds: List[Feed]):
+        """写入全部订阅源，删除数据库中已不存在的订阅源，顺序以feeds为准"""
+        urls = {feed.url for feed in feeds}
+        stale = [(url,) for (url,) in self._conn.execute("SELECT url FROM feeds") if url not in urls]
+        self._conn.executemany("DELETE FROM feeds WHERE url = ?", stale)
+        for position, feed in enumerate(feeds):
+            feed_id, _ = self._upsert_feed(feed, position)
+            self._replace_items(feed_id, feed.items)
+
+    def _upsert_feed(self, feed: Feed, position: Optional[int] = None) -> Tuple[int, bool]:
+        """写入订阅源信息，返回 (行ID, 是否为新订阅源)
+
+        position为None时保持原有顺序，新订阅源排在最后
+        """
+        values = (
+            feed.title, feed.description, feed.link,
+            feed.last_updated.isoformat() if feed.last_updated else None,
+            feed.etag, feed.last_modified, feed.ttl, feed.content_hash
+        )
+        row = self._conn.execute("SELECT id FROM feeds WHERE url = ?", (feed.url,)).fetchone()
+        if row:
+            assignments = ', '.join(f"{column} = ?" for column in _FEED_COLUMNS)
+            if position is None:
+                self._conn.execute(f"UPDATE feeds SET {assignments} WHERE id = ?", values + (row[0],))
+            else:
+                self._conn.execute(f"UPDATE feeds SET {assignments}, position = ? WHERE id = ?",
+                                   values + (position, row[0]))
+            return row[0], False
+
+        if position is None:
+            position = self._conn.execute(
+                "SELECT COALESCE(MAX(position), -1) + 1 FROM feeds"
+            ).fetchone()[0]
+        cursor = self._conn.execute(
+            f"INSERT INTO feeds (url, position, {', '.join(_FEED_COLUMNS)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(_FEED_COLUMNS))})",
+            (feed.url, position) + values
+        )
+        return cursor.lastrowid, True
+
+    def _replace_items(self, feed_id: int, items: List[FeedItem]):
+        """重写一个订阅源的全部条目"""
+        self._conn.execute("DELETE FROM items WHERE feed_id = ?", (feed_id,))
+        self._conn.executemany(_INSERT_ITEM, [
+            (feed_id, position, item.guid, item.title, item.link, item.description,
+             item.published.isoformat() if item.published else None, item.published_ts,
+             item.author, item.content_hash, item.plain_text, item.text_length, item.excerpt,
+             item.structure_flags, json.dumps(media_to_list(item.media), ensure_ascii=False))
+            for position, item in enumerate(items)
+        ])
+
+    def _import_legacy_json(self) -> Tuple[int, List[Feed]]:
+        """新数据库：导入旧JSON数据文件（包括快照和修改日志），导入后原文件改名为.bak保留"""
+        if not self.legacy_json:
+            return STORE_VERSION, []
+        legacy = JsonStorage(self.legacy_json)
+        if not legacy.exists():
+            return STORE_VERSION, []
+
+        version, feeds = legacy.load()
+        with self._conn:
+            self._save_all(feeds)
+            # 保留原数据格式版本，FeedManager据此执行条目ID迁移
+            self._set_meta('version', version)
+        legacy.archive('.bak')
+        print(f"已将 {len(feeds)} 个订阅源从 {os.path.basename(self.legacy_json)} "
+              f"迁移到 {os.path.basename(self.path)}")
+        return version, feeds
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value):
+        self._conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (key, str(value))
+        )
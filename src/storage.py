@@ -0,0 +1,186 @@
+"""
+订阅源数据存储
+FeedManager通过StorageBackend读写订阅源和条目，具体格式由后端决定：
+.db为SQLite数据库（默认），.json为JSON快照加修改日志。
+FeedManager记录每次写入涉及的订阅源（StoreChanges），支持增量写入的后端只写这些订阅源
+"""
+
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from models import Feed, FeedItem, MediaItem
+
+# 数据格式版本：1为订阅源列表（条目ID可能由hash()生成），2增加版本号并使用稳定条目ID
+STORE_VERSION = 2
+
+
+@dataclass
+class StoreChanges:
+    """两次写入之间的修改"""
+    full: bool = False                                   # 修改范围未知，需要写入全部订阅源
+    feeds: Dict[str, bool] = field(default_factory=dict)  # 修改过的订阅源URL -> 条目是否变化
+    removed: Set[str] = field(default_factory=set)       # 已删除的订阅源URL
+
+    def mark(self, url: str, items: bool = True):
+        """记录订阅源被添加或修改，items为False表示只修改了订阅源信息
+
+        不会取消已记录的删除：后端先处理删除再写入修改，删除后重新添加的订阅源仍会写入
+        """
+        self.feeds[url] = self.feeds.get(url, False) or items
+
+    def remove(self, url: str):
+        """记录订阅源被删除"""
+        self.feeds.pop(url, None)
+        self.removed.add(url)
+
+    def __bool__(self):
+        return self.full or bool(self.feeds) or bool(self.removed)
+
+
+class StorageBackend(ABC):
+    """存储后端基类"""
+
+    @abstractmethod
+    def load(self) -> Tuple[int, List[Feed]]:
+        """读取全部订阅源，返回 (数据格式版本, 订阅源列表)，没有数据时返回 (STORE_VERSION, [])"""
+
+    @abstractmethod
+    def save(self, feeds: List[Feed], changes: StoreChanges):
+        """写入修改，feeds为当前全部订阅源（按顺序）
+
+        changes.full为True时写入全部订阅源，否则只需处理changes中的订阅源
+        """
+
+    @abstractmethod
+    def close(self):
+        """释放文件句柄或数据库连接"""
+
+
+def open_storage(path: str) -> StorageBackend:
+    """按扩展名选择存储后端：.json为JSON快照加修改日志，其余为SQLite数据库"""
+    if path.lower().endswith('.json'):
+        from json_storage import JsonStorage
+        return JsonStorage(path)
+    from sqlite_storage import SqliteStorage
+    return SqliteStorage(path)
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """写入同目录下的临时文件后替换目标文件，中途崩溃不会损坏原文件，读取方也不会看到写了一半的内容"""
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def atomic_write_json(path: str, data, indent: Optional[int] = 2, default=None):
+    """原子写入UTF-8 JSON文件（见atomic_write_bytes）"""
+    text = json.dumps(data, ensure_ascii=False, indent=indent, default=default)
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """读取保存的ISO时间，格式错误时返回None"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def feed_to_dict(feed: Feed, include_items: bool = True) -> dict:
+    """订阅源转换为可JSON序列化的字典"""
+    feed_data = {
+        'title': feed.title,
+        'url': feed.url,
+        'description': feed.description,
+        'link': feed.link,
+        'last_updated': feed.last_updated.isoformat() if feed.last_updated else None,
+        'etag': feed.etag,
+        'last_modified': feed.last_modified,
+        'ttl': feed.ttl,
+        'content_hash': feed.content_hash,
+    }
+    if include_items:
+        feed_data['items'] = [item_to_dict(item) for item in feed.items]
+    return feed_data
+
+
+def item_to_dict(item: FeedItem) -> dict:
+    """条目转换为可JSON序列化的字典"""
+    return {
+        'title': item.title,
+        'link': item.link,
+        'description': item.description,
+        'published': item.published.isoformat() if item.published else None,
+        'published_ts': item.published_ts,
+        'author': item.author,
+        'guid': item.guid,
+        'content_hash': item.content_hash,
+        'plain_text': item.plain_text,
+        'text_length': item.text_length,
+        'excerpt': item.excerpt,
+        'structure_flags': item.structure_flags,
+        'media': media_to_list(item.media),
+    }
+
+
+def feed_from_dict(feed_data: dict) -> Feed:
+    """从字典创建订阅源（包括条目）"""
+    feed = Feed(
+        title=feed_data['title'],
+        url=feed_data['url'],
+        description=feed_data.get('description', ''),
+        link=feed_data.get('link', ''),
+        last_updated=parse_datetime(feed_data.get('last_updated')),
+        etag=feed_data.get('etag', ''),
+        last_modified=feed_data.get('last_modified', ''),
+        ttl=feed_data.get('ttl', 0),
+        content_hash=feed_data.get('content_hash', '')
+    )
+    feed.items = [item_from_dict(item_data) for item_data in feed_data.get('items', [])]
+    return feed
+
+
+def item_from_dict(item_data: dict) -> FeedItem:
+    """从字典创建条目，旧数据缺少的派生字段由FeedItem重新计算"""
+    return FeedItem(
+        title=item_data['title'],
+        link=item_data['link'],
+        description=item_data.get('description', ''),
+        published=parse_datetime(item_data.get('published')),
+        author=item_data.get('author', ''),
+        guid=item_data.get('guid', ''),
+        content_hash=item_data.get('content_hash', ''),
+        published_ts=item_data.get('published_ts'),
+        plain_text=item_data.get('plain_text'),
+        text_length=item_data.get('text_length', 0),
+        excerpt=item_data.get('excerpt', ''),
+        structure_flags=item_data.get('structure_flags', 0),
+        media=media_from_list(item_data.get('media'))
+    )
+
+
+def media_to_list(media: Optional[List[MediaItem]]) -> List[dict]:
+    return [{'url': m.url, 'width': m.width, 'height': m.height} for m in media or []]
+
+
+def media_from_list(media_data) -> Optional[List[MediaItem]]:
+    """读取保存的图片列表，旧数据没有该字段时返回None（由FeedItem重新提取）"""
+    if media_data is None:
+        return None
+    return [MediaItem(m['url'], m.get('width', 0), m.get('height', 0)) for m in media_data]
@@ -3,37 +3,47 @@
 整合内容评分、AI摘要、分类等功能生成智能榜单
 """
 
+import asyncio
 import json
 import os
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 from dataclasses import asdict
 from dotenv import load_dotenv
 
 from feed_manager import FeedManager
 from content_ranker import ContentRanker, ContentScore
 from gemini_service import GeminiService
+from storage import atomic_write_json
 
 # 加载环境变量
 load_dotenv()
 
+# 复用上次榜单的最长时间（占筛选时间范围的比例）：时间窗口不断后移，旧榜单会逐渐包含已过期的内容
+REUSE_MAX_AGE_RATIO = 0.05
+
 class TrendingGenerator:
     """热门内容榜单生成器"""
     
-    def __init__(self, gemini_api_key: str = None):
+    def __init__(self, gemini_api_key: str = None, feed_manager: Optional[FeedManager] = None):
         """
         初始化榜单生成器
         
         Args:
             gemini_api_key: Gemini API密钥
+            feed_manager: 共用的RSS管理器；同一进程中已有管理器时应传入，
+                          避免两份内存数据各自写入数据文件、同一订阅源被重复刷新
         """
-        self.feed_manager = FeedManager()
+        self.feed_manager = feed_manager or FeedManager()
         self.content_ranker = ContentRanker()
         self.gemini_service = GeminiService(gemini_api_key)
         
         # 确保output目录存在
         self.output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'trending_output')
         os.makedirs(self.output_dir, exist_ok=True)
+        # 多个生成任务可能同时完成，串行写入结果文件
+        self._save_lock = threading.Lock()
         
         print("热门榜单生成器初始化完成！")
     
@@ -41,7 +51,8 @@ class TrendingGenerator:
                               hours: int = 24, 
                               top_count: int = 20,
                               refresh_feeds: bool = False,
-                              use_ai_summary: bool = True) -> Dict[str, Any]:
+                              use_ai_summary: bool = True,
+                              progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, Any]:
         """
         生成热门榜单
         
@@ -50,10 +61,14 @@ class TrendingGenerator:
             top_count: 每个榜单的条目数
             refresh_feeds: 是否先刷新RSS源
             use_ai_summary: 是否使用AI生成摘要
+            progress_callback: 进度回调 (事件名, 数据)，事件名为'stage'（流水线阶段）或'feed'（单个RSS源刷新结果）
             
         Returns:
             包含所有榜单的字典
         """
+        def notify(event: str, **data):
+            if progress_callback:
+                progress_callback(event, data)
         print("=" * 50)
         print("🚀 开始生成热门榜单")
         print("=" * 50)
@@ -61,19 +76,40 @@ class TrendingGenerator:
         # 步骤1: 刷新RSS源（可选）
         if refresh_feeds:
             print("📡 刷新所有RSS源...")
-            self.feed_manager.refresh_all_feeds_bulk()
+            notify('stage', stage='refresh', message='刷新所有RSS源')
+            refresh_results = asyncio.run(self.feed_manager.refresh_feeds_async(
+                progress_callback=lambda url, success, message: notify(
+                    'feed', url=url, success=success, message=message)
+            ))
+            success_count = sum(1 for r in refresh_results.values() if r['success'])
+            changed_count = sum(1 for r in refresh_results.values()
+                                if r['success'] and not r.get('unchanged'))
+            print(f"刷新完成: {success_count}/{len(refresh_results)} 成功，{changed_count} 个有更新")
+            
+            # 每个源都刷新成功且内容未变化（304或内容摘要相同）时，相同参数的
+            # 近期榜单仍然有效，跳过评分和AI摘要；有源刷新失败时不能确定内容没有变化
+            if refresh_results and all(r['success'] and r.get('unchanged')
+                                       for r in refresh_results.values()):
+                previous = self._reusable_result(hours, top_count, use_ai_summary)
+                if previous:
+                    print("♻️ RSS内容未变化，复用上次生成的榜单")
+                    notify('stage', stage='done', message='RSS内容未变化，复用上次生成的榜单')
+                    return previous
         
         # 步骤2: 获取最近内容
         print(f"📅 获取最近{hours}小时的内容...")
         recent_items = self.feed_manager.get_recent_content(hours)
         print(f"找到 {len(recent_items)} 条最近内容")
+        notify('stage', stage='collect', message=f'找到 {len(recent_items)} 条最近内容')
         
         if not recent_items:
             print("⚠️ 没有找到最近的内容")
+            notify('stage', stage='done', message='没有找到最近的内容')
             return self._create_empty_result()
         
         # 步骤3: 内容评分和排序
         print("🎯 进行内容评分和排序...")
+        notify('stage', stage='rank', message='进行内容评分和排序')
         
         # 生成综合榜单
         general_ranking = self.content_ranker.rank_content(recent_items, top_count)
@@ -86,6 +122,7 @@ class TrendingGenerator:
         # 步骤4: AI增强（生成摘要）
         if use_ai_summary and self.gemini_service.enabled:
             print("🤖 使用AI生成摘要...")
+            notify('stage', stage='ai_summary', message='使用AI生成摘要')
             general_ranking = self.gemini_service.batch_generate_summaries(general_ranking)
             
             for category, items in category_rankings.items():
@@ -97,11 +134,16 @@ class TrendingGenerator:
             general_ranking=general_ranking,
             category_rankings=category_rankings,
             hours=hours,
-            total_items=len(recent_items)
+            total_items=len(recent_items),
+            top_count=top_count,
+            use_ai_summary=use_ai_summary
         )
         
         # 步骤6: 保存结果
+        notify('stage', stage='save', message='保存榜单结果')
         self._save_result(result)
+        notify('stage', stage='done', message='热门榜单生成完成',
+               general_count=len(general_ranking), categories_count=len(category_rankings))
         
         print("=" * 50)
         print("✅ 热门榜单生成完成！")
@@ -115,7 +157,9 @@ class TrendingGenerator:
                       general_ranking: List[Dict],
                       category_rankings: Dict[str, List[Dict]],
                       hours: int,
-                      total_items: int) -> Dict[str, Any]:
+                      total_items: int,
+                      top_count: int = 20,
+                      use_ai_summary: bool = True) -> Dict[str, Any]:
         """创建结果字典"""
         
         # 生成标题
@@ -128,7 +172,9 @@ class TrendingGenerator:
                 'generated_at': datetime.now().isoformat(),
                 'time_range_hours': hours,
                 'total_source_items': total_items,
-                'ai_summary_enabled': self.gemini_service.enabled
+                'ai_summary_enabled': self.gemini_service.enabled,
+                'top_count': top_count,
+                'use_ai_summary': use_ai_summary
             },
             'general': {
                 'title': general_title,
@@ -153,6 +199,27 @@ class TrendingGenerator:
         
         return result
     
+    def _reusable_result(self, hours: int, top_count: int, use_ai_summary: bool) -> Optional[Dict[str, Any]]:
+        """返回参数相同且生成时间不超过 hours * REUSE_MAX_AGE_RATIO 的上次榜单结果，没有则返回None"""
+        previous = self.get_latest_result()
+        if not previous:
+            return None
+        
+        meta = previous.get('meta', {})
+        if (meta.get('time_range_hours') != hours or
+                meta.get('top_count') != top_count or
+                meta.get('use_ai_summary') != use_ai_summary):
+            return None
+        
+        try:
+            generated_at = datetime.fromisoformat(meta['generated_at'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        age = datetime.now() - generated_at
+        if not timedelta(0) <= age <= timedelta(hours=hours * REUSE_MAX_AGE_RATIO):
+            return None
+        return previous
+    
     def _format_ranking_items(self, ranking_items: List[Dict]) -> List[Dict]:
         """格式化榜单项目"""
         formatted_items = []
@@ -166,6 +233,7 @@ class TrendingGenerator:
                 'title': feed_item.title,
                 'link': feed_item.link,
                 'description': feed_item.description,
+                'excerpt': feed_item.excerpt,
                 'summary': item_data.get('summary', ''),
                 'published': feed_item.published.isoformat() if feed_item.published else None,
                 'author': feed_item.author,
@@ -215,16 +283,12 @@ class TrendingGenerator:
     def _save_result(self, result: Dict[str, Any]):
         """保存结果到文件"""
         try:
-            # 保存完整结果
-            result_file = os.path.join(self.output_dir, 'trending_result.json')
-            with open(result_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
-            
-            # 保存简化版本（用于前端显示）
             simplified = self._create_simplified_result(result)
-            simple_file = os.path.join(self.output_dir, 'trending_simple.json')
-            with open(simple_file, 'w', encoding='utf-8') as f:
-                json.dump(simplified, f, ensure_ascii=False, indent=2)
+            with self._save_lock:
+                # 保存完整结果
+                atomic_write_json(os.path.join(self.output_dir, 'trending_result.json'), result)
+                # 保存简化版本（用于前端显示）
+                atomic_write_json(os.path.join(self.output_dir, 'trending_simple.json'), simplified)
             
             print(f"📁 结果已保存到: {self.output_dir}")
             
@@ -248,7 +312,7 @@ class TrendingGenerator:
                 'rank': item['rank'],
                 'title': item['title'],
                 'link': item['link'],
-                'summary': item.get('summary', item['description'][:150] + "..." if len(item['description']) > 150 else item['description']),
+                'summary': item.get('summary') or item.get('excerpt', ''),
                 'published': item['published'],
                 'author': item['author'],
                 'score': item['score']['total']
@@ -267,7 +331,7 @@ class TrendingGenerator:
                     'rank': item['rank'],
                     'title': item['title'],
                     'link': item['link'],
-                    'summary': item.get('summary', item['description'][:100] + "..." if len(item['description']) > 100 else item['description']),
+                    'summary': item.get('summary') or item.get('excerpt', ''),
                     'score': item['score']['total']
                 }
                 simplified['categories'][category]['items'].append(simplified_item)
@@ -292,6 +292,56 @@ class ApiClient {
     static async delete(url) {
         return this.request(url, { method: 'DELETE' });
     }
+    
+    /**
+     * 轮询后台任务直到完成
+     * @param {string} jobId 任务ID
+     * @param {function} onProgress 每次轮询后的回调，参数为任务记录
+     * @param {number} interval 轮询间隔（毫秒）
+     */
+    static async waitForJob(jobId, onProgress = null, interval = 1000) {
+        while (true) {
+            const data = await this.get(`/api/jobs/${jobId}`);
+            const job = data.job;
+            if (onProgress) {
+                onProgress(job);
+            }
+            if (job.state === 'succeeded' || job.state === 'failed') {
+                return job;
+            }
+            await new Promise(resolve => setTimeout(resolve, interval));
+        }
+    }
+    
+    /**
+     * 通过Server-Sent Events订阅后台任务进度，任务结束时返回最终任务记录
+     * @param {string} jobId 任务ID
+     * @param {object} handlers 事件处理函数，如 {feed: data => ..., stage: data => ...}
+     */
+    static streamJob(jobId, handlers = {}) {
+        if (typeof EventSource === 'undefined') {
+            return this.waitForJob(jobId);
+        }
+        
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(`/api/jobs/${jobId}/events`);
+            
+            Object.entries(handlers).forEach(([event, handler]) => {
+                source.addEventListener(event, e => handler(JSON.parse(e.data)));
+            });
+            
+            source.addEventListener('state', e => {
+                source.close();
+                resolve(JSON.parse(e.data));
+            });
+            
+            // 连接中断时改为轮询
+            source.onerror = () => {
+                source.close();
+                this.waitForJob(jobId).then(resolve, reject);
+            };
+        });
+    }
 }
 
 // 全局API客户端
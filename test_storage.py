@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+测试订阅源数据存储
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加src目录到Python路径
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from feed_manager import FeedManager, UNCHANGED_MESSAGE
+from json_storage import JsonStorage
+from models import Feed, FeedItem, MediaItem
+from storage import StoreChanges
+
+
+def test_snapshot_falls_back_to_json_for_oversized_numbers():
+    """数值超出二进制快照字段范围时改为写入JSON快照，保存和合并都不失败"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'feeds_data.json')
+        feed = Feed(title='Oversized', url='https://example.com/rss', ttl=2 ** 40)
+        feed.items.append(FeedItem(
+            title='Big image',
+            link='https://example.com/1',
+            description='<p>text</p>',
+            media=[MediaItem('https://example.com/a.png', 5000000000, 10)]
+        ))
+
+        storage = JsonStorage(path)
+        storage.load()
+        storage.save([feed], StoreChanges(full=True))
+        storage.close()
+        assert os.path.exists(path)
+        assert not os.path.exists(path + '.snap')
+
+        # 修改后合并日志，仍然写为JSON快照
+        feed.title = 'Oversized 2'
+        changes = StoreChanges()
+        changes.mark(feed.url, items=False)
+        storage = JsonStorage(path)
+        storage.load()
+        storage.save([feed], changes)
+        storage.compact()
+        storage.close()
+        assert not os.path.exists(path + '.log.1')
+
+        _, feeds = JsonStorage(path).load()
+        assert [f.title for f in feeds] == ['Oversized 2']
+        assert feeds[0].ttl == 2 ** 40
+        assert feeds[0].items[0].media[0].width == 5000000000
+    print("✅ 超出范围的数值改为写入JSON快照")
+
+
+RSS_BODY = (b'<?xml version="1.0"?><rss version="2.0"><channel><title>Local</title>'
+            b'<item><title>A</title><link>https://example.com/a</link><guid>a</guid></item>'
+            b'</channel></rss>')
+
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    """/etag返回带ETag的RSS并支持304；/plain不支持条件请求（内容每次相同）"""
+
+    def do_GET(self):
+        if self.path == '/etag':
+            etag = f'"v{self.server.version}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header('ETag', etag)
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml')
+        self.send_header('Content-Length', str(len(RSS_BODY)))
+        self.end_headers()
+        self.wfile.write(RSS_BODY)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _refresh_and_reload(data_file: str, refresh):
+    """添加订阅源后执行refresh(manager, url)两次，重新加载数据文件返回 (刷新后的订阅源, 重新加载的订阅源)"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ConditionalHandler)
+    server.version = 1
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        manager = FeedManager(data_file, parse_workers=0)
+        url = base + ('/etag' if 'etag' in os.path.basename(data_file) else '/plain')
+        success, message = manager.add_feed_from_url(url)
+        assert success, message
+        manager.get_feed_by_url(url).last_updated = None
+        server.version = 2
+
+        refresh(manager, url)            # 新ETag（内容相同）
+        first = manager.get_feed_by_url(url).last_updated
+        messages = refresh(manager, url)  # 304或内容摘要相同
+        assert messages == UNCHANGED_MESSAGE, messages
+        feed = manager.get_feed_by_url(url)
+        etag, last_updated = feed.etag, feed.last_updated
+        assert last_updated and last_updated >= first
+        manager.close()
+
+        reloaded = FeedManager(data_file, parse_workers=0)
+        loaded = reloaded.get_feed_by_url(url)
+        reloaded.close()
+        return (etag, last_updated), (loaded.etag, loaded.last_updated)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _refresh_sync(manager: FeedManager, url: str) -> str:
+    return manager.refresh_feed(url)[1]
+
+
+def _refresh_async(manager: FeedManager, url: str) -> str:
+    return asyncio.run(manager.refresh_feeds_async([url]))[url]['message']
+
+
+def test_unchanged_refresh_is_persisted():
+    """304和内容未变化时更新的ETag、检查时间重启后仍然保留（同步和异步刷新，两种存储格式）"""
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('etag.db', 'etag.json', 'plain.db', 'plain.json'):
+            for refresh in (_refresh_sync, _refresh_async):
+                path = os.path.join(directory, f'{refresh.__name__}_{name}')
+                expected, loaded = _refresh_and_reload(path, refresh)
+                assert loaded == expected, (path, expected, loaded)
+                if name.startswith('etag'):
+                    assert loaded[0] == '"v2"'
+    print("✅ 内容未变化时的校验信息和检查时间已保存")
+
+
+if __name__ == "__main__":
+    test_snapshot_falls_back_to_json_for_oversized_numbers()
+    test_unchanged_refresh_is_persisted()